@@ -12,6 +12,7 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 from aveslog.mail import MailDispatcherFactory
 from aveslog.mail import MailDispatcher
 from aveslog.v0 import create_api_v0_blueprint
+from aveslog.v0.account import DEFAULT_PASSWORD_HASH_ITERATIONS
 
 
 def create_app(test_config: Optional[dict] = None) -> Flask:
@@ -61,6 +62,8 @@ def configure_app(app: Flask, test_config: dict) -> None:
     raise Exception('Flask secret key not set')
   if not os.path.isdir(app.config['LOGS_DIR_PATH']):
     os.makedirs(app.config['LOGS_DIR_PATH'])
+  app.config.setdefault('PASSWORD_HASH_ITERATIONS', int(
+    os.environ.get('PASSWORD_HASH_ITERATIONS', DEFAULT_PASSWORD_HASH_ITERATIONS)))
   if 'FRONTEND_HOST' not in app.config and 'FRONTEND_HOST' in os.environ:
     app.config['FRONTEND_HOST'] = os.environ['FRONTEND_HOST']
   elif 'FRONTEND_HOST' not in app.config:
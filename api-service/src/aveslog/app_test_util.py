@@ -35,6 +35,7 @@ def create_test_app(mail_list):
     'LOGS_DIR_PATH': 'test-logs',
     'FRONTEND_HOST': 'http://localhost:3002',
     'RATE_LIMIT': f'60/minute',
+    'QUERY_STATISTICS_HEADERS': True,
   }
 
   app = aveslog.create_app_with_dependencies(
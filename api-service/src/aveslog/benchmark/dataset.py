@@ -0,0 +1,405 @@
+"""Generates a large, reproducible synthetic dataset into the database
+
+Birds get binomial names and common names in several locales, and are
+sighted with a skewed popularity by birders with a skewed activity, at
+positions clustered around hotspots. Every account can log in with the
+password in DATASET_PASSWORD. Rows are written with COPY, into the database
+given by the DATABASE_* environment variables.
+
+  python -m aveslog.benchmark.dataset --scale large --seed 1 --reset
+"""
+import argparse
+import io
+import itertools
+import math
+import random
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import psycopg2
+
+from aveslog.v0 import create_database_connection_details
+from aveslog.v0.account import PasswordHasher
+from aveslog.v0.authentication import SaltFactory
+
+DATASET_PASSWORD = 'birder-password'
+
+locale_codes = ['en', 'sv', 'ko', 'de', 'fr', 'es']
+common_name_ratios = {
+  'en': 1.0, 'sv': 0.6, 'ko': 0.3, 'de': 0.5, 'fr': 0.5, 'es': 0.4,
+}
+
+scales = {
+  'small': {
+    'birds': 500, 'birders': 500, 'sightings': 50000, 'hotspots': 50,
+  },
+  'medium': {
+    'birds': 3000, 'birders': 5000, 'sightings': 500000, 'hotspots': 200,
+  },
+  'large': {
+    'birds': 11000, 'birders': 30000, 'sightings': 3000000, 'hotspots': 800,
+  },
+}
+
+syllables = [
+  'ac', 'al', 'an', 'ar', 'as', 'ba', 'be', 'bo', 'ca', 'ce', 'ci', 'co',
+  'da', 'de', 'do', 'el', 'en', 'er', 'fa', 'fi', 'ga', 'ge', 'go', 'ha',
+  'he', 'la', 'le', 'li', 'lo', 'ma', 'me', 'mi', 'mo', 'na', 'ne', 'no',
+  'or', 'pa', 'pe', 'pi', 'ra', 're', 'ri', 'ro', 'sa', 'se', 'si', 'ta',
+  'te', 'ti', 'to', 'tu', 'va', 've', 'vi', 'za',
+]
+latin_suffixes = ['us', 'a', 'is', 'um', 'ica', 'ensis', 'atus', 'ii']
+english_adjectives = [
+  'Common', 'Greater', 'Lesser', 'Eurasian', 'Spotted', 'Black-headed',
+  'Red-billed', 'Little', 'Great', 'Northern', 'Southern', 'Crested',
+  'Long-tailed', 'White-throated', 'Grey', 'Golden', 'Pied', 'Hooded',
+]
+english_groups = [
+  'Warbler', 'Thrush', 'Finch', 'Owl', 'Gull', 'Tern', 'Sparrow', 'Swift',
+  'Heron', 'Eagle', 'Falcon', 'Magpie', 'Crow', 'Pipit', 'Wren', 'Plover',
+  'Sandpiper', 'Duck', 'Goose', 'Woodpecker', 'Kingfisher', 'Bunting',
+]
+
+COPY_BATCH_SIZE = 100000
+first_sighting_date = date(2010, 1, 1)
+sighting_days = 365 * 11
+position_name_time = datetime(2020, 1, 1)
+
+
+def copy_value(value) -> str:
+  if value is None:
+    return '\\N'
+  return str(value) \
+    .replace('\\', '\\\\') \
+    .replace('\t', '\\t') \
+    .replace('\n', '\\n')
+
+
+def copy_rows(cursor, table: str, columns: Sequence[str],
+      rows: Iterable[tuple]) -> int:
+  statement = f'COPY {table} ({", ".join(columns)}) FROM STDIN'
+  count = 0
+  rows = iter(rows)
+  while True:
+    batch = list(itertools.islice(rows, COPY_BATCH_SIZE))
+    if not batch:
+      return count
+    buffer = io.StringIO()
+    for row in batch:
+      buffer.write('\t'.join(map(copy_value, row)))
+      buffer.write('\n')
+    buffer.seek(0)
+    cursor.copy_expert(statement, buffer)
+    count += len(batch)
+
+
+def zipf_cumulative_weights(count: int, exponent: float) -> List[float]:
+  """Cumulative weights where rank n is 1/n^exponent as likely as rank 1"""
+  return list(itertools.accumulate(
+    1 / math.pow(rank, exponent) for rank in range(1, count + 1)))
+
+
+def capitalized_word(rng: random.Random, syllable_count: int) -> str:
+  word = ''.join(rng.choice(syllables) for _ in range(syllable_count))
+  return word.capitalize()
+
+
+class DatasetGenerator:
+
+  def __init__(self,
+        seed: int,
+        birds: int,
+        birders: int,
+        sightings: int,
+        hotspots: int,
+        connections_per_birder: int = 5,
+        positioned_ratio: float = 0.8,
+        named_position_ratio: float = 0.5,
+        hotspot_ratio: float = 0.85,
+        admin_ratio: float = 0.01,
+  ):
+    self.seed = seed
+    self.birds = birds
+    self.birders = birders
+    self.sightings = sightings
+    self.hotspots = hotspots
+    self.connections_per_birder = connections_per_birder
+    self.positioned_ratio = positioned_ratio
+    self.named_position_ratio = named_position_ratio
+    self.hotspot_ratio = hotspot_ratio
+    self.admin_ratio = admin_ratio
+
+  def random_generator(self, name: str) -> random.Random:
+    """Independent random generator per table, so that changing one table's
+    generation leaves the others the same for the same seed"""
+    return random.Random(f'{self.seed}:{name}')
+
+  def locale_rows(self) -> Iterable[tuple]:
+    return [(index + 1, code) for index, code in enumerate(locale_codes)]
+
+  def binomial_names(self) -> List[str]:
+    rng = self.random_generator('bird')
+    genera = [capitalized_word(rng, rng.randint(2, 3))
+              for _ in range(max(self.birds // 4, 1))]
+    names = []
+    taken = set()
+    while len(names) < self.birds:
+      genus = rng.choice(genera)
+      epithet = rng.choice(syllables) + rng.choice(syllables) + \
+                rng.choice(latin_suffixes)
+      name = f'{genus} {epithet}'
+      if name not in taken:
+        taken.add(name)
+        names.append(name)
+    return names
+
+  def bird_rows(self) -> Iterable[tuple]:
+    for index, name in enumerate(self.binomial_names()):
+      yield index + 1, name
+
+  def bird_common_name_rows(self) -> Iterable[tuple]:
+    rng = self.random_generator('bird_common_name')
+    common_name_id = itertools.count(1)
+    for bird_id in range(1, self.birds + 1):
+      for locale_id, code in self.locale_rows():
+        if rng.random() < common_name_ratios[code]:
+          name = self.common_name(rng, code)
+          yield next(common_name_id), bird_id, locale_id, name
+
+  def common_name(self, rng: random.Random, locale_code: str) -> str:
+    if locale_code == 'en':
+      return (f'{rng.choice(english_adjectives)} '
+              f'{capitalized_word(rng, 2)} {rng.choice(english_groups)}')
+    if locale_code == 'ko':
+      return ''.join(chr(rng.randint(0xAC00, 0xD7A3))
+                     for _ in range(rng.randint(2, 5)))
+    return capitalized_word(rng, rng.randint(2, 4))
+
+  def picture_rows(self) -> Iterable[tuple]:
+    for bird_id, name in self.bird_rows():
+      slug = name.lower().replace(' ', '-')
+      yield bird_id, f'image/bird/{slug}-thumb.jpg', 'Aveslog'
+
+  def bird_thumbnail_rows(self) -> Iterable[tuple]:
+    return ((bird_id, bird_id) for bird_id in range(1, self.birds + 1))
+
+  def birder_rows(self) -> Iterable[tuple]:
+    return ((birder_id, self.username(birder_id))
+            for birder_id in range(1, self.birders + 1))
+
+  def account_rows(self) -> Iterable[tuple]:
+    for birder_id in range(1, self.birders + 1):
+      username = self.username(birder_id)
+      yield birder_id, username, f'{username}@example.com', birder_id, None
+
+  def hashed_password_rows(self) -> Iterable[tuple]:
+    password_hasher = PasswordHasher(SaltFactory())
+    salt, salted_hash = password_hasher.create_salt_hashed_password(
+      DATASET_PASSWORD)
+    return ((account_id, salt, salted_hash)
+            for account_id in range(1, self.birders + 1))
+
+  def username(self, birder_id: int) -> str:
+    return f'birder{birder_id:06d}'
+
+  def role_rows(self) -> Iterable[tuple]:
+    return [(1, 'admin')]
+
+  def resource_permission_rows(self) -> Iterable[tuple]:
+    return [(1, 'post common name', '^/birds/.+/common-names$', 'POST')]
+
+  def role_resource_permission_rows(self) -> Iterable[tuple]:
+    return [(1, 1)]
+
+  def account_role_rows(self) -> Iterable[tuple]:
+    admins = max(int(self.birders * self.admin_ratio), 1)
+    return ((account_id, 1) for account_id in range(1, admins + 1))
+
+  def birder_connection_rows(self) -> Iterable[tuple]:
+    rng = self.random_generator('birder_connection')
+    birder_ids = range(1, self.birders + 1)
+    cumulative_weights = zipf_cumulative_weights(self.birders, 1.0)
+    connection_id = itertools.count(1)
+    for birder_id in birder_ids:
+      count = rng.randint(0, 2 * self.connections_per_birder)
+      secondaries = set(rng.choices(
+        birder_ids, cum_weights=cumulative_weights, k=count))
+      secondaries.discard(birder_id)
+      for secondary_birder_id in sorted(secondaries):
+        yield next(connection_id), birder_id, secondary_birder_id
+
+  def hotspot_centers(self) -> List[Tuple[float, float]]:
+    rng = self.random_generator('hotspot')
+    return [(rng.uniform(-50, 65), rng.uniform(-180, 180))
+            for _ in range(self.hotspots)]
+
+  def sighting_batches(self) -> Iterable[Tuple[list, list, list]]:
+    """Batches of position, position name and sighting rows, where the rows of
+    each batch only refer to positions in the same or earlier batches"""
+    rng = self.random_generator('sighting')
+    bird_weights = zipf_cumulative_weights(self.birds, 1.1)
+    birder_weights = zipf_cumulative_weights(self.birders, 0.9)
+    hotspot_weights = zipf_cumulative_weights(self.hotspots, 1.0)
+    hotspots = self.hotspot_centers()
+    bird_ranks = list(range(1, self.birds + 1))
+    self.random_generator('bird_rank').shuffle(bird_ranks)
+    birder_ids = range(1, self.birders + 1)
+    position_id = itertools.count(1)
+    position_name_id = itertools.count(1)
+    sighting_id = 1
+    while sighting_id <= self.sightings:
+      count = min(COPY_BATCH_SIZE, self.sightings - sighting_id + 1)
+      birds = rng.choices(bird_ranks, cum_weights=bird_weights, k=count)
+      birders = rng.choices(birder_ids, cum_weights=birder_weights, k=count)
+      positions, position_names, sightings = [], [], []
+      for bird_id, birder_id in zip(birds, birders):
+        sighting_position_id = None
+        if rng.random() < self.positioned_ratio:
+          sighting_position_id = next(position_id)
+          hotspot = None
+          center = None
+          if rng.random() < self.hotspot_ratio:
+            hotspot = rng.choices(
+              range(self.hotspots), cum_weights=hotspot_weights)[0]
+            center = hotspots[hotspot]
+          lat, lon = self.position(rng, center)
+          positions.append(
+            (sighting_position_id, f'SRID=4326;POINT({lon:.6f} {lat:.6f})'))
+          if rng.random() < self.named_position_ratio:
+            name = self.position_name(hotspot)
+            position_names.append((
+              next(position_name_id), sighting_position_id, 1, 18, name,
+              position_name_time,
+            ))
+        sighting_date = first_sighting_date + timedelta(
+          days=rng.randrange(sighting_days))
+        sighting_time = None
+        if rng.random() < 0.8:
+          sighting_time = time(rng.randrange(24), rng.randrange(60))
+        sightings.append((
+          sighting_id, birder_id, bird_id, sighting_date, sighting_time,
+          sighting_position_id,
+        ))
+        sighting_id += 1
+      yield positions, position_names, sightings
+
+  def position(self,
+        rng: random.Random,
+        hotspot: Optional[Tuple[float, float]],
+  ) -> Tuple[float, float]:
+    if hotspot is None:
+      return rng.uniform(-60, 75), rng.uniform(-180, 180)
+    lat = min(max(rng.gauss(hotspot[0], 0.02), -89.9), 89.9)
+    lon = (rng.gauss(hotspot[1], 0.02) + 180) % 360 - 180
+    return lat, lon
+
+  def position_name(self, hotspot: Optional[int]) -> str:
+    if hotspot is None:
+      return 'Unnamed place'
+    rng = self.random_generator(f'hotspot_name:{hotspot}')
+    return (f'{capitalized_word(rng, 2)} Lake, {capitalized_word(rng, 3)}, '
+            f'{capitalized_word(rng, 2)}')
+
+
+tables = [
+  ('locale', ['id', 'code'], 'locale_rows'),
+  ('bird', ['id', 'binomial_name'], 'bird_rows'),
+  ('bird_common_name', ['id', 'bird_id', 'locale_id', 'name'],
+   'bird_common_name_rows'),
+  ('picture', ['id', 'filepath', 'credit'], 'picture_rows'),
+  ('bird_thumbnail', ['bird_id', 'picture_id'], 'bird_thumbnail_rows'),
+  ('birder', ['id', 'name'], 'birder_rows'),
+  ('account', ['id', 'username', 'email', 'birder_id', 'locale_id'],
+   'account_rows'),
+  ('hashed_password', ['account_id', 'salt', 'salted_hash'],
+   'hashed_password_rows'),
+  ('role', ['id', 'name'], 'role_rows'),
+  ('resource_permission', ['id', 'name', 'resource_regex', 'method'],
+   'resource_permission_rows'),
+  ('role_resource_permission', ['role_id', 'resource_permission_id'],
+   'role_resource_permission_rows'),
+  ('account_role', ['account_id', 'role_id'], 'account_role_rows'),
+  ('birder_connection', ['id', 'primary_birder_id', 'secondary_birder_id'],
+   'birder_connection_rows'),
+]
+position_columns = ['id', 'point']
+position_name_columns = [
+  'id', 'position_id', 'locale_id', 'detail_level', 'name', 'creation_time']
+sighting_columns = [
+  'id', 'birder_id', 'bird_id', 'sighting_date', 'sighting_time',
+  'position_id']
+serial_tables = [
+  'locale', 'bird', 'bird_common_name', 'picture', 'birder', 'account',
+  'role', 'resource_permission', 'birder_connection', 'position',
+  'position_name', 'sighting',
+]
+cleared_tables = [
+  'sighting', 'position_name', 'position', 'birder_connection',
+  'account_role', 'role_resource_permission', 'resource_permission', 'role',
+  'refresh_token', 'password_reset_token', 'hashed_password', 'account',
+  'birder', 'bird_thumbnail', 'picture', 'bird_common_name', 'bird_look',
+  'bird', 'locale',
+]
+
+
+def write_dataset(connection, generator: DatasetGenerator,
+      reset: bool = False) -> dict:
+  counts = {}
+  with connection.cursor() as cursor:
+    if reset:
+      cursor.execute(
+        f'TRUNCATE {", ".join(cleared_tables)} RESTART IDENTITY CASCADE;')
+    for table, columns, rows_method in tables:
+      counts[table] = copy_rows(
+        cursor, table, columns, getattr(generator, rows_method)())
+    counts.update(position=0, position_name=0, sighting=0)
+    for positions, position_names, sightings in generator.sighting_batches():
+      counts['position'] += copy_rows(
+        cursor, 'position', position_columns, positions)
+      counts['position_name'] += copy_rows(
+        cursor, 'position_name', position_name_columns, position_names)
+      counts['sighting'] += copy_rows(
+        cursor, 'sighting', sighting_columns, sightings)
+    for table in serial_tables:
+      cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+        f"COALESCE(MAX(id), 0) + 1, false) FROM {table};")
+  connection.commit()
+  return counts
+
+
+def parse_arguments():
+  parser = argparse.ArgumentParser(
+    description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--scale', choices=scales.keys(), default='small')
+  parser.add_argument('--seed', type=int, default=1)
+  parser.add_argument('--birds', type=int)
+  parser.add_argument('--birders', type=int)
+  parser.add_argument('--sightings', type=int)
+  parser.add_argument('--hotspots', type=int)
+  parser.add_argument('--reset', action='store_true',
+    help='delete all existing data first')
+  return parser.parse_args()
+
+
+def main():
+  arguments = parse_arguments()
+  size = dict(scales[arguments.scale])
+  for key in size:
+    if getattr(arguments, key) is not None:
+      size[key] = getattr(arguments, key)
+  generator = DatasetGenerator(arguments.seed, **size)
+  connection = psycopg2.connect(**create_database_connection_details())
+  try:
+    counts = write_dataset(connection, generator, arguments.reset)
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+      cursor.execute('ANALYZE;')
+  finally:
+    connection.close()
+  for table, count in counts.items():
+    print(f'{table}: {count} rows')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,232 @@
+"""End-to-end latency benchmark of the API service
+
+Serves the app, created with create_app_with_dependencies, from a threaded
+local server and drives it with a weighted mix of routes at a configured
+concurrency. Reverse geocoding uses the mocked geocoding of testing mode and
+mail is not sent. The database given by the DATABASE_* environment variables
+is expected to hold a dataset written by aveslog.benchmark.dataset, whose
+accounts are used to authenticate.
+
+The requests and their order are derived from the seed alone, so that runs
+against different commits are comparable. The report is written as JSON.
+
+  python -m aveslog.benchmark.http_latency --requests 5000 --concurrency 16
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+from sqlalchemy import create_engine
+from werkzeug.serving import BaseWSGIServer
+from werkzeug.serving import make_server
+
+from aveslog import create_app_with_dependencies
+from aveslog.benchmark.dataset import DATASET_PASSWORD
+from aveslog.benchmark.measurement import summarize_durations
+from aveslog.mail import MailDispatcher
+from aveslog.v0 import create_database_connection_details
+
+route_weights = {
+  'search': 30,
+  'bird': 20,
+  'sightings': 25,
+  'post_sighting': 10,
+  'access_token': 15,
+}
+
+
+class Client:
+  """A benchmark user, authenticated as one of the dataset's accounts"""
+
+  def __init__(self, base_url: str, username: str):
+    self.base_url = base_url
+    self.session = requests.Session()
+    self.lock = threading.Lock()
+    response = self.session.post(f'{base_url}/authentication/refresh-token',
+      params={'username': username, 'password': DATASET_PASSWORD})
+    response.raise_for_status()
+    self.refresh_token = response.json()['refreshToken']
+    self.access_token = self.refresh_access_token().json()['jwt']
+    account = self.get('/account').json()
+    self.birder_id = account['birder']['id']
+
+  def get(self, path: str, **kwargs) -> requests.Response:
+    return self.session.get(f'{self.base_url}{path}',
+      headers={'accessToken': self.access_token}, **kwargs)
+
+  def refresh_access_token(self) -> requests.Response:
+    return self.session.get(f'{self.base_url}/authentication/access-token',
+      headers={'refreshToken': self.refresh_token})
+
+  def post_sighting(self, binomial_name: str, lat: float,
+        lon: float) -> requests.Response:
+    return self.session.post(f'{self.base_url}/sightings',
+      headers={'accessToken': self.access_token},
+      json={
+        'birder': {'id': self.birder_id},
+        'bird': {'binomialName': binomial_name},
+        'date': '2020-05-01',
+        'time': '08:00',
+        'position': {'lat': lat, 'lon': lon},
+      })
+
+
+def plan_requests(rng: random.Random, count: int, clients: int,
+      binomial_names: List[str]) -> List[tuple]:
+  """The route, client index and bird name of every request to make
+
+  Consecutive requests go to different clients, so that requests running
+  concurrently rarely have to wait for the same client.
+  """
+  routes = list(route_weights)
+  weights = [route_weights[route] for route in routes]
+  return [
+    (route, index % clients, rng.choice(binomial_names))
+    for index, route in enumerate(rng.choices(routes, weights, k=count))
+  ]
+
+
+def send_request(client: Client, route: str,
+      binomial_name: str) -> requests.Response:
+  if route == 'search':
+    return client.get('/search/birds', params={
+      'q': binomial_name.split()[0], 'embed': 'thumbnail,stats'})
+  if route == 'bird':
+    return client.get(f'/birds/{binomial_name.lower().replace(" ", "-")}')
+  if route == 'sightings':
+    return client.get('/sightings', params={'limit': 30})
+  if route == 'post_sighting':
+    return client.post_sighting(binomial_name, 59.33, 18.07)
+  if route == 'access_token':
+    return client.refresh_access_token()
+  raise ValueError(route)
+
+
+def load_binomial_names(count: int) -> List[str]:
+  """The binomial names of the most sighted birds of the dataset"""
+  details = create_database_connection_details()
+  engine = create_engine(
+    'postgresql+psycopg2://{user}:{password}@{host}/{dbname}'.format(
+      **details))
+  try:
+    return [row[0] for row in engine.execute(
+      'SELECT bird.binomial_name FROM bird '
+      'JOIN sighting ON sighting.bird_id = bird.id '
+      'GROUP BY bird.id ORDER BY count(*) DESC, bird.id LIMIT %s', count)]
+  finally:
+    engine.dispose()
+
+
+def run(base_url: str, arguments) -> dict:
+  rng = random.Random(arguments.seed)
+  binomial_names = load_binomial_names(arguments.birds)
+  clients = [Client(base_url, f'birder{birder_id:06d}')
+             for birder_id in range(1, arguments.concurrency + 1)]
+  warmup = plan_requests(rng, arguments.warmup, len(clients), binomial_names)
+  planned = plan_requests(rng, arguments.requests, len(clients),
+    binomial_names)
+  durations: Dict[str, List[float]] = defaultdict(list)
+  errors: Dict[str, int] = defaultdict(int)
+
+  def execute(planned_request: tuple, record: bool) -> None:
+    route, client_index, binomial_name = planned_request
+    client = clients[client_index]
+    with client.lock:
+      start_time = time.perf_counter()
+      try:
+        response = send_request(client, route, binomial_name)
+        failed = response.status_code >= 400
+      except requests.RequestException:
+        failed = True
+      duration = time.perf_counter() - start_time
+    if record:
+      durations[route].append(duration)
+      if failed:
+        errors[route] += 1
+
+  with ThreadPoolExecutor(arguments.concurrency) as executor:
+    list(executor.map(lambda planned_request: execute(planned_request, False),
+      warmup))
+    start_time = time.perf_counter()
+    list(executor.map(lambda planned_request: execute(planned_request, True),
+      planned))
+    elapsed_time = time.perf_counter() - start_time
+  return {
+    'commit': git_commit(),
+    'configuration': vars(arguments),
+    'elapsedTime': elapsed_time,
+    'throughput': len(planned) / elapsed_time,
+    'errors': sum(errors.values()),
+    'routes': {
+      route: dict(summarize_durations(route_durations),
+        errors=errors[route],
+        throughput=len(route_durations) / elapsed_time)
+      for route, route_durations in sorted(durations.items())
+    },
+  }
+
+
+def git_commit() -> Optional[str]:
+  try:
+    return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+      cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL,
+      universal_newlines=True).strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+
+def create_benchmark_app():
+  test_config = {
+    'TESTING': True,
+    'SECRET_KEY': 'benchmark',
+    'LOGS_DIR_PATH': 'benchmark-logs',
+    'FRONTEND_HOST': 'http://localhost:3002',
+    'RATE_LIMIT': '1000000/second',
+  }
+  os.environ.setdefault('EXTERNAL_HOST', 'http://localhost:3002')
+  return create_app_with_dependencies(lambda app: MailDispatcher(),
+    test_config=test_config)
+
+
+def serve(app) -> BaseWSGIServer:
+  server = make_server('127.0.0.1', 0, app, threaded=True)
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  return server
+
+
+def parse_arguments():
+  parser = argparse.ArgumentParser(
+    description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--requests', type=int, default=5000)
+  parser.add_argument('--warmup', type=int, default=500)
+  parser.add_argument('--concurrency', type=int, default=16)
+  parser.add_argument('--birds', type=int, default=200,
+    help='number of most sighted birds to search, view and sight')
+  parser.add_argument('--seed', type=int, default=1)
+  parser.add_argument('--output', help='file to write the report to')
+  return parser.parse_args()
+
+
+def main():
+  arguments = parse_arguments()
+  server = serve(create_benchmark_app())
+  try:
+    report = run(f'http://127.0.0.1:{server.server_port}', arguments)
+  finally:
+    server.shutdown()
+  output = open(arguments.output, 'w') if arguments.output else sys.stdout
+  json.dump(report, output, indent=2)
+  output.write('\n')
+
+
+if __name__ == '__main__':
+  main()
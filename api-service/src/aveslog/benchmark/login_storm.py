@@ -0,0 +1,150 @@
+"""Latency of read traffic during a storm of logins
+
+Sends reads of bird details and searches, first alone and then while other
+threads log in as fast as they can, and reports the read latency of both
+phases together with the outcome of the logins. Runs against the same
+locally served app and dataset as aveslog.benchmark.http_latency.
+
+  python -m aveslog.benchmark.login_storm --reads 2000 --login-threads 16
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import requests
+
+from aveslog.benchmark.dataset import DATASET_PASSWORD
+from aveslog.benchmark.http_latency import create_benchmark_app
+from aveslog.benchmark.http_latency import git_commit
+from aveslog.benchmark.http_latency import load_binomial_names
+from aveslog.benchmark.http_latency import serve
+from aveslog.benchmark.measurement import summarize_durations
+
+
+def read_paths(rng: random.Random, count: int,
+      binomial_names: List[str]) -> List[str]:
+  paths = []
+  for _ in range(count):
+    binomial_name = rng.choice(binomial_names)
+    if rng.random() < 0.5:
+      paths.append(f'/birds/{binomial_name.lower().replace(" ", "-")}')
+    else:
+      paths.append(f'/search/birds?q={binomial_name.split()[0]}')
+  return paths
+
+
+def measure_reads(base_url: str, paths: List[str], concurrency: int) -> dict:
+  local = threading.local()
+  durations = []
+  errors = Counter()
+
+  def read(path: str) -> None:
+    if not hasattr(local, 'session'):
+      local.session = requests.Session()
+    start_time = time.perf_counter()
+    try:
+      response = local.session.get(f'{base_url}{path}')
+      if response.status_code >= 400:
+        errors[response.status_code] += 1
+    except requests.RequestException:
+      errors['connection'] += 1
+    durations.append(time.perf_counter() - start_time)
+
+  start_time = time.perf_counter()
+  with ThreadPoolExecutor(concurrency) as executor:
+    list(executor.map(read, paths))
+  elapsed_time = time.perf_counter() - start_time
+  return dict(summarize_durations(durations),
+    throughput=len(paths) / elapsed_time,
+    errors=dict(errors))
+
+
+def storm_logins(base_url: str, threads: int, accounts: int,
+      stop: threading.Event, outcomes: Counter) -> List[threading.Thread]:
+  def login(thread_index: int) -> None:
+    session = requests.Session()
+    birder_id = thread_index % accounts + 1
+    while not stop.is_set():
+      try:
+        response = session.post(f'{base_url}/authentication/refresh-token',
+          params={
+            'username': f'birder{birder_id:06d}',
+            'password': DATASET_PASSWORD,
+          })
+        outcomes[response.status_code] += 1
+      except requests.RequestException:
+        outcomes['connection'] += 1
+
+  login_threads = [threading.Thread(target=login, args=(index,), daemon=True)
+                   for index in range(threads)]
+  for thread in login_threads:
+    thread.start()
+  return login_threads
+
+
+def run(base_url: str, arguments) -> dict:
+  rng = random.Random(arguments.seed)
+  binomial_names = load_binomial_names(arguments.birds)
+  measure_reads(base_url, read_paths(rng, arguments.warmup, binomial_names),
+    arguments.concurrency)
+  paths = read_paths(rng, arguments.reads, binomial_names)
+  baseline = measure_reads(base_url, paths, arguments.concurrency)
+  stop = threading.Event()
+  outcomes = Counter()
+  login_threads = storm_logins(base_url, arguments.login_threads,
+    arguments.accounts, stop, outcomes)
+  start_time = time.perf_counter()
+  try:
+    storm = measure_reads(base_url, paths, arguments.concurrency)
+  finally:
+    stop.set()
+    for thread in login_threads:
+      thread.join()
+  elapsed_time = time.perf_counter() - start_time
+  return {
+    'commit': git_commit(),
+    'configuration': vars(arguments),
+    'readsAlone': baseline,
+    'readsDuringLogins': storm,
+    'logins': {
+      'outcomes': {str(outcome): count for outcome, count in outcomes.items()},
+      'throughput': sum(outcomes.values()) / elapsed_time,
+    },
+  }
+
+
+def parse_arguments():
+  parser = argparse.ArgumentParser(
+    description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--reads', type=int, default=2000)
+  parser.add_argument('--warmup', type=int, default=200)
+  parser.add_argument('--concurrency', type=int, default=8)
+  parser.add_argument('--login-threads', type=int, default=16)
+  parser.add_argument('--accounts', type=int, default=100,
+    help='number of dataset accounts to log in as')
+  parser.add_argument('--birds', type=int, default=200)
+  parser.add_argument('--seed', type=int, default=1)
+  parser.add_argument('--output', help='file to write the report to')
+  return parser.parse_args()
+
+
+def main():
+  arguments = parse_arguments()
+  server = serve(create_benchmark_app())
+  try:
+    report = run(f'http://127.0.0.1:{server.server_port}', arguments)
+  finally:
+    server.shutdown()
+  output = open(arguments.output, 'w') if arguments.output else sys.stdout
+  json.dump(report, output, indent=2)
+  output.write('\n')
+
+
+if __name__ == '__main__':
+  main()
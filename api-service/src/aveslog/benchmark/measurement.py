@@ -0,0 +1,23 @@
+import math
+from typing import List, Sequence
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+  if not sorted_values:
+    return 0.0
+  index = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+  return sorted_values[index]
+
+
+def summarize_durations(durations: List[float]) -> dict:
+  """Summarizes durations in seconds as milliseconds"""
+  durations = sorted(durations)
+  count = len(durations)
+  return {
+    'count': count,
+    'mean': sum(durations) / count * 1000 if count else 0.0,
+    'p50': percentile(durations, 0.50) * 1000,
+    'p95': percentile(durations, 0.95) * 1000,
+    'p99': percentile(durations, 0.99) * 1000,
+    'max': durations[-1] * 1000 if count else 0.0,
+  }
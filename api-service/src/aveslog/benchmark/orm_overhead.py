@@ -0,0 +1,103 @@
+"""Micro-benchmark of the ORM work done by the hot lookups of a request
+
+Compares building a sessionmaker per request and compiling the account, bird
+and locale lookups from scratch, with reusing the configured sessionmaker and
+the baked lookups. Connects to the database given by the DATABASE_*
+environment variables.
+
+  python -m aveslog.benchmark.orm_overhead --iterations 2000
+"""
+import argparse
+import json
+import time
+from typing import Callable
+
+from flask import Flask, g
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from aveslog.benchmark.measurement import summarize_durations
+from aveslog.v0 import create_database_connection_details
+from aveslog.v0.bird import BirdRepository
+from aveslog.v0.database import EngineFactory
+from aveslog.v0.database import SessionFactory
+from aveslog.v0.localization import LocaleRepository
+from aveslog.v0.models import Account
+from aveslog.v0.models import Bird
+from aveslog.v0.models import Locale
+from aveslog.v0.rest_api import find_account
+
+
+def uncached_lookups(engine: Engine, arguments) -> Callable[[], None]:
+  def lookups():
+    session = sessionmaker(bind=engine)()
+    session.query(Account).get(arguments.account_id)
+    session.query(Bird) \
+      .filter_by(binomial_name=arguments.binomial_name) \
+      .first()
+    session.query(Locale).filter_by(code=arguments.locale).first()
+    session.close()
+
+  return lookups
+
+
+def cached_lookups(engine: Engine, arguments) -> Callable[[], None]:
+  session_factory = SessionFactory(engine)
+  bird_repository = BirdRepository()
+  locale_repository = LocaleRepository('', None)
+
+  def lookups():
+    g.database_session = session_factory.create_session()
+    find_account(arguments.account_id)
+    bird_repository.find_bird_by_binomial_name(arguments.binomial_name)
+    locale_repository.find_locale_by_code(arguments.locale)
+    g.database_session.close()
+
+  return lookups
+
+
+def measure(lookups: Callable[[], None], iterations: int, warmup: int) -> dict:
+  for _ in range(warmup):
+    lookups()
+  durations = []
+  for _ in range(iterations):
+    start_time = time.perf_counter()
+    lookups()
+    durations.append(time.perf_counter() - start_time)
+  return summarize_durations(durations)
+
+
+def parse_arguments():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--iterations', type=int, default=2000)
+  parser.add_argument('--warmup', type=int, default=200)
+  parser.add_argument('--account-id', type=int, default=1)
+  parser.add_argument('--binomial-name', default='Pica pica')
+  parser.add_argument('--locale', default='en')
+  return parser.parse_args()
+
+
+def main():
+  arguments = parse_arguments()
+  engine = EngineFactory().create_engine(**create_database_connection_details())
+  with Flask(__name__).app_context():
+    before = measure(
+      uncached_lookups(engine, arguments),
+      arguments.iterations,
+      arguments.warmup,
+    )
+    after = measure(
+      cached_lookups(engine, arguments),
+      arguments.iterations,
+      arguments.warmup,
+    )
+  print(json.dumps({
+    'unit': 'ms',
+    'before': before,
+    'after': after,
+    'mean_saved': before['mean'] - after['mean'],
+  }, indent=2))
+
+
+if __name__ == '__main__':
+  main()
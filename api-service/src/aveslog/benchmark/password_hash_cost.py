@@ -0,0 +1,62 @@
+"""Calibration of the password hash cost
+
+Measures how long a password hash takes on this machine, and suggests the
+iterations to set as PASSWORD_HASH_ITERATIONS for a hash to take the target
+duration. Run it on the hardware the api service runs on.
+
+  python -m aveslog.benchmark.password_hash_cost --target-ms 250
+"""
+import argparse
+import json
+import time
+from typing import Callable
+
+from aveslog.v0.account import pbkdf2_sha256
+
+ITERATIONS_STEP = 10000
+
+
+def measure_hash_duration(iterations: int, repetitions: int = 5) -> float:
+  """Shortest duration in seconds of hashing a password"""
+  durations = []
+  for _ in range(repetitions):
+    start_time = time.perf_counter()
+    pbkdf2_sha256('calibration-password', 'calibration-salt', iterations)
+    durations.append(time.perf_counter() - start_time)
+  return min(durations)
+
+
+def calibrate_iterations(measure: Callable[[int], float],
+      target_seconds: float,
+      minimum: int = 100000,
+      sample_iterations: int = 100000) -> int:
+  """Iterations for a hash to take the target duration, given that the
+  duration grows linearly with the iterations, rounded to whole steps and
+  never below the minimum"""
+  seconds_per_iteration = measure(sample_iterations) / sample_iterations
+  iterations = target_seconds / seconds_per_iteration
+  steps = max(round(iterations / ITERATIONS_STEP), 1)
+  return max(steps * ITERATIONS_STEP, minimum)
+
+
+def parse_arguments():
+  parser = argparse.ArgumentParser(
+    description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--target-ms', type=float, default=250)
+  parser.add_argument('--minimum', type=int, default=100000,
+    help='fewest iterations to ever suggest')
+  return parser.parse_args()
+
+
+def main():
+  arguments = parse_arguments()
+  iterations = calibrate_iterations(measure_hash_duration,
+    arguments.target_ms / 1000, arguments.minimum)
+  print(json.dumps({
+    'iterations': iterations,
+    'durationMs': measure_hash_duration(iterations) * 1000,
+  }, indent=2))
+
+
+if __name__ == '__main__':
+  main()
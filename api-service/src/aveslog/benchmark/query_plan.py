@@ -0,0 +1,50 @@
+import json
+import os
+from typing import Any, Iterable, List, Optional
+
+baseline_path = os.path.join(
+  os.path.dirname(__file__), 'query_plan_baseline.json')
+
+
+def explain(cursor, statement: str, parameters: Any) -> dict:
+  """Executes the statement with EXPLAIN (ANALYZE, BUFFERS) and returns the
+  plan, so the caller is expected to roll back whatever it changes"""
+  cursor.execute(
+    f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}', parameters)
+  result = cursor.fetchone()[0]
+  if isinstance(result, str):
+    result = json.loads(result)
+  return result[0]
+
+
+def plan_nodes(plan: dict) -> Iterable[dict]:
+  nodes = [plan['Plan']]
+  while nodes:
+    node = nodes.pop()
+    yield node
+    nodes.extend(node.get('Plans', []))
+
+
+def sequential_scans(plan: dict) -> List[str]:
+  return [node['Relation Name'] for node in plan_nodes(plan)
+          if node['Node Type'] == 'Seq Scan']
+
+
+def buffer_count(plan: dict) -> int:
+  """Shared buffers hit or read by the whole plan, which the root node of the
+  plan accumulates from its children"""
+  root = plan['Plan']
+  return root.get('Shared Hit Blocks', 0) + root.get('Shared Read Blocks', 0)
+
+
+def load_baseline() -> Optional[dict]:
+  if not os.path.exists(baseline_path):
+    return None
+  with open(baseline_path) as baseline_file:
+    return json.load(baseline_file)
+
+
+def save_baseline(baseline: dict) -> None:
+  with open(baseline_path, 'w') as baseline_file:
+    json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+    baseline_file.write('\n')
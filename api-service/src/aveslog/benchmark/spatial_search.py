@@ -0,0 +1,115 @@
+"""Benchmark of the sighting searches by position
+
+Compares the former search, which measured the distance to every position
+with ST_DistanceSphere, with the index assisted ST_DWithin search of
+BirdSearcher. Searches around positions picked from the sightings of the
+database given by the DATABASE_* environment variables, which should hold
+a large dataset written by aveslog.benchmark.dataset.
+
+  python -m aveslog.benchmark.spatial_search --searches 200 --radius 5
+"""
+import argparse
+import json
+import random
+import time
+from typing import Callable, Dict, List, Sized, Tuple
+
+from geoalchemy2 import Geometry
+from sqlalchemy import cast
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from aveslog.benchmark.http_latency import git_commit
+from aveslog.benchmark.measurement import summarize_durations
+from aveslog.v0 import create_database_connection_details
+from aveslog.v0.database import EngineFactory
+from aveslog.v0.database import SessionFactory
+from aveslog.v0.models import Bird
+from aveslog.v0.models import Position
+from aveslog.v0.models import Sighting
+from aveslog.v0.search import BirdSearchMatch
+from aveslog.v0.search import BirdSearcher
+from aveslog.v0.search_query import SearchQuery
+
+
+def distance_sphere_search(session: Session, lat: float, lon: float,
+      radius: float) -> Dict[Bird, int]:
+  result = session.query(Bird, func.count(Sighting.bird)) \
+    .join(Sighting.bird) \
+    .join(Sighting.position) \
+    .filter(func.ST_DistanceSphere(
+      func.ST_GeomFromText(func.ST_AsText(Position.point), 4326),
+      func.ST_GeomFromText(f'POINT({lon} {lat})', 4326)) < 1000 * radius) \
+    .group_by(Bird) \
+    .all()
+  return dict(result)
+
+
+def dwithin_search(session: Session, lat: float, lon: float,
+      radius: float) -> List[BirdSearchMatch]:
+  return BirdSearcher(session).search(
+    SearchQuery(position=(lat, lon, radius)))
+
+
+def sample_positions(session: Session, count: int,
+      seed: int) -> List[Tuple[float, float]]:
+  position_count = session.query(func.max(Position.id)).scalar() or 0
+  rng = random.Random(seed)
+  positions = []
+  while position_count and len(positions) < count:
+    point = session.query(func.ST_Y(cast(Position.point, Geometry)),
+      func.ST_X(cast(Position.point, Geometry))) \
+      .filter(Position.id == rng.randint(1, position_count)) \
+      .first()
+    if point:
+      positions.append(point)
+  return positions
+
+
+def measure(search: Callable[[Session, float, float, float], Sized],
+      session_factory: SessionFactory,
+      positions: List[Tuple[float, float]],
+      radius: float) -> dict:
+  durations = []
+  birds = 0
+  for lat, lon in positions:
+    session = session_factory.create_session()
+    start_time = time.perf_counter()
+    birds += len(search(session, lat, lon, radius))
+    durations.append(time.perf_counter() - start_time)
+    session.close()
+  return dict(summarize_durations(durations), birds=birds)
+
+
+def parse_arguments():
+  parser = argparse.ArgumentParser(
+    description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--searches', type=int, default=200)
+  parser.add_argument('--radius', type=float, default=5,
+    help='search radius in kilometers')
+  parser.add_argument('--seed', type=int, default=1)
+  return parser.parse_args()
+
+
+def main():
+  arguments = parse_arguments()
+  engine = EngineFactory().create_engine(**create_database_connection_details())
+  session_factory = SessionFactory(engine)
+  session = session_factory.create_session()
+  positions = sample_positions(session, arguments.searches, arguments.seed)
+  session.close()
+  before = measure(distance_sphere_search, session_factory, positions,
+    arguments.radius)
+  after = measure(dwithin_search, session_factory, positions, arguments.radius)
+  engine.dispose()
+  print(json.dumps({
+    'commit': git_commit(),
+    'configuration': vars(arguments),
+    'unit': 'ms',
+    'before': before,
+    'after': after,
+  }, indent=2))
+
+
+if __name__ == '__main__':
+  main()
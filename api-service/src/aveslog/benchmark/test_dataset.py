@@ -0,0 +1,90 @@
+from collections import Counter
+from datetime import time
+from unittest import TestCase
+
+from aveslog.benchmark.dataset import DatasetGenerator
+from aveslog.benchmark.dataset import copy_value
+from aveslog.benchmark.dataset import zipf_cumulative_weights
+
+
+def create_generator(seed: int = 1) -> DatasetGenerator:
+  return DatasetGenerator(
+    seed, birds=200, birders=100, sightings=5000, hotspots=10)
+
+
+class TestCopyValue(TestCase):
+
+  def test_none_is_null(self):
+    self.assertEqual(copy_value(None), '\\N')
+
+  def test_escapes_special_characters(self):
+    self.assertEqual(copy_value('a\tb\nc\\d'), 'a\\tb\\nc\\\\d')
+
+  def test_time(self):
+    self.assertEqual(copy_value(time(8, 5)), '08:05:00')
+
+
+class TestZipfCumulativeWeights(TestCase):
+
+  def test_weights(self):
+    self.assertEqual(zipf_cumulative_weights(3, 1.0), [1.0, 1.5, 1.5 + 1 / 3])
+
+
+class TestDatasetGenerator(TestCase):
+
+  def test_same_seed_gives_same_dataset(self):
+    first = create_generator(1)
+    second = create_generator(1)
+
+    self.assertEqual(list(first.bird_common_name_rows()),
+                     list(second.bird_common_name_rows()))
+    self.assertEqual(list(first.sighting_batches()),
+                     list(second.sighting_batches()))
+
+  def test_other_seed_gives_other_dataset(self):
+    self.assertNotEqual(create_generator(1).binomial_names(),
+                        create_generator(2).binomial_names())
+
+  def test_binomial_names_unique(self):
+    names = create_generator().binomial_names()
+    self.assertEqual(len(names), 200)
+    self.assertEqual(len(set(names)), 200)
+
+  def test_every_bird_has_english_common_name(self):
+    rows = create_generator().bird_common_name_rows()
+    english_bird_ids = {bird_id for _, bird_id, locale_id, _ in rows
+                        if locale_id == 1}
+    self.assertEqual(english_bird_ids, set(range(1, 201)))
+
+  def test_birder_connections_unique_and_not_to_self(self):
+    rows = list(create_generator().birder_connection_rows())
+    pairs = [(primary, secondary) for _, primary, secondary in rows]
+    self.assertEqual(len(pairs), len(set(pairs)))
+    self.assertFalse([pair for pair in pairs if pair[0] == pair[1]])
+
+  def test_sightings_skewed_towards_popular_birds(self):
+    sightings = self.sightings(create_generator())
+    counts = Counter(bird_id for _, _, bird_id, _, _, _ in sightings)
+    most_common_count = counts.most_common(1)[0][1]
+    self.assertGreater(most_common_count, 10 * 5000 / 200)
+
+  def test_sighting_positions_exist(self):
+    generator = create_generator()
+    position_ids = set()
+    for positions, position_names, sightings in generator.sighting_batches():
+      position_ids.update(position_id for position_id, _ in positions)
+      for _, position_id, _, _, _, _ in position_names:
+        self.assertIn(position_id, position_ids)
+      for sighting in sightings:
+        self.assertTrue(sighting[5] is None or sighting[5] in position_ids)
+
+  def test_positions_valid(self):
+    for positions, _, _ in create_generator().sighting_batches():
+      for _, point in positions:
+        lon, lat = map(float, point[len('SRID=4326;POINT('):-1].split())
+        self.assertTrue(-180 <= lon <= 180)
+        self.assertTrue(-90 <= lat <= 90)
+
+  def sightings(self, generator: DatasetGenerator) -> list:
+    return [sighting for _, _, sightings in generator.sighting_batches()
+            for sighting in sightings]
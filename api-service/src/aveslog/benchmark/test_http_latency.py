@@ -0,0 +1,41 @@
+import random
+from unittest import TestCase
+from unittest.mock import Mock
+
+from aveslog.benchmark.http_latency import Client
+from aveslog.benchmark.http_latency import plan_requests
+from aveslog.benchmark.http_latency import route_weights
+from aveslog.benchmark.http_latency import send_request
+
+
+class TestPlanRequests(TestCase):
+
+  def test_same_seed_gives_same_requests(self):
+    first = plan_requests(random.Random(1), 100, 4, ['Pica pica', 'Bubo bubo'])
+    second = plan_requests(random.Random(1), 100, 4, ['Pica pica', 'Bubo bubo'])
+
+    self.assertEqual(first, second)
+
+  def test_consecutive_requests_go_to_different_clients(self):
+    planned = plan_requests(random.Random(1), 6, 3, ['Pica pica'])
+
+    self.assertEqual([client for _, client, _ in planned], [0, 1, 2, 0, 1, 2])
+
+  def test_only_weighted_routes(self):
+    planned = plan_requests(random.Random(1), 100, 1, ['Pica pica'])
+
+    self.assertTrue({route for route, _, _ in planned} <= set(route_weights))
+
+
+class TestSendRequest(TestCase):
+
+  def test_bird_route(self):
+    client = Mock(spec=Client)
+
+    send_request(client, 'bird', 'Pica pica')
+
+    client.get.assert_called_with('/birds/pica-pica')
+
+  def test_unknown_route(self):
+    with self.assertRaises(ValueError):
+      send_request(Mock(spec=Client), 'unknown', 'Pica pica')
@@ -0,0 +1,34 @@
+from unittest import TestCase
+
+from aveslog.benchmark.measurement import percentile
+from aveslog.benchmark.measurement import summarize_durations
+
+
+class TestPercentile(TestCase):
+
+  def test_percentile(self):
+    values = list(range(1, 101))
+
+    self.assertEqual(percentile(values, 0.5), 50)
+    self.assertEqual(percentile(values, 0.99), 99)
+    self.assertEqual(percentile(values, 1.0), 100)
+
+  def test_percentile_when_empty(self):
+    self.assertEqual(percentile([], 0.5), 0.0)
+
+
+class TestSummarizeDurations(TestCase):
+
+  def test_summarize_durations(self):
+    summary = summarize_durations([0.003, 0.001, 0.002])
+
+    self.assertEqual(summary['count'], 3)
+    self.assertAlmostEqual(summary['mean'], 2.0)
+    self.assertAlmostEqual(summary['p50'], 2.0)
+    self.assertAlmostEqual(summary['max'], 3.0)
+
+  def test_summarize_durations_when_empty(self):
+    summary = summarize_durations([])
+
+    self.assertEqual(summary['count'], 0)
+    self.assertEqual(summary['mean'], 0.0)
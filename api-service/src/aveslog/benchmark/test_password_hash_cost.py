@@ -0,0 +1,23 @@
+from unittest import TestCase
+
+from aveslog.benchmark.password_hash_cost import calibrate_iterations
+
+
+class TestCalibrateIterations(TestCase):
+
+  def test_scales_iterations_to_target(self):
+    iterations = calibrate_iterations(lambda iterations: iterations / 1e6, 0.25)
+
+    self.assertEqual(iterations, 250000)
+
+  def test_rounds_to_whole_steps(self):
+    iterations = calibrate_iterations(
+      lambda iterations: iterations / 1e6, 0.2549)
+
+    self.assertEqual(iterations, 250000)
+
+  def test_never_below_minimum(self):
+    iterations = calibrate_iterations(
+      lambda iterations: iterations / 1e3, 0.25, minimum=100000)
+
+    self.assertEqual(iterations, 100000)
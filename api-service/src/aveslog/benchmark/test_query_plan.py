@@ -0,0 +1,259 @@
+"""Query plan regression tests of the repository queries
+
+Runs each query with EXPLAIN (ANALYZE, BUFFERS) against a large dataset, as
+written by aveslog.benchmark.dataset into the database given by the DATABASE_*
+environment variables, and fails when a plan sequentially scans a large table
+it is not known to scan, or when it reads more buffers than recorded in the
+baseline. A query without a baseline recorded against the same dataset fails
+as well, rather than passing unchecked. Only run when QUERY_PLAN_TESTS is
+set, and with QUERY_PLAN_RECORD_BASELINE also set the baseline is recorded
+anew. The plan helpers are tested without a database.
+
+  QUERY_PLAN_TESTS=1 python -m unittest aveslog.benchmark.test_query_plan
+"""
+import os
+import unittest
+from typing import Callable
+from unittest import TestCase
+from unittest.mock import Mock
+
+from flask import Flask, g
+
+from aveslog.benchmark.query_plan import buffer_count
+from aveslog.benchmark.query_plan import explain
+from aveslog.benchmark.query_plan import load_baseline
+from aveslog.benchmark.query_plan import save_baseline
+from aveslog.benchmark.query_plan import sequential_scans
+from aveslog.v0 import create_database_connection_details
+from aveslog.v0.birds_rest_api import get_bird_statistics
+from aveslog.v0.database import EngineFactory
+from aveslog.v0.database import SessionFactory
+from aveslog.v0.instrumentation import capture_statements
+from aveslog.v0.models import Account
+from aveslog.v0.permission import PermissionMatrix
+from aveslog.v0.principal import create_principal
+from aveslog.v0.rest_api import require_permission
+from aveslog.v0.search import BirdSearcher
+from aveslog.v0.search_index import BirdNameIndex
+from aveslog.v0.search_query import parse_search_query
+from aveslog.v0.sighting import SightingRepository
+
+example_plan = {
+  'Plan': {
+    'Node Type': 'Hash Join',
+    'Shared Hit Blocks': 120,
+    'Shared Read Blocks': 30,
+    'Plans': [
+      {
+        'Node Type': 'Seq Scan',
+        'Relation Name': 'sighting',
+      },
+      {
+        'Node Type': 'Hash',
+        'Plans': [{
+          'Node Type': 'Index Scan',
+          'Relation Name': 'bird',
+        }],
+      },
+    ],
+  },
+  'Execution Time': 1.5,
+}
+
+
+class TestExplain(TestCase):
+
+  def test_explain(self):
+    cursor = Mock()
+    cursor.fetchone.return_value = ([example_plan],)
+
+    result = explain(cursor, 'SELECT * FROM bird WHERE id = %(id)s', {'id': 1})
+
+    cursor.execute.assert_called_with(
+      'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) '
+      'SELECT * FROM bird WHERE id = %(id)s', {'id': 1})
+    self.assertEqual(result, example_plan)
+
+
+class TestSequentialScans(TestCase):
+
+  def test_sequential_scans(self):
+    self.assertEqual(sequential_scans(example_plan), ['sighting'])
+
+
+class TestBufferCount(TestCase):
+
+  def test_buffer_count(self):
+    self.assertEqual(buffer_count(example_plan), 150)
+
+
+large_table_rows = int(os.environ.get('QUERY_PLAN_LARGE_TABLE_ROWS', '10000'))
+buffer_tolerance = float(os.environ.get('QUERY_PLAN_BUFFER_TOLERANCE', '0.25'))
+record_baseline = 'QUERY_PLAN_RECORD_BASELINE' in os.environ
+
+# Sequential scans of large tables that the queries currently can not avoid,
+# like computing the similarity or distance of every row. Remove entries as
+# the queries are improved, so that the scans can not come back unnoticed.
+allowed_sequential_scans = {
+  'search_by_locale_name': {'bird', 'bird_common_name'},
+  'search_by_indexed_name': set(),
+  'search_by_position': {'bird'},
+  'search_by_qualifiers': {'bird'},
+  'sightings': set(),
+  'sightings_after_cursor': set(),
+  'sightings_of_birder': set(),
+  'get_bird_statistics': {'birder'},
+  'require_permission': set(),
+}
+
+
+class TestQueryPlans(TestCase):
+
+  @classmethod
+  def setUpClass(cls) -> None:
+    if 'QUERY_PLAN_TESTS' not in os.environ:
+      raise unittest.SkipTest('Skipping query plan tests')
+    connection_details = create_database_connection_details()
+    cls.engine = EngineFactory().create_engine(**connection_details)
+    cls.app = Flask(__name__)
+    cls.app.permission_matrix = PermissionMatrix()
+    cls.baseline = load_baseline()
+    cls.recorded_buffers = {}
+    with cls.engine.connect() as connection:
+      cls.large_tables = {row[0] for row in connection.execute(
+        "SELECT relname FROM pg_class WHERE relkind = 'r' "
+        "AND reltuples >= %s", large_table_rows)}
+      cls.dataset = {
+        table: connection.scalar(f'SELECT count(*) FROM {table}')
+        for table in ['bird', 'bird_common_name', 'birder', 'sighting']
+      }
+      cls.popular_bird_name, = connection.execute(
+        'SELECT binomial_name FROM bird WHERE id = ('
+        'SELECT bird_id FROM sighting GROUP BY bird_id '
+        'ORDER BY count(*) DESC LIMIT 1)').first()
+      cls.active_birder_id, = connection.execute(
+        'SELECT birder_id FROM sighting GROUP BY birder_id '
+        'ORDER BY count(*) DESC LIMIT 1').first()
+      cls.admin_account_id, = connection.execute(
+        'SELECT min(account_id) FROM account_role').first()
+      cls.middle_sighting_position = tuple(connection.execute(
+        "SELECT sighting_date, COALESCE(sighting_time, '00:00:00'::time), id "
+        'FROM sighting ORDER BY 1 DESC, 2 DESC, 3 DESC '
+        'OFFSET (SELECT count(*) / 2 FROM sighting) LIMIT 1').first())
+      cls.hotspot = connection.execute(
+        'SELECT ST_Y(point::geometry), ST_X(point::geometry) FROM position '
+        'WHERE id = (SELECT max(position_id) FROM sighting)').first()
+
+  @classmethod
+  def tearDownClass(cls) -> None:
+    if record_baseline:
+      save_baseline({'dataset': cls.dataset, 'buffers': cls.recorded_buffers})
+    cls.engine.dispose()
+
+  def setUp(self) -> None:
+    self.session = SessionFactory(self.engine).create_session()
+
+  def tearDown(self) -> None:
+    self.session.rollback()
+    self.session.close()
+
+  def test_search_by_locale_name(self):
+    searcher = BirdSearcher(self.session)
+    query = parse_search_query('Common locale:en')
+    self.assert_plans('search_by_locale_name',
+      lambda: searcher.search(query, 30))
+
+  def test_search_by_indexed_name(self):
+    searcher = BirdSearcher(self.session, BirdNameIndex())
+    searcher.name_index.name_scores(self.session, 'Common')
+    query = parse_search_query('Common')
+    self.assert_plans('search_by_indexed_name',
+      lambda: searcher.search(query, 30))
+
+  def test_search_by_position(self):
+    searcher = BirdSearcher(self.session)
+    lat, lon = self.hotspot
+    query = parse_search_query(f'position:{lat:.4f},{lon:.4f};r=5')
+    self.assert_plans('search_by_position',
+      lambda: searcher.search(query, 30))
+
+  def test_search_by_qualifiers(self):
+    searcher = BirdSearcher(self.session)
+    query = parse_search_query(
+      f'date:2019-01-01.. birder:{self.active_birder_id}')
+    self.assert_plans('search_by_qualifiers',
+      lambda: searcher.search(query, 30))
+
+  def test_sightings(self):
+    repository = SightingRepository()
+    self.assert_plans('sightings', lambda: repository.sightings(limit=30))
+
+  def test_sightings_after_cursor(self):
+    repository = SightingRepository()
+    self.assert_plans('sightings_after_cursor',
+      lambda: repository.sightings(limit=30,
+        after=self.middle_sighting_position))
+
+  def test_sightings_of_birder(self):
+    repository = SightingRepository()
+    self.assert_plans('sightings_of_birder',
+      lambda: repository.sightings(birder_id=self.active_birder_id, limit=30))
+
+  def test_get_bird_statistics(self):
+    bird_identifier = self.popular_bird_name.replace(' ', '-').lower()
+    self.assert_plans('get_bird_statistics',
+      lambda: get_bird_statistics(bird_identifier))
+
+  def test_require_permission(self):
+    account = self.session.query(Account).get(self.admin_account_id)
+    principal = create_principal(account)
+    route = require_permission(lambda: 'ok')
+
+    def permitted_route():
+      self.app.permission_matrix.invalidate()
+      g.authenticated_principal = principal
+      return route()
+
+    self.assert_plans('require_permission', permitted_route,
+      path='/birds/pica-pica/common-names', method='POST')
+
+  def assert_plans(self, name: str, query: Callable[[], object],
+        path: str = '/', method: str = 'GET') -> None:
+    with self.app.test_request_context(path, method=method):
+      g.database_session = self.session
+      with capture_statements(self.engine) as statements:
+        query()
+    self.assertTrue(statements, f'{name} executed no statements')
+    connection = self.engine.raw_connection()
+    try:
+      with connection.cursor() as cursor:
+        plans = [explain(cursor, statement, parameters)
+                 for statement, parameters in statements]
+    finally:
+      connection.rollback()
+      connection.close()
+    for (statement, _), plan in zip(statements, plans):
+      scanned_tables = set(sequential_scans(plan)) & self.large_tables
+      unexpected_scans = scanned_tables - allowed_sequential_scans[name]
+      self.assertFalse(unexpected_scans,
+        f'{name} sequentially scans {", ".join(sorted(unexpected_scans))}:'
+        f'\n{statement}')
+    buffers = sum(map(buffer_count, plans))
+    self.recorded_buffers[name] = buffers
+    self.assert_within_baseline(name, buffers)
+
+  def assert_within_baseline(self, name: str, buffers: int) -> None:
+    if record_baseline:
+      return
+    if self.baseline is None:
+      self.fail('No baseline recorded, record one with '
+                'QUERY_PLAN_RECORD_BASELINE set')
+    if self.baseline['dataset'] != self.dataset:
+      self.fail(f'Baseline recorded against dataset '
+                f'{self.baseline["dataset"]}, not {self.dataset}')
+    if name not in self.baseline['buffers']:
+      self.fail(f'No baseline recorded for {name}')
+    limit = self.baseline['buffers'][name] * (1 + buffer_tolerance)
+    self.assertLessEqual(buffers, limit,
+      f'{name} read {buffers} buffers, baseline is '
+      f'{self.baseline["buffers"][name]}')
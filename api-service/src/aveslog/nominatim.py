@@ -1,15 +1,226 @@
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
 import requests
+from requests.adapters import HTTPAdapter
 
-class Nominatim:
+logger = logging.getLogger(__name__)
+
+nominatim_url = 'https://nominatim.openstreetmap.org'
+retried_status_codes = {429, 500, 502, 503, 504}
+
+
+class NominatimError(Exception):
+  """Nominatim gave no answer to a lookup, as when it kept failing or its
+  circuit is open, unlike a response telling there is no place"""
+  pass
+
+
+class TokenBucket:
+  """Rate limiter handing out a token per call at the rate per second, of
+  which up to the capacity can be saved up for bursts. Callers wait for
+  their token in the order they asked for it."""
+
+  def __init__(self,
+        rate: float = 1.0,
+        capacity: float = 1.0,
+        time_supplier: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+  ):
+    self.rate = rate
+    self.capacity = capacity
+    self._time_supplier = time_supplier
+    self._sleep = sleep
+    self._tokens = capacity
+    self._update_time = time_supplier()
+    self._lock = threading.Lock()
+
+  def acquire(self) -> None:
+    with self._lock:
+      now = self._time_supplier()
+      self._tokens = min(self.capacity,
+        self._tokens + (now - self._update_time) * self.rate)
+      self._update_time = now
+      self._tokens -= 1
+      wait = -self._tokens / self.rate if self._tokens < 0 else 0
+    if wait > 0:
+      self._sleep(wait)
+
+
+class CircuitBreaker:
+  """Opens after the failure threshold of consecutive failures, rejecting
+  calls until the reset timeout has passed, after which a single trial call
+  is let through to close it again"""
+
+  def __init__(self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        time_supplier: Callable[[], float] = time.monotonic,
+  ):
+    self.failure_threshold = failure_threshold
+    self.reset_timeout = reset_timeout
+    self._time_supplier = time_supplier
+    self._failure_count = 0
+    self._open_time: Optional[float] = None
+    self._trial_in_progress = False
+    self._lock = threading.Lock()
+
+  def allow(self) -> bool:
+    with self._lock:
+      if self._open_time is None:
+        return True
+      if self._trial_in_progress or \
+            self._time_supplier() - self._open_time < self.reset_timeout:
+        return False
+      self._trial_in_progress = True
+      return True
+
+  def record_success(self) -> None:
+    with self._lock:
+      self._failure_count = 0
+      self._open_time = None
+      self._trial_in_progress = False
+
+  def record_failure(self) -> None:
+    with self._lock:
+      self._failure_count += 1
+      if self._trial_in_progress or \
+            self._failure_count >= self.failure_threshold:
+        if self._open_time is None:
+          logger.warning('Nominatim circuit opened after %d failures',
+            self._failure_count)
+        self._open_time = self._time_supplier()
+      self._trial_in_progress = False
+
+  @property
+  def is_open(self) -> bool:
+    return self._open_time is not None
+
+
+class PendingLookup:
 
   def __init__(self):
-    self._url = 'https://nominatim.openstreetmap.org'
-
-  def reverse(self, lat, lon, zoom=18, language='en-EN'):
-    r = requests.get(f'{self._url}/reverse?format=jsonv2&lat={lat}&lon={lon}&zoom={zoom}&accept-language={language}', headers={
-      'User-Agent': 'Aveslog.com'
-    })
-    if r.status_code == 200:
-      return r.json()
-    else:
-      return None
\ No newline at end of file
+    self.result: Optional[dict] = None
+    self.error: Optional[Exception] = None
+    self._done = threading.Event()
+
+  def complete(self, result: Optional[dict],
+        error: Optional[Exception] = None) -> None:
+    self.result = result
+    self.error = error
+    self._done.set()
+
+  def wait(self) -> Optional[dict]:
+    self._done.wait()
+    if self.error:
+      raise self.error
+    return self.result
+
+
+# Nominatim asks for at most a request per second from each application
+default_rate_limiter = TokenBucket(rate=1.0, capacity=1.0)
+
+
+class Nominatim:
+  """Client of the reverse geocoding of Nominatim
+
+  Requests are sent over a pooled session kept alive between calls, each
+  after a token of the rate limiter, which is shared by the whole process
+  by default. Connection errors, timeouts and overloaded responses are
+  retried after a jittered, doubling delay, and when the provider keeps
+  failing the circuit breaker opens and lookups fail without requesting it.
+  A lookup that gets no answer raises NominatimError. Identical lookups in
+  progress at the same time share a single request, and its outcome.
+  """
+
+  def __init__(self,
+        url: str = nominatim_url,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        max_retries: int = 2,
+        retry_delay: float = 1.0,
+        rate_limiter: Optional[TokenBucket] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        sleep: Callable[[float], None] = time.sleep,
+  ):
+    self._url = url
+    self.timeout = (connect_timeout, read_timeout)
+    self.max_retries = max_retries
+    self.retry_delay = retry_delay
+    self._rate_limiter = rate_limiter or default_rate_limiter
+    self._circuit_breaker = circuit_breaker or CircuitBreaker()
+    self._sleep = sleep
+    self._session = requests.Session()
+    self._session.headers['User-Agent'] = 'Aveslog.com'
+    self._session.mount(self._url, HTTPAdapter(pool_maxsize=4))
+    self._pending_lookups: Dict[Tuple, PendingLookup] = {}
+    self._lock = threading.Lock()
+
+  def reverse(self, lat, lon, zoom=18, language='en-EN') -> dict:
+    key = (lat, lon, zoom, language)
+    with self._lock:
+      pending_lookup = self._pending_lookups.get(key)
+      if pending_lookup:
+        is_leader = False
+      else:
+        is_leader = True
+        pending_lookup = self._pending_lookups[key] = PendingLookup()
+    if not is_leader:
+      return pending_lookup.wait()
+    result = None
+    error = None
+    try:
+      result = self._reverse(lat, lon, zoom, language)
+      return result
+    except Exception as e:
+      error = e
+      raise
+    finally:
+      with self._lock:
+        del self._pending_lookups[key]
+      pending_lookup.complete(result, error)
+
+  def close(self) -> None:
+    self._session.close()
+
+  def _reverse(self, lat, lon, zoom, language) -> dict:
+    if not self._circuit_breaker.allow():
+      raise NominatimError('Nominatim circuit open')
+    params = {
+      'format': 'jsonv2',
+      'lat': lat,
+      'lon': lon,
+      'zoom': zoom,
+      'accept-language': language,
+    }
+    delay = 0.0
+    for attempt in range(self.max_retries + 1):
+      if attempt:
+        self._sleep(max(delay, random.uniform(
+          0, self.retry_delay * 2 ** (attempt - 1))))
+      self._rate_limiter.acquire()
+      try:
+        response = self._session.get(
+          f'{self._url}/reverse', params=params, timeout=self.timeout)
+      except requests.RequestException as e:
+        logger.warning('Nominatim request failed: %r', e)
+        delay = 0.0
+        continue
+      if response.status_code == 200:
+        self._circuit_breaker.record_success()
+        return response.json()
+      if response.status_code not in retried_status_codes:
+        self._circuit_breaker.record_success()
+        raise NominatimError(f'Nominatim responded {response.status_code}')
+      logger.warning('Nominatim responded %d', response.status_code)
+      delay = parse_retry_after(response.headers.get('Retry-After'))
+    self._circuit_breaker.record_failure()
+    raise NominatimError(
+      f'Nominatim failed {self.max_retries + 1} attempts')
+
+
+def parse_retry_after(value: Optional[str]) -> float:
+  return float(value) if value and value.isdigit() else 0.0
@@ -1,42 +1,306 @@
-from unittest import TestCase, mock
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import List, Tuple
+from unittest import TestCase
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
 
+from aveslog.nominatim import CircuitBreaker
 from aveslog.nominatim import Nominatim
+from aveslog.nominatim import NominatimError
+from aveslog.nominatim import TokenBucket
 
 
-class MockResponse:
-  def __init__(self, json_data, status_code):
-    self.json_data = json_data
-    self.status_code = status_code
+class StandInNominatim:
+  """Local HTTP server standing in for Nominatim, answering with the queued
+  responses of status code, body and delay in seconds, or with the last one
+  when only it is left"""
 
-  def json(self):
-    return self.json_data
+  def __init__(self):
+    self.responses: List[Tuple[int, dict, float]] = [(200, {}, 0.0)]
+    self.requests = []
+    self.client_ports = set()
+    stand_in = self
+
+    class Handler(BaseHTTPRequestHandler):
+      protocol_version = 'HTTP/1.1'
+
+      def do_GET(self):
+        stand_in.requests.append(self)
+        stand_in.client_ports.add(self.client_address[1])
+        status_code, body, delay = stand_in.next_response()
+        time.sleep(delay)
+        content = json.dumps(body).encode()
+        try:
+          self.send_response(status_code)
+          self.send_header('Content-Type', 'application/json')
+          self.send_header('Content-Length', str(len(content)))
+          self.end_headers()
+          self.wfile.write(content)
+        except ConnectionError:
+          pass
+
+      def log_message(self, format, *args):
+        pass
+
+    self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    self.server.daemon_threads = True
+    self.url = f'http://127.0.0.1:{self.server.server_port}'
+    self._thread = threading.Thread(target=self.server.serve_forever,
+      kwargs={'poll_interval': 0.01})
+
+  def next_response(self) -> Tuple[int, dict, float]:
+    if len(self.responses) > 1:
+      return self.responses.pop(0)
+    return self.responses[0]
+
+  def start(self) -> None:
+    self._thread.start()
+
+  def stop(self) -> None:
+    self.server.shutdown()
+    self.server.server_close()
 
 
 class TestNominatim(TestCase):
 
   def setUp(self):
-    self.nominatim = Nominatim()
+    self.stand_in = StandInNominatim()
+    self.stand_in.start()
+    self.sleeps = []
+    self.circuit_breaker = CircuitBreaker(failure_threshold=2)
+    self.nominatim = Nominatim(
+      url=self.stand_in.url,
+      read_timeout=0.2,
+      rate_limiter=TokenBucket(rate=1000, capacity=1000),
+      circuit_breaker=self.circuit_breaker,
+      sleep=self.sleeps.append,
+    )
+
+  def tearDown(self):
+    self.nominatim.close()
+    self.stand_in.stop()
+
+  def test_reverse(self):
+    self.stand_in.responses = [(200, {'key': 'value'}, 0.0)]
 
-  @mock.patch('requests.get', side_effect=[MockResponse({'key': 'value'}, 200)])
-  def test_reverse(self, mock_get):
     result = self.nominatim.reverse(10, 9, 17, 'en-EN')
 
-    self.assertListEqual(mock_get.call_args_list, [
-      mock.call(
-        'https://nominatim.openstreetmap.org/reverse?format=jsonv2&lat=10&lon=9&zoom=17&accept-language=en-EN',
-        headers={'User-Agent': 'Aveslog.com'}
-      )
-    ])
     self.assertDictEqual(result, {'key': 'value'})
+    request = self.stand_in.requests[0]
+    url = urlparse(request.path)
+    self.assertEqual(url.path, '/reverse')
+    self.assertDictEqual(parse_qs(url.query), {
+      'format': ['jsonv2'],
+      'lat': ['10'],
+      'lon': ['9'],
+      'zoom': ['17'],
+      'accept-language': ['en-EN'],
+    })
+    self.assertEqual(request.headers['User-Agent'], 'Aveslog.com')
 
-  @mock.patch('requests.get', side_effect=[MockResponse({}, 400)])
-  def test_reverse_when_response_not_ok(self, mock_get):
-    result = self.nominatim.reverse(10, 9, 17, 'en-EN')
+  def test_reverse_when_response_not_ok(self):
+    self.stand_in.responses = [(400, {}, 0.0)]
+
+    with self.assertRaises(NominatimError):
+      self.nominatim.reverse(10, 9, 17, 'en-EN')
+
+    self.assertEqual(len(self.stand_in.requests), 1)
+
+  def test_reverse_keeps_connection_alive(self):
+    for lat in range(3):
+      self.nominatim.reverse(lat, 9)
+
+    self.assertEqual(len(self.stand_in.requests), 3)
+    self.assertEqual(len(self.stand_in.client_ports), 1)
+
+  def test_reverse_retries_when_overloaded(self):
+    self.stand_in.responses = [
+      (503, {}, 0.0),
+      (429, {}, 0.0),
+      (200, {'key': 'value'}, 0.0),
+    ]
+
+    with self.assertLogs('aveslog.nominatim', 'WARNING'):
+      result = self.nominatim.reverse(10, 9)
+
+    self.assertDictEqual(result, {'key': 'value'})
+    self.assertEqual(len(self.stand_in.requests), 3)
+    self.assertEqual(len(self.sleeps), 2)
+    self.assertTrue(0 <= self.sleeps[0] <= 1)
+    self.assertTrue(0 <= self.sleeps[1] <= 2)
+
+  def test_reverse_retries_when_timed_out(self):
+    self.stand_in.responses = [(200, {}, 0.4), (200, {'key': 'value'}, 0.0)]
+
+    with self.assertLogs('aveslog.nominatim', 'WARNING'):
+      result = self.nominatim.reverse(10, 9)
+
+    self.assertDictEqual(result, {'key': 'value'})
+    self.assertEqual(len(self.stand_in.requests), 2)
+
+  def test_reverse_when_retries_exhausted(self):
+    self.stand_in.responses = [(502, {}, 0.0)]
+
+    with self.assertLogs('aveslog.nominatim', 'WARNING'):
+      with self.assertRaises(NominatimError):
+        self.nominatim.reverse(10, 9)
+
+    self.assertEqual(len(self.stand_in.requests), 3)
+
+  def test_reverse_when_circuit_open(self):
+    self.stand_in.responses = [(503, {}, 0.0)]
+    with self.assertLogs('aveslog.nominatim', 'WARNING'):
+      for _ in range(2):
+        with self.assertRaises(NominatimError):
+          self.nominatim.reverse(10, 9)
+    self.stand_in.responses = [(200, {'key': 'value'}, 0.0)]
+
+    with self.assertRaises(NominatimError):
+      self.nominatim.reverse(10, 9)
+
+    self.assertTrue(self.circuit_breaker.is_open)
+    self.assertEqual(len(self.stand_in.requests), 6)
+
+  def test_concurrent_identical_reverses_coalesced(self):
+    self.stand_in.responses = [(200, {'key': 'value'}, 0.1)]
+    results = []
+    threads = [threading.Thread(
+      target=lambda: results.append(self.nominatim.reverse(10, 9)))
+      for _ in range(4)]
+
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    self.assertEqual(results, [{'key': 'value'}] * 4)
+    self.assertEqual(len(self.stand_in.requests), 1)
+
+  def test_concurrent_identical_reverses_share_error(self):
+    self.stand_in.responses = [(400, {}, 0.1)]
+    errors = []
+
+    def reverse():
+      try:
+        self.nominatim.reverse(10, 9)
+      except NominatimError as e:
+        errors.append(e)
+
+    threads = [threading.Thread(target=reverse) for _ in range(4)]
+
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    self.assertEqual(len(errors), 4)
+    self.assertEqual(len(self.stand_in.requests), 1)
+
+  def test_concurrent_different_reverses_not_coalesced(self):
+    self.stand_in.responses = [(200, {'key': 'value'}, 0.1)]
+    threads = [threading.Thread(target=self.nominatim.reverse, args=(lat, 9))
+               for lat in range(2)]
+
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    self.assertEqual(len(self.stand_in.requests), 2)
+
+
+class TestTokenBucket(TestCase):
+
+  def setUp(self):
+    self.time = 0.0
+    self.sleeps = []
+
+  def create_bucket(self, rate: float, capacity: float) -> TokenBucket:
+    def sleep(seconds):
+      self.sleeps.append(seconds)
+    return TokenBucket(rate, capacity, time_supplier=lambda: self.time,
+      sleep=sleep)
+
+  def test_acquire_within_capacity(self):
+    bucket = self.create_bucket(rate=1, capacity=2)
+
+    bucket.acquire()
+    bucket.acquire()
+
+    self.assertEqual(self.sleeps, [])
+
+  def test_acquire_waits_for_token(self):
+    bucket = self.create_bucket(rate=2, capacity=1)
+
+    bucket.acquire()
+    bucket.acquire()
+    bucket.acquire()
+
+    self.assertEqual(self.sleeps, [0.5, 1.0])
+
+  def test_acquire_after_refill(self):
+    bucket = self.create_bucket(rate=1, capacity=1)
+    bucket.acquire()
+    self.time = 5.0
+
+    bucket.acquire()
+
+    self.assertEqual(self.sleeps, [])
+
+
+class TestCircuitBreaker(TestCase):
+
+  def setUp(self):
+    self.time = 0.0
+    self.circuit_breaker = CircuitBreaker(failure_threshold=2,
+      reset_timeout=60, time_supplier=lambda: self.time)
+
+  def open_circuit(self):
+    with self.assertLogs('aveslog.nominatim', 'WARNING'):
+      self.circuit_breaker.record_failure()
+      self.circuit_breaker.record_failure()
+
+  def test_opens_after_consecutive_failures(self):
+    self.circuit_breaker.record_failure()
+    self.assertTrue(self.circuit_breaker.allow())
+
+    self.open_circuit()
+
+    self.assertFalse(self.circuit_breaker.allow())
+
+  def test_success_resets_failures(self):
+    self.circuit_breaker.record_failure()
+    self.circuit_breaker.record_success()
+    self.circuit_breaker.record_failure()
+
+    self.assertTrue(self.circuit_breaker.allow())
+
+  def test_single_trial_after_reset_timeout(self):
+    self.open_circuit()
+    self.time = 60.0
+
+    self.assertTrue(self.circuit_breaker.allow())
+    self.assertFalse(self.circuit_breaker.allow())
+
+  def test_closes_after_successful_trial(self):
+    self.open_circuit()
+    self.time = 60.0
+    self.circuit_breaker.allow()
+
+    self.circuit_breaker.record_success()
+
+    self.assertTrue(self.circuit_breaker.allow())
+    self.assertFalse(self.circuit_breaker.is_open)
+
+  def test_reopens_after_failed_trial(self):
+    self.open_circuit()
+    self.time = 60.0
+    self.circuit_breaker.allow()
+
+    self.circuit_breaker.record_failure()
 
-    self.assertListEqual(mock_get.call_args_list, [
-      mock.call(
-        'https://nominatim.openstreetmap.org/reverse?format=jsonv2&lat=10&lon=9&zoom=17&accept-language=en-EN',
-        headers={'User-Agent': 'Aveslog.com'}
-      )
-    ])
-    self.assertIsNone(result)
\ No newline at end of file
+    self.assertFalse(self.circuit_breaker.allow())
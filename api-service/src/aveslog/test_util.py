@@ -49,6 +49,10 @@ class AppTestCase(IntegrationTestCase):
     test_app_mail_list.clear()
     self._app = test_app
     self._app.rate_limiter.reset()
+    self._app.principal_cache.clear()
+    self._app.permission_matrix.invalidate()
+    self._app.bird_name_index.invalidate()
+    self._app.search_result_cache.clear()
     self.database_connection = test_app_database_connection
     self.clear_database()
     self.app_context = test_app_request_context
@@ -57,6 +61,11 @@ class AppTestCase(IntegrationTestCase):
     self.database_engine = test_app_engine
     logging.disable(logging.CRITICAL)
 
+  def assert_query_budget(self, response: Response, budget: int) -> None:
+    query_count = int(response.headers['X-Query-Count'])
+    self.assertLessEqual(query_count, budget,
+      f'{query_count} database queries exceeds budget of {budget}')
+
   def get_with_access_token(self, uri: str, *, account_id: int) -> Response:
     token = self.create_access_token(account_id)
     return self.client.get(uri, headers={'accessToken': token.jwt})
@@ -116,6 +125,8 @@ class AppTestCase(IntegrationTestCase):
       'INSERT INTO bird (id, binomial_name) '
       'VALUES (%s, %s);', (bird_id, binomial_name))
     self.database_connection.commit()
+    self._app.bird_name_index.invalidate()
+    self._app.search_result_cache.clear()
 
   def db_insert_picture(self, picture_id, filepath, credit):
     cursor = self.database_connection.cursor()
@@ -177,6 +188,7 @@ class AppTestCase(IntegrationTestCase):
       'VALUES (%s, %s, %s, %s, %s, %s);',
       (sighting_id, birder_id, bird_id, sighting_date, sighting_time, position_id))
     self.database_connection.commit()
+    self._app.search_result_cache.clear()
 
   def db_insert_bird_common_name(self, bird_common_name_id, bird_id, locale_id, name):
     cursor = self.database_connection.cursor()
@@ -186,6 +198,8 @@ class AppTestCase(IntegrationTestCase):
       (bird_common_name_id, bird_id, locale_id, name),
     )
     self.database_connection.commit()
+    self._app.bird_name_index.invalidate()
+    self._app.search_result_cache.clear()
 
   def db_insert_birder(self, birder_id, username):
     cursor = self.database_connection.cursor()
@@ -249,6 +263,7 @@ class AppTestCase(IntegrationTestCase):
       'DELETE FROM birder_connection;'
       'ALTER SEQUENCE birder_connection_id_seq RESTART WITH 1;'
       'DELETE FROM position_name;'
+      'DELETE FROM position_naming_task;'
       'DELETE FROM refresh_token;'
       'DELETE FROM password_reset_token;'
       'DELETE FROM hashed_password;'
@@ -0,0 +1,111 @@
+import threading
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from aveslog.v0.database import SessionFactory
+from aveslog.worker import PeriodicJob
+from aveslog.worker import create_geocoding_configuration
+from aveslog.worker import purge_expired_refresh_tokens
+from aveslog.worker import run_job
+from aveslog.worker import run_jobs
+
+
+class TestPurgeExpiredRefreshTokens(TestCase):
+
+  @patch('aveslog.worker.delete_expired_refresh_tokens')
+  def test_deletes_until_batch_not_full(self, delete_expired_refresh_tokens):
+    delete_expired_refresh_tokens.side_effect = [2, 2, 1]
+    session = Mock()
+
+    result = purge_expired_refresh_tokens(session, 2)
+
+    self.assertEqual(result, 5)
+    self.assertEqual(delete_expired_refresh_tokens.call_count, 3)
+    self.assertEqual(session.commit.call_count, 3)
+
+
+class TestCreateGeocodingConfiguration(TestCase):
+
+  @patch.dict('os.environ', {
+    'GAZETTEER_PATH': 'places.tsv',
+    'GAZETTEER_MAX_DISTANCE': '20',
+  }, clear=True)
+  def test_gazetteer(self):
+    configuration = create_geocoding_configuration()
+
+    self.assertIsNone(configuration['fake_latency'])
+    self.assertEqual(configuration['gazetteer_path'], 'places.tsv')
+    self.assertEqual(configuration['max_distance'], 20.0)
+
+
+class TestRunJobs(TestCase):
+
+  def setUp(self) -> None:
+    self.time = 0.0
+    self.stop = threading.Event()
+    self.session_factory = Mock(spec=SessionFactory)
+    self.stop.wait = self.advance_time
+
+  def advance_time(self, seconds: float) -> None:
+    self.time += seconds
+
+  def test_runs_jobs_at_their_intervals(self):
+    runs = []
+
+    def run(name):
+      runs.append((name, self.time))
+      if len(runs) == 5:
+        self.stop.set()
+
+    jobs = [
+      PeriodicJob('often', 10, lambda session: run('often')),
+      PeriodicJob('seldom', 25, lambda session: run('seldom')),
+    ]
+
+    run_jobs(jobs, self.session_factory, self.stop, lambda: self.time)
+
+    self.assertEqual(runs, [
+      ('often', 0), ('seldom', 0), ('often', 10), ('often', 20),
+      ('seldom', 25),
+    ])
+
+  def test_keeps_running_after_failed_job(self):
+    session = self.session_factory.create_session.return_value
+    runs = []
+
+    def fail(session):
+      runs.append(self.time)
+      if len(runs) == 2:
+        self.stop.set()
+      raise RuntimeError('failure')
+
+    with self.assertLogs('aveslog.worker', 'ERROR'):
+      run_jobs([PeriodicJob('failing', 10, fail)],
+        self.session_factory, self.stop, lambda: self.time)
+
+    self.assertEqual(runs, [0, 10])
+    self.assertEqual(session.rollback.call_count, 2)
+    self.assertEqual(session.close.call_count, 2)
+
+
+class TestRunJob(TestCase):
+
+  def setUp(self) -> None:
+    self.session_factory = Mock(spec=SessionFactory)
+
+  def test_logs_result_when_job_did_work(self):
+    job = PeriodicJob('name positions', 10, lambda session: 3)
+
+    with self.assertLogs('aveslog.worker', 'DEBUG') as logs:
+      run_job(job, self.session_factory)
+
+    self.assertEqual(logs.output, ['INFO:aveslog.worker:Ran name positions: 3'])
+
+  def test_logs_at_debug_when_job_did_nothing(self):
+    job = PeriodicJob('name positions', 10, lambda session: 0)
+
+    with self.assertLogs('aveslog.worker', 'DEBUG') as logs:
+      run_job(job, self.session_factory)
+
+    self.assertEqual(logs.output,
+      ['DEBUG:aveslog.worker:Ran name positions: 0'])
@@ -1,19 +1,31 @@
 import os
+from distutils.util import strtobool
 from http import HTTPStatus
+from typing import List, Optional
 
-from flask import Blueprint, g, Response
+from flask import Blueprint, g, Response, request, current_app
+from flask import has_app_context
 
 from aveslog.v0.geocoding import Geocoding
 from aveslog.v0 import routes
 from aveslog.v0.database import EngineFactory
 from aveslog.v0.database import SessionFactory
 from aveslog.v0.error import ErrorCode
+from aveslog.v0.hashing import HashingPool
+from aveslog.v0.hashing import HashingPoolSaturated
+from aveslog.v0.instrumentation import QueryStatistics
+from aveslog.v0.instrumentation import record_query_statistics
 from aveslog.mail import MailDispatcher
 from aveslog.v0.localization import Locale
 from aveslog.v0.localization import LocaleLoader
 from aveslog.v0.localization import LoadedLocale
 from aveslog.v0.localization import LocaleRepository
+from aveslog.v0.permission import PermissionMatrix
+from aveslog.v0.principal import PrincipalCache
+from aveslog.v0.search_cache import SearchResultCache
+from aveslog.v0.search_index import BirdNameIndex
 from aveslog.v0.rest_api import error_response
+from aveslog.v0.rest_api import is_replica_safe
 
 
 def create_api_v0_blueprint(mail_dispatcher: MailDispatcher) -> Blueprint:
@@ -30,9 +42,31 @@ def create_api_v0_blueprint(mail_dispatcher: MailDispatcher) -> Blueprint:
 
   database_connection_details = create_database_connection_details()
 
-  engine_factory = EngineFactory()
+  engine_factory = EngineFactory(**create_database_pool_configuration())
   engine = engine_factory.create_engine(**database_connection_details)
-  session_factory = SessionFactory(engine)
+  replica_engines = [
+    engine_factory.create_engine(**replica_connection_details)
+    for replica_connection_details
+    in create_database_replica_connection_details()
+  ]
+  session_factory = SessionFactory(engine, replica_engines)
+  for instrumented_engine in [engine] + replica_engines:
+    record_query_statistics(instrumented_engine, current_query_statistics)
+  principal_cache = PrincipalCache(**create_principal_cache_configuration())
+  permission_matrix = PermissionMatrix(
+    **create_permission_matrix_configuration())
+  hashing_pool = HashingPool(**create_hashing_pool_configuration())
+  bird_name_index = BirdNameIndex(**create_bird_name_index_configuration())
+  search_result_cache = SearchResultCache(
+    **create_search_result_cache_configuration())
+
+  @blueprint.record_once
+  def attach_caches(state):
+    state.app.principal_cache = principal_cache
+    state.app.permission_matrix = permission_matrix
+    state.app.hashing_pool = hashing_pool
+    state.app.bird_name_index = bird_name_index
+    state.app.search_result_cache = search_result_cache
 
   register_routes(routes.birds_routes)
   register_routes(routes.search_routes)
@@ -52,13 +86,21 @@ def create_api_v0_blueprint(mail_dispatcher: MailDispatcher) -> Blueprint:
     # Setup database session. This is fine even for requests that ultimately
     # didn't require database communication, since the session doesn't actually
     # establish a connection with the database until you start using it.
-    g.database_session = session_factory.create_session()
+    view_function = current_app.view_functions.get(request.endpoint)
+    read_only = is_replica_safe(request.method, view_function)
+    g.database_session = session_factory.create_session(read_only)
+    g.query_statistics = QueryStatistics()
 
   @blueprint.after_request
   def after_request(response: Response):
     database_session = g.pop('database_session', None)
     if database_session is not None:
       database_session.close()
+    g.pop('authenticated_principal', None)
+    g.pop('authenticated_account', None)
+    query_statistics = g.pop('query_statistics', None)
+    if query_statistics is not None:
+      report_query_statistics(query_statistics, response)
     return response
 
   @blueprint.app_errorhandler(HTTPStatus.TOO_MANY_REQUESTS)
@@ -69,9 +111,39 @@ def create_api_v0_blueprint(mail_dispatcher: MailDispatcher) -> Blueprint:
       status_code=HTTPStatus.TOO_MANY_REQUESTS,
     )
 
+  @blueprint.app_errorhandler(HashingPoolSaturated)
+  def hashing_pool_saturated_handler(e):
+    response = error_response(
+      ErrorCode.PASSWORD_HASHING_BUSY,
+      'Too many password operations in progress, try again shortly',
+      status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+    )
+    response.headers['Retry-After'] = '1'
+    return response
+
   return blueprint
 
 
+def current_query_statistics() -> Optional[QueryStatistics]:
+  if has_app_context():
+    return g.get('query_statistics')
+
+
+def report_query_statistics(statistics: QueryStatistics,
+      response: Response) -> None:
+  logger = current_app.logger
+  logger.debug('%s %s: %s', request.method, request.path, statistics)
+  threshold = current_app.config.get('REPEATED_QUERY_THRESHOLD', 10)
+  for shape, count in statistics.repeated_shapes(threshold):
+    logger.warning('Statement repeated %d times in %s %s: %s',
+      count, request.method, request.path, shape)
+  if current_app.config.get('QUERY_STATISTICS_HEADERS'):
+    response.headers['X-Query-Count'] = str(statistics.count)
+    response.headers['X-Query-Time'] = f'{statistics.duration * 1000:.3f}'
+    response.headers['X-Query-Max-Repetitions'] = str(
+      statistics.max_repetitions)
+
+
 def create_database_connection_details() -> dict:
   return {
     'host': os.environ.get('DATABASE_HOST'),
@@ -79,3 +151,64 @@ def create_database_connection_details() -> dict:
     'user': os.environ.get('DATABASE_USER'),
     'password': os.environ.get('DATABASE_PASSWORD')
   }
+
+
+def create_database_replica_connection_details() -> List[dict]:
+  replica_hosts = os.environ.get('DATABASE_REPLICA_HOSTS', '')
+  return [
+    dict(create_database_connection_details(), host=host.strip())
+    for host in replica_hosts.split(',') if host.strip()
+  ]
+
+
+def create_database_pool_configuration() -> dict:
+  statement_timeout = int(os.environ.get('DATABASE_STATEMENT_TIMEOUT', 30000))
+  return {
+    'echo': bool(strtobool(os.environ.get('DATABASE_ECHO', 'false'))),
+    'pool_size': int(os.environ.get('DATABASE_POOL_SIZE', 5)),
+    'max_overflow': int(os.environ.get('DATABASE_MAX_OVERFLOW', 10)),
+    'pool_timeout': float(os.environ.get('DATABASE_POOL_TIMEOUT', 30)),
+    'pool_pre_ping': bool(
+      strtobool(os.environ.get('DATABASE_POOL_PRE_PING', 'true'))),
+    'pool_recycle': int(os.environ.get('DATABASE_POOL_RECYCLE', 1800)),
+    'statement_timeout': statement_timeout or None,
+    'pool_statistics_log_interval': float(
+      os.environ.get('DATABASE_POOL_STATISTICS_INTERVAL', 60)),
+  }
+
+
+def create_principal_cache_configuration() -> dict:
+  return {
+    'max_size': int(os.environ.get('PRINCIPAL_CACHE_SIZE', 10000)),
+    'time_to_live': float(os.environ.get('PRINCIPAL_CACHE_TTL', 60)),
+  }
+
+
+def create_permission_matrix_configuration() -> dict:
+  return {
+    'time_to_live': float(os.environ.get('PERMISSION_MATRIX_TTL', 300)),
+  }
+
+
+def create_bird_name_index_configuration() -> dict:
+  return {
+    'time_to_live': float(os.environ.get('BIRD_NAME_INDEX_TTL', 600)),
+  }
+
+
+def create_search_result_cache_configuration() -> dict:
+  return {
+    'max_size': int(os.environ.get('SEARCH_RESULT_CACHE_SIZE', 1000)),
+    'time_to_live': float(os.environ.get('SEARCH_RESULT_CACHE_TTL', 300)),
+    'sighting_change_threshold': int(
+      os.environ.get('SEARCH_RESULT_CACHE_SIGHTING_CHANGES', 100)),
+  }
+
+
+def create_hashing_pool_configuration() -> dict:
+  timeout = float(os.environ.get('PASSWORD_HASHING_TIMEOUT', 10))
+  return {
+    'processes': int(os.environ.get('PASSWORD_HASHING_PROCESSES', 2)),
+    'max_pending': int(os.environ.get('PASSWORD_HASHING_MAX_PENDING', 8)),
+    'timeout': timeout or None,
+  }
@@ -5,7 +5,9 @@ import re
 from typing import Optional
 
 from flask import g
+from sqlalchemy import func
 from aveslog.v0.models import Account
+from aveslog.v0.models import HashedPassword
 from aveslog.v0.models import RegistrationRequest
 
 
@@ -17,21 +19,62 @@ def is_valid_password(password: str) -> bool:
   return re.compile('^.{8,128}$').match(password) is not None
 
 
+PBKDF2_SHA256 = 'pbkdf2_sha256'
+DEFAULT_PASSWORD_HASH_ITERATIONS = 100000
+
+
+def pbkdf2_sha256(password: str, salt: str,
+      iterations: int = DEFAULT_PASSWORD_HASH_ITERATIONS) -> str:
+  encoded_password = password.encode()
+  encoded_salt = salt.encode()
+  binary_hash = pbkdf2_hmac(
+    'sha256', encoded_password, encoded_salt, iterations)
+  return binascii.hexlify(binary_hash).decode()
+
+
+hash_functions = {
+  PBKDF2_SHA256: pbkdf2_sha256,
+}
+
+
 class PasswordHasher:
+  """Hashes passwords with the current policy's algorithm and iterations, or
+  with the parameters a password was stored with"""
 
-  def __init__(self, salt_factory):
+  def __init__(self, salt_factory, hashing_pool=None,
+        iterations: int = DEFAULT_PASSWORD_HASH_ITERATIONS):
     self.salt_factory = salt_factory
+    self.hashing_pool = hashing_pool
+    self.algorithm = PBKDF2_SHA256
+    self.iterations = iterations
 
   def create_salt_hashed_password(self, password):
     salt = self.salt_factory.create_salt()
     hash = self.hash_password(password, salt)
     return salt, hash
 
-  def hash_password(self, password: str, salt: str) -> str:
-    encoded_password = password.encode()
-    encoded_salt = salt.encode()
-    binary_hash = pbkdf2_hmac('sha256', encoded_password, encoded_salt, 100000)
-    return binascii.hexlify(binary_hash).decode()
+  def hash_password(self, password: str, salt: str,
+        algorithm: Optional[str] = None,
+        iterations: Optional[int] = None) -> str:
+    hash_function = hash_functions[algorithm or self.algorithm]
+    iterations = iterations or self.iterations
+    if self.hashing_pool:
+      return self.hashing_pool.run(hash_function, password, salt, iterations)
+    return hash_function(password, salt, iterations)
+
+  def is_current(self, hashed_password: HashedPassword) -> bool:
+    return (hashed_password.algorithm == self.algorithm and
+            hashed_password.iterations == self.iterations)
+
+  def update_hashed_password(self, hashed_password: HashedPassword,
+        password: str) -> None:
+    """Rehashes the password into the record with a new salt and the current
+    policy's parameters"""
+    salt, hash = self.create_salt_hashed_password(password)
+    hashed_password.salt = salt
+    hashed_password.salted_hash = hash
+    hashed_password.algorithm = self.algorithm
+    hashed_password.iterations = self.iterations
 
 
 class TokenFactory:
@@ -53,5 +96,6 @@ class AccountRepository:
     return registration_request
 
   def find_account_by_email(self, email: str) -> Optional[Account]:
-    return g.database_session.query(Account). \
-      filter(Account.email.like(email)).first()
+    return g.database_session.query(Account) \
+      .filter(func.lower(Account.email) == email.lower()) \
+      .first()
@@ -1,6 +1,7 @@
 from http import HTTPStatus
 
 from flask import Response
+from flask import current_app
 from flask import g
 from flask import request
 from flask import make_response
@@ -8,14 +9,15 @@ from flask import jsonify
 from sqlalchemy.orm import joinedload
 
 from aveslog.v0.error import ErrorCode
-from aveslog.v0.authentication import SaltFactory
 from aveslog.v0.authentication import PasswordUpdateController
 from aveslog.v0.authentication import Authenticator
+from aveslog.v0.rest_api import authenticated_account
+from aveslog.v0.rest_api import create_password_hasher
 from aveslog.v0.rest_api import error_response
 from aveslog.v0.rest_api import validation_failed_error_response
 from aveslog.v0.rest_api import require_authentication
+from aveslog.v0.rest_api import require_primary_database
 from aveslog.v0.account import is_valid_username
-from aveslog.v0.account import PasswordHasher
 from aveslog.v0.account import is_valid_password
 from aveslog.v0.models import RegistrationRequest, HashedPassword
 from aveslog.v0.models import Account
@@ -85,10 +87,10 @@ def account_representation(account):
 
 
 def create_hashed_password(password: str) -> HashedPassword:
-  salt_factory = SaltFactory()
-  password_hasher = PasswordHasher(salt_factory)
-  salt, hash = password_hasher.create_salt_hashed_password(password)
-  return HashedPassword(salt=salt, salted_hash=hash)
+  password_hasher = create_password_hasher()
+  hashed_password = HashedPassword()
+  password_hasher.update_hashed_password(hashed_password, password)
+  return hashed_password
 
 
 def username_taken_response():
@@ -146,26 +148,27 @@ def get_accounts() -> Response:
   return make_response(json, HTTPStatus.OK)
 
 
+@require_primary_database
 @require_authentication
 def get_me() -> Response:
-  account = g.authenticated_account
+  account = authenticated_account()
   json = jsonify(authenticated_account_representation(account))
   return make_response(json, HTTPStatus.OK)
 
 
 @require_authentication
 def get_authenticated_accounts_roles() -> Response:
-  roles = g.authenticated_account.roles
+  roles = authenticated_account().roles
   json = jsonify({'items': list(map(roles_representation, roles))})
   return make_response(json, HTTPStatus.OK)
 
 
 @require_authentication
 def post_password() -> Response:
-  account = g.authenticated_account
+  account = authenticated_account()
   old_password = request.json['oldPassword']
   new_password = request.json['newPassword']
-  password_hasher = PasswordHasher(SaltFactory())
+  password_hasher = create_password_hasher()
   authenticator = Authenticator(password_hasher)
   old_password_correct = authenticator.is_account_password_correct(account,
     old_password)
@@ -177,7 +180,8 @@ def post_password() -> Response:
     )
   if not is_valid_password(new_password):
     return error_response(ErrorCode.PASSWORD_INVALID, 'New password invalid')
-  password_update_controller = PasswordUpdateController(password_hasher)
+  password_update_controller = PasswordUpdateController(
+    password_hasher, current_app.principal_cache)
   session = g.database_session
   password_update_controller.update_password(account, new_password, session)
   session.commit()
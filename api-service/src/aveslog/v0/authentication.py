@@ -1,7 +1,9 @@
 import os
 from base64 import b64encode
 from datetime import timedelta, datetime
-from typing import Union, Callable, Any
+from hashlib import sha256
+from hmac import compare_digest
+from typing import Union, Callable, Any, Optional, Tuple
 
 from jwt import encode, decode, ExpiredSignatureError, InvalidTokenError
 from sqlalchemy.orm import Session
@@ -15,7 +17,9 @@ from aveslog.mail import is_valid_email_address
 from aveslog.mail import MailDispatcher
 from aveslog.v0.account import TokenFactory
 from aveslog.v0.account import PasswordHasher
+from aveslog.v0.account import hash_functions
 from aveslog.v0.account import AccountRepository
+from aveslog.v0.principal import PrincipalCache
 
 
 class AccessToken:
@@ -46,13 +50,20 @@ class Authenticator:
   def is_account_password_correct(self,
         account: Account,
         password: str) -> bool:
+    """Verifies the password with the parameters it was stored with, and when
+    correct but stored with other parameters than the current policy's,
+    rehashes it, to be saved with the account"""
     hashed_password = account.hashed_password
     if not hashed_password:
       return False
-    salt = hashed_password.salt
-    expected_hash = hashed_password.salted_hash
-    if self.hasher.hash_password(password, salt) != expected_hash:
+    if hashed_password.algorithm not in hash_functions:
       return False
+    hash = self.hasher.hash_password(password, hashed_password.salt,
+      hashed_password.algorithm, hashed_password.iterations)
+    if not compare_digest(hash, hashed_password.salted_hash):
+      return False
+    if not self.hasher.is_current(hashed_password):
+      self.hasher.update_hashed_password(hashed_password, password)
     return True
 
 
@@ -114,17 +125,23 @@ class AccountRegistrationController:
 
 class PasswordUpdateController:
 
-  def __init__(self, password_hasher: PasswordHasher):
+  def __init__(self,
+        password_hasher: PasswordHasher,
+        principal_cache: Optional[PrincipalCache] = None,
+  ):
     self._password_hasher = password_hasher
+    self._principal_cache = principal_cache
 
   def update_password(self, account: Account, password: str, session: Session):
-    salt, hash = self._password_hasher.create_salt_hashed_password(password)
-    hashed_password = account.hashed_password
-    hashed_password.salt = salt
-    hashed_password.salted_hash = hash
-    for refresh_token in account.refresh_tokens:
-      session.delete(refresh_token)
+    self._password_hasher.update_hashed_password(
+      account.hashed_password, password)
+    session.query(RefreshToken) \
+      .filter_by(account_id=account.id) \
+      .delete(synchronize_session=False)
+    session.expire(account, ['refresh_tokens'])
     session.flush()
+    if self._principal_cache:
+      self._principal_cache.invalidate_account(account.id)
 
 
 class SaltFactory:
@@ -168,12 +185,35 @@ class AuthenticationTokenFactory:
     jwt = self.jwt_factory.create_token(account_id, time, expiration_date)
     return AccessToken(jwt, account_id, expiration_date)
 
-  def create_refresh_token(self, account_id: int) -> RefreshToken:
+  def create_refresh_token(self,
+        account_id: int) -> Tuple[str, RefreshToken]:
+    """The refresh token, and the row of its digest to persist, as only the
+    digest is stored"""
     time = self.time_supplier()
     expiration_date = time + timedelta(days=90)
     jwt_token = self.jwt_factory.create_token(account_id, time, expiration_date)
-    return RefreshToken(
-      token=jwt_token, account_id=account_id, expiration_date=expiration_date)
+    return jwt_token, RefreshToken(
+      token_digest=digest_token(jwt_token),
+      account_id=account_id,
+      expiration_date=expiration_date,
+    )
+
+
+def digest_token(token: str) -> str:
+  return sha256(token.encode()).hexdigest()
+
+
+def delete_expired_refresh_tokens(session: Session, time: datetime,
+      batch_size: int = 1000) -> int:
+  """Deletes a batch of the refresh tokens expired at the time, returning the
+  number of deleted tokens"""
+  expired_token_ids = session.query(RefreshToken.id) \
+    .filter(RefreshToken.expiration_date < time) \
+    .limit(batch_size) \
+    .subquery()
+  return session.query(RefreshToken) \
+    .filter(RefreshToken.id.in_(expired_token_ids)) \
+    .delete(synchronize_session=False)
 
 
 class DecodeResult:
@@ -2,6 +2,7 @@ from datetime import datetime
 from http import HTTPStatus
 
 from flask import Response, make_response, jsonify, request, current_app, g
+from sqlalchemy import func
 
 from aveslog.v0.link import LinkFactory
 from aveslog.v0.localization import LoadedLocale
@@ -10,17 +11,18 @@ from aveslog.v0.localization import LocaleLoader
 from aveslog.v0.authentication import Authenticator
 from aveslog.v0.authentication import JwtDecoder
 from aveslog.v0.authentication import PasswordUpdateController
-from aveslog.v0.authentication import PasswordHasher
-from aveslog.v0.authentication import SaltFactory
 from aveslog.v0.authentication import TokenFactory
 from aveslog.v0.authentication import AuthenticationTokenFactory
 from aveslog.v0.authentication import JwtFactory
+from aveslog.v0.authentication import digest_token
 from aveslog.v0.error import ErrorCode
 from aveslog.v0.models import RefreshToken
 from aveslog.v0.models import PasswordResetToken
 from aveslog.v0.models import Account
+from aveslog.v0.rest_api import create_password_hasher
 from aveslog.v0.rest_api import error_response
 from aveslog.v0.rest_api import require_authentication
+from aveslog.v0.rest_api import require_primary_database
 
 
 def post_refresh_token() -> Response:
@@ -30,30 +32,30 @@ def post_refresh_token() -> Response:
   account = session.query(Account).filter_by(username=username).first()
   if not account:
     return credentials_incorrect_response()
-  authenticator = Authenticator(PasswordHasher(SaltFactory()))
+  authenticator = Authenticator(create_password_hasher())
   if not authenticator.is_account_password_correct(account, password):
     return credentials_incorrect_response()
   session = g.database_session
   token_factory = AuthenticationTokenFactory(JwtFactory(current_app.secret_key),
     datetime.utcnow)
-  refresh_token = token_factory.create_refresh_token(account.id)
+  jwt_token, refresh_token = token_factory.create_refresh_token(account.id)
   session.add(refresh_token)
   session.commit()
   return make_response(jsonify({
     'id': refresh_token.id,
-    'refreshToken': refresh_token.token,
+    'refreshToken': jwt_token,
     'expirationDate': refresh_token.expiration_date.isoformat(),
   }), HTTPStatus.CREATED)
 
 
 @require_authentication
 def delete_refresh_token(refresh_token_id: int) -> Response:
-  account = g.authenticated_account
+  principal = g.authenticated_principal
   session = g.database_session
   refresh_token = session.query(RefreshToken).get(refresh_token_id)
   if not refresh_token:
     return refresh_token_deleted_response()
-  if refresh_token.account_id != account.id:
+  if refresh_token.account_id != principal.account_id:
     return error_response(
       ErrorCode.AUTHORIZATION_REQUIRED,
       'Authorization required',
@@ -64,6 +66,7 @@ def delete_refresh_token(refresh_token_id: int) -> Response:
   return refresh_token_deleted_response()
 
 
+@require_primary_database
 def get_access_token() -> Response:
   refresh_token_jwt = request.headers.get('refreshToken')
   if not refresh_token_jwt:
@@ -76,7 +79,7 @@ def get_access_token() -> Response:
     elif decode_result.error == 'signature-expired':
       return create_unauthorized_response('refresh token expired')
   token = g.database_session.query(RefreshToken) \
-    .filter_by(token=refresh_token_jwt) \
+    .filter_by(token_digest=digest_token(refresh_token_jwt)) \
     .first()
   if not token:
     return create_unauthorized_response('refresh token revoked')
@@ -93,7 +96,9 @@ def get_access_token() -> Response:
 def post_credentials_recovery() -> Response:
   email = request.json['email']
   session = g.database_session
-  account = session.query(Account).filter_by(email=email).first()
+  account = session.query(Account) \
+    .filter(func.lower(Account.email) == email.lower()) \
+    .first()
   if not account:
     return error_response(
       ErrorCode.EMAIL_MISSING,
@@ -116,7 +121,8 @@ def post_credentials_recovery() -> Response:
     f'{account.username}, and here\'s a password reset link if you need one: '
     f'{link}'
   )
-  g.mail_dispatcher.dispatch(email, 'Aveslog Credentials Recovery', message)
+  g.mail_dispatcher.dispatch(
+    account.email, 'Aveslog Credentials Recovery', message)
   session.commit()
   return make_response('', HTTPStatus.OK)
 
@@ -128,8 +134,9 @@ def post_password_reset(token: str) -> Response:
   if not reset_token:
     return make_response('', HTTPStatus.NOT_FOUND)
   account = reset_token.account
-  password_hasher = PasswordHasher(SaltFactory())
-  password_update_controller = PasswordUpdateController(password_hasher)
+  password_hasher = create_password_hasher()
+  password_update_controller = PasswordUpdateController(
+    password_hasher, current_app.principal_cache)
   password_update_controller.update_password(account, password, session)
   session.delete(reset_token)
   session.commit()
@@ -0,0 +1,25 @@
+from typing import Optional
+
+from flask import g
+from sqlalchemy import bindparam
+from sqlalchemy.orm import joinedload
+
+from aveslog.v0.database import bakery
+from aveslog.v0.models import Bird
+from aveslog.v0.models import BirdThumbnail
+
+
+class BirdRepository:
+
+  def find_bird_by_binomial_name(self, binomial_name: str) -> Optional[Bird]:
+    query = bakery(lambda session: session.query(Bird))
+    query += lambda q: q.filter(Bird.binomial_name == bindparam('name'))
+    return query(g.database_session).params(name=binomial_name).first()
+
+  def find_bird_with_details(self, binomial_name: str) -> Optional[Bird]:
+    """The bird with its common names and thumbnail picture loaded"""
+    query = bakery(lambda session: session.query(Bird)
+      .options(joinedload(Bird.common_names))
+      .options(joinedload(Bird.thumbnail).joinedload(BirdThumbnail.picture)))
+    query += lambda q: q.filter(Bird.binomial_name == bindparam('name'))
+    return query(g.database_session).params(name=binomial_name).first()
@@ -13,7 +13,7 @@ from aveslog.v0.rest_api import require_authentication
 from aveslog.v0.rest_api import validation_failed_error_response
 from aveslog.v0.models import BirderConnection
 from aveslog.v0.models import Birder
-from aveslog.v0.models import Account
+from aveslog.v0.principal import Principal
 
 secondary_birder_id_key = 'secondaryBirderId'
 
@@ -21,9 +21,9 @@ secondary_birder_id_key = 'secondaryBirderId'
 @require_authentication
 def get_birder_connection(birder_connection_id: int):
   db_session = g.database_session
-  account = g.authenticated_account
+  principal = g.authenticated_principal
   connection = db_session.query(BirderConnection).get(birder_connection_id)
-  if not connection or connection.primary_birder_id != account.birder_id:
+  if not connection or connection.primary_birder_id != principal.birder_id:
     # making sure to hide existence of unauthorized resources
     return make_response('', HTTPStatus.NOT_FOUND)
   return make_response(
@@ -35,8 +35,8 @@ def get_birder_connection(birder_connection_id: int):
 @require_authentication
 def delete_birder_connection(birder_connection_id: int):
   session = g.database_session
-  account = g.authenticated_account
-  deleter = BirderConnectionDeleter(session, account)
+  principal = g.authenticated_principal
+  deleter = BirderConnectionDeleter(session, principal)
   return deleter.delete(None, birder_connection_id)
 
 
@@ -48,10 +48,10 @@ def birder_connection_representation(connection: BirderConnection) -> dict:
 
 
 def get_birder_connections(birder_id: int) -> Response:
-  account = g.authenticated_account
-  if account.birder_id != birder_id:
+  principal = g.authenticated_principal
+  if principal.birder_id != birder_id:
     return make_response('', HTTPStatus.UNAUTHORIZED)
-  connections = account.birder.connections
+  connections = g.database_session.query(Birder).get(birder_id).connections
   return make_response(jsonify({
     'items': list(map(birder_connection_representation, connections)),
     'hasMore': False
@@ -63,7 +63,7 @@ def post_birder_connection(birder_id: int) -> Response:
   field_errors = validate_fields(birder_id, secondary_birder_id)
   if field_errors:
     return validation_failed_error_response(field_errors)
-  if g.authenticated_account.birder_id != birder_id:
+  if g.authenticated_principal.birder_id != birder_id:
     return make_response('', HTTPStatus.UNAUTHORIZED)
   if not g.database_session.query(Birder).get(birder_id):
     return make_response('', HTTPStatus.NOT_FOUND)
@@ -112,12 +112,12 @@ def is_connection_present(primary_birder_id, secondary_birder_id):
 
 class BirderConnectionDeleter:
 
-  def __init__(self, database_session, account):
+  def __init__(self, database_session, principal):
     self._db: Session = database_session
-    self._account: Account = account
+    self._principal: Principal = principal
 
   def delete(self, birder_id: Optional[int], connection_id: int) -> Response:
-    account_birder_id = self._account.birder_id
+    account_birder_id = self._principal.birder_id
     if birder_id and account_birder_id != birder_id:
       return make_response('', HTTPStatus.UNAUTHORIZED)
     connection = self._db.query(BirderConnection).get(connection_id)
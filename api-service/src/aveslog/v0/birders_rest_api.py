@@ -20,8 +20,10 @@ def get_birder(birder_id: int):
 
 @require_authentication
 def patch_birder(birder_id: int):
-  birder = g.authenticated_account.birder
-  if not birder.id == birder_id:
+  if g.authenticated_principal.birder_id != birder_id:
+    return make_response('', HTTPStatus.UNAUTHORIZED)
+  birder = g.database_session.query(Birder).get(birder_id)
+  if not birder:
     return make_response('', HTTPStatus.UNAUTHORIZED)
   name = request.json.get('name')
   if name:
@@ -43,8 +45,8 @@ def post_birders_birder_connection(birder_id: int):
 @require_authentication
 def delete_birders_birder_connection(birder_id: int, birder_connection_id: int):
   session = g.database_session
-  account = g.authenticated_account
-  deleter = BirderConnectionDeleter(session, account)
+  principal = g.authenticated_principal
+  deleter = BirderConnectionDeleter(session, principal)
   return deleter.delete(birder_id, birder_connection_id)
 
 
@@ -1,9 +1,11 @@
 from http import HTTPStatus
 
-from flask import Response, make_response, jsonify, g, request
-from sqlalchemy.orm import joinedload
+from flask import Response, make_response, jsonify, g, request, current_app
 
+from aveslog.v0.bird import BirdRepository
 from aveslog.v0.error import ErrorCode
+from aveslog.v0.localization import LocaleLoader
+from aveslog.v0.localization import LocaleRepository
 from aveslog.v0.rest_api import validation_failed_error_response
 from aveslog.v0.rest_api import cache
 from aveslog.v0.rest_api import require_authentication
@@ -11,19 +13,13 @@ from aveslog.v0.rest_api import require_permission
 from .models import Bird, BirdCommonName, Locale
 from .models import Sighting
 from .models import Birder
-from .models import BirdThumbnail
 
 
 @cache(max_age=300)
 def get_single_bird(bird_identifier: str) -> Response:
   binomial_name = bird_identifier.replace('-', ' ').capitalize()
   embed = request.args.get('embed', '').split(',')
-  bird = g.database_session.query(Bird) \
-    .options(joinedload(Bird.common_names)) \
-    .options(joinedload(Bird.thumbnail)
-    .options(joinedload(BirdThumbnail.picture))) \
-    .filter_by(binomial_name=binomial_name) \
-    .first()
+  bird = BirdRepository().find_bird_with_details(binomial_name)
   if not bird:
     return make_response('', HTTPStatus.NOT_FOUND)
   bird_response = bird_summary_representation(bird)
@@ -47,7 +43,7 @@ def picture_representation(picture):
 
 def get_bird_statistics(bird_identifier: str) -> Response:
   name = bird_identifier.replace('-', ' ').capitalize()
-  bird = g.database_session.query(Bird).filter_by(binomial_name=name).first()
+  bird = BirdRepository().find_bird_by_binomial_name(name)
   if not bird:
     return make_response('', HTTPStatus.NOT_FOUND)
   sightings_count = g.database_session.query(Sighting) \
@@ -67,8 +63,7 @@ def get_bird_statistics(bird_identifier: str) -> Response:
 def get_common_names(bird_identifier: str) -> Response:
   binomial_name = bird_identifier.replace('-', ' ').capitalize()
   locale_filter = request.args.get('locale', None)
-  bird = g.database_session.query(Bird). \
-    filter_by(binomial_name=binomial_name).first()
+  bird = BirdRepository().find_bird_by_binomial_name(binomial_name)
   if not bird:
     return make_response('', HTTPStatus.NOT_FOUND)
   common_name_query = g.database_session.query(BirdCommonName).join(
@@ -100,13 +95,15 @@ def get_common_name(bird_identifier: str, id: int) -> Response:
 @require_permission
 def post_common_name(bird_identifier: str) -> Response:
   binomial_name = bird_identifier.replace('-', ' ').capitalize()
-  bird = g.database_session.query(Bird). \
-    filter_by(binomial_name=binomial_name).first()
+  bird = BirdRepository().find_bird_by_binomial_name(binomial_name)
   if not bird:
     return make_response('', HTTPStatus.NOT_FOUND)
   locale_code = request.json['locale']
   name = request.json['name']
-  locale = g.database_session.query(Locale).filter_by(code=locale_code).first()
+  locales_directory_path = current_app.config['LOCALES_PATH']
+  locale_repository = LocaleRepository(
+    locales_directory_path, LocaleLoader(locales_directory_path))
+  locale = locale_repository.find_locale_by_code(locale_code)
   if not locale:
     errors = [{
       'code': ErrorCode.INVALID_LOCALE_CODE,
@@ -117,6 +114,8 @@ def post_common_name(bird_identifier: str) -> Response:
   common_name = BirdCommonName(locale_id=locale.id, name=name)
   bird.common_names.append(common_name)
   g.database_session.commit()
+  current_app.bird_name_index.add_common_name(bird.id, locale.code, name)
+  current_app.search_result_cache.invalidate_name_queries()
   response = make_response(jsonify({}), HTTPStatus.CREATED)
   response.headers[
     'Location'] = f'/birds/{bird_identifier}/common-names/{common_name.id}'
@@ -1,26 +1,160 @@
+import itertools
+import logging
+import time
+from typing import List
+from typing import Optional
+
 from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.ext import baked
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Cache of compiled SQL for the hottest lookups. Queries built through it are
+# compiled once per process instead of once per call.
+bakery = baked.bakery()
+
+
+class MonitoredQueuePool(QueuePool):
+  """Queue pool that keeps track of checkouts forced to wait for a connection
+
+  A wait means that every pooled connection was checked out and the overflow
+  limit was reached, which is the signal that the pool, or the number of
+  workers sharing the database, is sized wrong. The statistics are logged on
+  checkout at most once per statistics log interval in seconds, unless it is
+  zero.
+  """
+
+  def __init__(self, creator, statistics_log_interval: float = 60.0,
+        **kwargs):
+    super().__init__(creator, **kwargs)
+    self.statistics_log_interval = statistics_log_interval
+    self.next_statistics_log_time = time.monotonic() + statistics_log_interval
+    self.checkouts = 0
+    self.waits = 0
+    self.timeouts = 0
+    self.wait_time = 0.0
+
+  def recreate(self):
+    pool = super().recreate()
+    pool.statistics_log_interval = self.statistics_log_interval
+    return pool
+
+  def _do_get(self):
+    self.checkouts += 1
+    self._log_statistics_when_due()
+    if not self._is_exhausted():
+      return super()._do_get()
+    self.waits += 1
+    start_time = time.monotonic()
+    try:
+      return super()._do_get()
+    except TimeoutError:
+      self.timeouts += 1
+      raise
+    finally:
+      wait_time = time.monotonic() - start_time
+      self.wait_time += wait_time
+      logger.warning(
+        'Waited %.3f seconds for database connection, pool statistics: %s',
+        wait_time, self.statistics())
+
+  def _log_statistics_when_due(self) -> None:
+    if self.statistics_log_interval <= 0:
+      return
+    now = time.monotonic()
+    if now >= self.next_statistics_log_time:
+      self.next_statistics_log_time = now + self.statistics_log_interval
+      logger.info('Database pool statistics: %s', self.statistics())
+
+  def _is_exhausted(self) -> bool:
+    if self.checkedin() or self._max_overflow < 0:
+      return False
+    return self.overflow() >= self._max_overflow
+
+  def statistics(self) -> dict:
+    return {
+      'size': self.size(),
+      'checked_in': self.checkedin(),
+      'checked_out': self.checkedout(),
+      'overflow': max(self.overflow(), 0),
+      'max_overflow': self._max_overflow,
+      'checkouts': self.checkouts,
+      'waits': self.waits,
+      'timeouts': self.timeouts,
+      'wait_time': self.wait_time,
+    }
 
 
 class EngineFactory:
 
-  def __init__(self, echo=True):
+  def __init__(self,
+        echo: bool = False,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30,
+        pool_pre_ping: bool = True,
+        pool_recycle: int = 1800,
+        statement_timeout: Optional[int] = None,
+        pool_statistics_log_interval: float = 60.0,
+  ):
     self._echo = echo
+    self._pool_size = pool_size
+    self._max_overflow = max_overflow
+    self._pool_timeout = pool_timeout
+    self._pool_pre_ping = pool_pre_ping
+    self._pool_recycle = pool_recycle
+    self._statement_timeout = statement_timeout
+    self._pool_statistics_log_interval = pool_statistics_log_interval
 
   def create_engine(self, host: str, dbname: str, user: str,
         password: str) -> Engine:
     url = f'postgresql+psycopg2://{user}:{password}@{host}/{dbname}'
-    return create_engine(url, echo=self._echo)
+    return create_engine(
+      url,
+      echo=self._echo,
+      poolclass=MonitoredQueuePool,
+      pool_size=self._pool_size,
+      max_overflow=self._max_overflow,
+      pool_timeout=self._pool_timeout,
+      pool_pre_ping=self._pool_pre_ping,
+      pool_recycle=self._pool_recycle,
+      statistics_log_interval=self._pool_statistics_log_interval,
+      connect_args=self._connect_args(),
+    )
+
+  def _connect_args(self) -> dict:
+    if not self._statement_timeout:
+      return {}
+    return {'options': f'-c statement_timeout={self._statement_timeout}'}
 
 
 class SessionFactory:
+  """Creates sessions bound to the primary or, when reading, a replica engine
 
-  def __init__(self, engine: Engine):
-    self.engine = engine
+  Sessions created for reading are spread over the replica engines in turn,
+  and fall back to the primary engine when there are no replicas. Each engine
+  gets one configured sessionmaker, created up front.
+  """
 
-  def create_session(self) -> Session:
-    session_class = sessionmaker(bind=self.engine)
-    return session_class()
+  def __init__(self,
+        engine: Engine,
+        replica_engines: Optional[List[Engine]] = None,
+  ):
+    self.engine = engine
+    self.replica_engines = replica_engines or []
+    self._session_classes = {
+      engine: sessionmaker(bind=engine)
+      for engine in [self.engine] + self.replica_engines
+    }
+    self._replica_engine_cycle = itertools.cycle(self.replica_engines)
 
+  def create_session(self, read_only: bool = False) -> Session:
+    engine = self.engine
+    if read_only and self.replica_engines:
+      engine = next(self._replica_engine_cycle)
+    return self._session_classes[engine]()
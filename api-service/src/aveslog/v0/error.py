@@ -21,3 +21,5 @@ class ErrorCode(IntEnum):
   INVALID_LOCALE_CODE = 17,
   INVALID_FIELD_FORMAT = 18,
   SECONDARY_BIRDER_ID_INVALID = 19,
+  PASSWORD_HASHING_BUSY = 20,
+  INVALID_SEARCH_QUERY = 21,
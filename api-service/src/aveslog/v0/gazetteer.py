@@ -0,0 +1,193 @@
+import logging
+import math
+import mmap
+import threading
+from array import array
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Vector = Tuple[float, float, float]
+
+# Kilometers
+earth_radius = 6371.0
+
+
+class Place:
+
+  def __init__(self,
+        name: str,
+        latitude: float,
+        longitude: float,
+        country: str = '',
+        admin1: str = '',
+        admin2: str = '',
+        localized_names: Optional[Dict[str, str]] = None,
+  ):
+    self.name = name
+    self.latitude = latitude
+    self.longitude = longitude
+    self.country = country
+    self.admin1 = admin1
+    self.admin2 = admin2
+    self.localized_names = localized_names or {}
+
+  def display_name(self, language: str) -> str:
+    """The name of the place in the language if known, followed by its
+    administrative divisions from the smallest to the country"""
+    parts = []
+    for part in [self.localized_names.get(language, self.name),
+                 self.admin2, self.admin1, self.country]:
+      if part and (not parts or parts[-1] != part):
+        parts.append(part)
+    return ', '.join(parts)
+
+
+def parse_place(line: str) -> Place:
+  """Parses a gazetteer line of tab separated name, latitude, longitude,
+  country, first and second level administrative division, and names in
+  other languages, such as sv=Göteborg|de=Gothenburg. All but the first
+  three columns may be left empty or out."""
+  columns = line.rstrip('\r\n').split('\t')
+  if len(columns) < 3:
+    raise ValueError(f'Too few gazetteer columns: {line!r}')
+  columns += [''] * (7 - len(columns))
+  name, latitude, longitude, country, admin1, admin2, names = columns[:7]
+  localized_names = {}
+  for localized_name in filter(None, names.split('|')):
+    language, separator, text = localized_name.partition('=')
+    if separator:
+      localized_names[language] = text
+  return Place(name, float(latitude), float(longitude), country, admin1,
+    admin2, localized_names)
+
+
+def unit_vector(latitude: float, longitude: float) -> Vector:
+  lat = math.radians(latitude)
+  lon = math.radians(longitude)
+  return math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), \
+         math.sin(lat)
+
+
+def chord_length(distance: float) -> float:
+  """The straight line length between points of the distance in kilometers
+  along the surface of the unit sphere"""
+  return 2 * math.sin(min(distance / earth_radius, math.pi) / 2)
+
+
+class Gazetteer:
+  """Places of a gazetteer file, found by their closeness to coordinates
+
+  The file is memory mapped and only the unit vectors of the places and the
+  offsets of their lines are held in memory, in arrays ordered as an
+  implicit k-d tree: the place splitting each range of the arrays is at its
+  middle, with the places closer to the origin along the axis of the depth
+  of the range before it. The index is built by the first search, so that
+  opening the gazetteer takes no time.
+  """
+
+  def __init__(self, path: str):
+    self.path = path
+    self._points: Optional[array] = None
+    self._offsets: Optional[array] = None
+    self._mmap: Optional[mmap.mmap] = None
+    self._lock = threading.Lock()
+
+  def __len__(self):
+    self.load()
+    return len(self._offsets)
+
+  def load(self) -> None:
+    with self._lock:
+      if self._offsets is None:
+        self._build_index()
+
+  def close(self) -> None:
+    with self._lock:
+      if self._mmap:
+        self._mmap.close()
+      self._mmap = None
+      self._points = None
+      self._offsets = None
+
+  def nearest(self, latitude: float, longitude: float,
+        max_distance: float = math.inf) -> Optional[Place]:
+    """The place closest to the coordinates, if within the max distance in
+    kilometers"""
+    self.load()
+    if not self._offsets:
+      return None
+    best = [chord_length(max_distance) ** 2, -1]
+    self._search(0, len(self._offsets), 0,
+      unit_vector(latitude, longitude), best)
+    if best[1] < 0:
+      return None
+    return parse_place(self._line(self._offsets[best[1]]))
+
+  def _search(self, start: int, end: int, axis: int,
+        point: Vector, best: list) -> None:
+    points = self._points
+    while start < end:
+      middle = (start + end) // 2
+      index = 3 * middle
+      dx = point[0] - points[index]
+      dy = point[1] - points[index + 1]
+      dz = point[2] - points[index + 2]
+      distance = dx * dx + dy * dy + dz * dz
+      if distance < best[0]:
+        best[0] = distance
+        best[1] = middle
+      difference = point[axis] - points[index + axis]
+      next_axis = (axis + 1) % 3
+      if difference < 0:
+        near_start, near_end = start, middle
+        far_start, far_end = middle + 1, end
+      else:
+        near_start, near_end = middle + 1, end
+        far_start, far_end = start, middle
+      if difference * difference < best[0]:
+        self._search(far_start, far_end, next_axis, point, best)
+      start, end, axis = near_start, near_end, next_axis
+
+  def _line(self, offset: int) -> str:
+    end = self._mmap.find(b'\n', offset)
+    return self._mmap[offset:end if end >= 0 else len(self._mmap)] \
+      .decode('utf-8')
+
+  def _build_index(self) -> None:
+    points = []
+    offsets = []
+    skipped_count = 0
+    with open(self.path, 'rb') as file:
+      offset = 0
+      for line in file:
+        if line.strip() and not line.startswith(b'#'):
+          try:
+            place = parse_place(line.decode('utf-8'))
+            points.append(unit_vector(place.latitude, place.longitude))
+            offsets.append(offset)
+          except ValueError:
+            skipped_count += 1
+        offset += len(line)
+      self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) \
+        if offset else None
+    if skipped_count:
+      logger.warning('Skipped %d invalid lines of gazetteer %s',
+        skipped_count, self.path)
+    order = list(range(len(points)))
+    self._arrange(order, points, 0, len(order), 0)
+    self._points = array('d', (coordinate for index in order
+                               for coordinate in points[index]))
+    self._offsets = array('q', (offsets[index] for index in order))
+    logger.info('Indexed %d places of gazetteer %s', len(order), self.path)
+
+  def _arrange(self, order: list, points: list, start: int, end: int,
+        axis: int) -> None:
+    """Orders the range as a k-d tree split on the axis"""
+    if end - start <= 1:
+      return
+    order[start:end] = sorted(order[start:end],
+      key=lambda index: points[index][axis])
+    middle = (start + end) // 2
+    self._arrange(order, points, start, middle, (axis + 1) % 3)
+    self._arrange(order, points, middle + 1, end, (axis + 1) % 3)
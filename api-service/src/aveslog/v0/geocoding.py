@@ -1,11 +1,31 @@
+import time
+from typing import Optional
+
 from aveslog.nominatim import Nominatim
+from aveslog.nominatim import nominatim_url
+from aveslog.v0.gazetteer import Gazetteer
 
 
-def create_geocoding(testing):
-  if testing:
-    return MockedGeocoding()
+def create_geocoding(
+      fake_latency: Optional[float] = None,
+      gazetteer_path: Optional[str] = None,
+      max_distance: float = 50.0,
+      url: str = nominatim_url,
+      connect_timeout: float = 3.05,
+      read_timeout: float = 10.0,
+      max_retries: int = 2,
+) -> 'Geocoding':
+  """The local fake geocoding when given a fake latency, as for tests and
+  benchmarks, the offline geocoding of the gazetteer file when given its
+  path, and otherwise Nominatim at the url"""
+  if fake_latency is not None:
+    return MockedGeocoding(fake_latency)
+  elif gazetteer_path:
+    return GazetteerGeocoding(Gazetteer(gazetteer_path),
+      max_distance=max_distance)
   else:
-    nominatim = Nominatim()
+    nominatim = Nominatim(url=url, connect_timeout=connect_timeout,
+      read_timeout=read_timeout, max_retries=max_retries)
     return NominatimGeocoding(nominatim)
 
 
@@ -25,8 +45,14 @@ class ReverseSearchResult:
 
 
 class Geocoding:
+  """Reverse searches give no result when there is no place at the
+  coordinates, and raise when the geocoding fails to tell"""
+  # The language and detail level of the names of reverse searches
+  language_code = 'en-EN'
+  detail_level = 18
 
-  def reverse_search(self, coordinates: tuple) -> ReverseSearchResult:
+  def reverse_search(self,
+        coordinates: tuple) -> Optional[ReverseSearchResult]:
     pass
 
 
@@ -35,17 +61,17 @@ class NominatimGeocoding(Geocoding):
   def __init__(self, nominatim: Nominatim):
     self._nominatim = nominatim
 
-  def reverse_search(self, coordinates) -> ReverseSearchResult:
+  def reverse_search(self, coordinates) -> Optional[ReverseSearchResult]:
     lat, lon = coordinates
-    language_code = 'en-EN'
-    detail_level = 18
+    language_code = self.language_code
+    detail_level = self.detail_level
     nominatim_response = self._nominatim.reverse(
       lat,
       lon,
       zoom=detail_level,
       language=language_code,
     )
-    if nominatim_response:
+    if nominatim_response and 'display_name' in nominatim_response:
       result_coordinates = (
         nominatim_response['lat'],
         nominatim_response['lon'],
@@ -59,7 +85,40 @@ class NominatimGeocoding(Geocoding):
       )
 
 
+class GazetteerGeocoding(Geocoding):
+  """Offline geocoding naming positions by the closest place of a local
+  gazetteer, if within the max distance in kilometers"""
+  # Names of towns and villages, as Nominatim names at its detail level 10
+  detail_level = 10
+
+  def __init__(self, gazetteer: Gazetteer, language_code: str = 'en-EN',
+        max_distance: float = 50.0):
+    self._gazetteer = gazetteer
+    self.language_code = language_code
+    self.max_distance = max_distance
+
+  def reverse_search(self, coordinates) -> Optional[ReverseSearchResult]:
+    lat, lon = coordinates
+    place = self._gazetteer.nearest(lat, lon, self.max_distance)
+    if place:
+      language = self.language_code.split('-')[0]
+      return ReverseSearchResult(
+        (place.latitude, place.longitude),
+        self.language_code,
+        self.detail_level,
+        place.display_name(language),
+      )
+
+
 class MockedGeocoding(Geocoding):
+  """Local fake geocoding, naming positions by their coordinates after the
+  latency in seconds, for tests and benchmarks"""
+
+  def __init__(self, latency: float = 0.0):
+    self.latency = latency
 
   def reverse_search(self, coordinates) -> ReverseSearchResult:
-    return ReverseSearchResult(coordinates, 'en-EN', 18, f'{coordinates} name')
+    if self.latency:
+      time.sleep(self.latency)
+    return ReverseSearchResult(coordinates, self.language_code,
+      self.detail_level, f'{coordinates} name')
@@ -0,0 +1,108 @@
+import concurrent.futures
+import os
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HashingPoolSaturated(Exception):
+  pass
+
+
+class HashingPool:
+  """Runs CPU heavy password hashing in a pool of worker processes
+
+  At most max_pending hashes are admitted at a time, further ones fail right
+  away with HashingPoolSaturated instead of queueing up behind a burst of
+  logins. A hash that times out keeps its admission until it is done, as the
+  worker process keeps hashing it. The worker processes are spawned rather
+  than forked, as the pool is started from threaded server workers, and are
+  started by start, or on first use in each process. Without processes,
+  hashing runs in the calling thread, still bounded by the admission limit.
+  When a worker process dies, the broken pool is replaced by a new one and the
+  hash is run once more in it.
+  """
+
+  def __init__(self,
+        processes: int = 2,
+        max_pending: int = 8,
+        timeout: Optional[float] = 10,
+  ):
+    if max_pending < 1:
+      raise ValueError(f'max_pending must be at least 1, not {max_pending}')
+    self.processes = processes
+    self.max_pending = max_pending
+    self.timeout = timeout
+    self._admission = threading.BoundedSemaphore(max_pending)
+    self._executor: Optional[ProcessPoolExecutor] = None
+    self._executor_pid: Optional[int] = None
+    self._lock = threading.Lock()
+
+  def start(self) -> None:
+    """Starts the worker processes of the current process, so that the first
+    hashes do not wait for them"""
+    if self.processes:
+      self._current_executor().submit(os.getpid).result()
+
+  def run(self, function: Callable[..., str], *args) -> str:
+    if not self._admission.acquire(blocking=False):
+      raise HashingPoolSaturated()
+    if not self.processes:
+      try:
+        return function(*args)
+      finally:
+        self._admission.release()
+    futures = []
+    try:
+      try:
+        return self._run_in_executor(futures, function, *args)
+      except BrokenProcessPool:
+        logger.warning('Password hashing processes broke, starting new ones')
+        return self._run_in_executor(futures, function, *args)
+    finally:
+      if futures:
+        futures[-1].add_done_callback(lambda _: self._admission.release())
+      else:
+        self._admission.release()
+
+  def shutdown(self) -> None:
+    with self._lock:
+      if self._executor and self._executor_pid == os.getpid():
+        self._executor.shutdown()
+      self._executor = None
+      self._executor_pid = None
+
+  def _run_in_executor(self, futures: List[Future],
+        function: Callable[..., str], *args) -> str:
+    executor = self._current_executor()
+    try:
+      future = executor.submit(function, *args)
+      futures.append(future)
+      return future.result(self.timeout)
+    except concurrent.futures.TimeoutError:
+      future.cancel()
+      raise HashingPoolSaturated()
+    except BrokenProcessPool:
+      self._discard_executor(executor)
+      raise
+
+  def _current_executor(self) -> ProcessPoolExecutor:
+    with self._lock:
+      if self._executor_pid != os.getpid():
+        self._executor = ProcessPoolExecutor(self.processes,
+          mp_context=multiprocessing.get_context('spawn'))
+        self._executor_pid = os.getpid()
+      return self._executor
+
+  def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+    with self._lock:
+      if self._executor is executor:
+        self._executor = None
+        self._executor_pid = None
+    executor.shutdown(wait=False)
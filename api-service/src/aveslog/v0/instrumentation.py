@@ -0,0 +1,87 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+bind_parameter_pattern = re.compile(r'%\(\w+\)s')
+bind_parameter_list_pattern = re.compile(r'\?(?:, \?)+')
+whitespace_pattern = re.compile(r'\s+')
+
+
+def statement_shape(statement: str) -> str:
+  """Reduces a statement to its shape, so that repeated executions of it with
+  different parameters, or different lengths of IN lists, count as the same"""
+  shape = bind_parameter_pattern.sub('?', statement)
+  shape = bind_parameter_list_pattern.sub('?', shape)
+  return whitespace_pattern.sub(' ', shape).strip()
+
+
+class QueryStatistics:
+
+  def __init__(self) -> None:
+    self.count = 0
+    self.duration = 0.0
+    self.shape_counts = Counter()
+
+  def record(self, statement: str, duration: float) -> None:
+    self.count += 1
+    self.duration += duration
+    self.shape_counts[statement_shape(statement)] += 1
+
+  @property
+  def max_repetitions(self) -> int:
+    return max(self.shape_counts.values(), default=0)
+
+  def repeated_shapes(self, threshold: int) -> List[Tuple[str, int]]:
+    return [(shape, count) for shape, count in self.shape_counts.most_common()
+            if count > threshold]
+
+  def __repr__(self) -> str:
+    return (f'<QueryStatistics(count={self.count}, '
+            f'duration={self.duration * 1000:.1f}ms, '
+            f'max_repetitions={self.max_repetitions})>')
+
+
+QueryStatisticsSupplier = Callable[[], Optional[QueryStatistics]]
+
+
+def record_query_statistics(
+      engine: Engine,
+      statistics_supplier: QueryStatisticsSupplier,
+) -> None:
+  """Records every statement executed through the engine, together with its
+  execution time, into the statistics given by the supplier at the time"""
+
+  @event.listens_for(engine, 'before_cursor_execute')
+  def before_cursor_execute(connection, cursor, statement, parameters,
+        context, executemany):
+    connection.info['query_start_time'] = time.perf_counter()
+
+  @event.listens_for(engine, 'after_cursor_execute')
+  def after_cursor_execute(connection, cursor, statement, parameters,
+        context, executemany):
+    start_time = connection.info.pop('query_start_time', None)
+    statistics = statistics_supplier()
+    if statistics is not None and start_time is not None:
+      statistics.record(statement, time.perf_counter() - start_time)
+
+
+@contextmanager
+def capture_statements(engine: Engine) -> Iterator[List[Tuple[str, Any]]]:
+  """Captures the statements, with their parameters, that are executed through
+  the engine inside the with block"""
+  statements = []
+
+  def before_cursor_execute(connection, cursor, statement, parameters,
+        context, executemany):
+    statements.append((statement, parameters))
+
+  event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+  try:
+    yield statements
+  finally:
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
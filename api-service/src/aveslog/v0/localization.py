@@ -3,7 +3,9 @@ import json
 import os
 from typing import Optional, List, Set
 from flask import Request, g
+from sqlalchemy import bindparam
 
+from aveslog.v0.database import bakery
 from aveslog.v0.models import Locale
 
 
@@ -84,7 +86,9 @@ class LocaleRepository:
     return list(map(lambda l: l.code, self.locales))
 
   def find_locale_by_code(self, code: str) -> Optional[Locale]:
-    return g.database_session.query(Locale).filter_by(code=code).first()
+    query = bakery(lambda session: session.query(Locale))
+    query += lambda q: q.filter(Locale.code == bindparam('code'))
+    return query(g.database_session).params(code=code).first()
 
   @property
   def locales(self) -> List[Locale]:
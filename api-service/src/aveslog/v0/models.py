@@ -116,6 +116,8 @@ class HashedPassword(Base):
   account_id = Column(Integer, ForeignKey('account.id'), primary_key=True)
   salt = Column(String, nullable=False)
   salted_hash = Column(String, nullable=False)
+  algorithm = Column(String, nullable=False, default='pbkdf2_sha256')
+  iterations = Column(Integer, nullable=False, default=100000)
 
 
 account_role_table = Table('account_role', Base.metadata,
@@ -272,10 +274,22 @@ class PositionName(Base):
   locale = relationship('Locale', uselist=False)
 
 
+class PositionNamingTask(Base):
+  __tablename__ = 'position_naming_task'
+  id = Column(Integer, primary_key=True)
+  position_id = Column(Integer, ForeignKey('position.id'), nullable=False,
+    unique=True)
+  attempt_count = Column(Integer, nullable=False, default=0)
+  next_attempt_time = Column(DateTime, nullable=False)
+  last_error = Column(String)
+  creation_time = Column(DateTime, nullable=False)
+  position = relationship('Position', uselist=False)
+
+
 class RefreshToken(Base):
   __tablename__ = 'refresh_token'
   id = Column(Integer, primary_key=True)
-  token = Column(String, nullable=False)
+  token_digest = Column(String, nullable=False, unique=True)
   account_id = Column(Integer, ForeignKey('account.id'), nullable=False)
   expiration_date = Column(DateTime, nullable=False)
   account = relationship('Account', back_populates='refresh_tokens')
@@ -0,0 +1,76 @@
+import logging
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from sqlalchemy.orm import Session
+
+from aveslog.v0.models import ResourcePermission
+from aveslog.v0.models import Role
+
+logger = logging.getLogger(__name__)
+
+Permissions = Dict[Tuple[int, str], List[Pattern]]
+
+
+class PermissionMatrix:
+  """In-memory mapping of roles to the resources and methods they permit
+
+  The resource regexes are compiled once, when the matrix is loaded on first
+  use. It is loaded again when older than the time to live, or after being
+  invalidated. Resources are matched like the ~ operator of Postgres does,
+  by searching the resource for the regex.
+  """
+
+  def __init__(self,
+        time_to_live: float = 300,
+        time_supplier: Callable[[], float] = time.monotonic,
+  ):
+    self.time_to_live = time_to_live
+    self._time_supplier = time_supplier
+    self._permissions: Optional[Permissions] = None
+    self._load_time = 0.0
+    self._lock = threading.Lock()
+
+  def is_permitted(self,
+        session: Session,
+        role_ids: Iterable[int],
+        resource: str,
+        method: str,
+  ) -> bool:
+    permissions = self._current_permissions(session)
+    for role_id in role_ids:
+      for pattern in permissions.get((role_id, method), []):
+        if pattern.search(resource):
+          return True
+    return False
+
+  def invalidate(self) -> None:
+    with self._lock:
+      self._permissions = None
+
+  def _current_permissions(self, session: Session) -> Permissions:
+    with self._lock:
+      now = self._time_supplier()
+      if self._permissions is None or \
+            now - self._load_time >= self.time_to_live:
+        self._permissions = load_permissions(session)
+        self._load_time = now
+      return self._permissions
+
+
+def load_permissions(session: Session) -> Permissions:
+  rows = session.query(
+    Role.id, ResourcePermission.resource_regex, ResourcePermission.method) \
+    .join(Role.resource_permissions) \
+    .all()
+  permissions = {}
+  for role_id, resource_regex, method in rows:
+    try:
+      pattern = re.compile(resource_regex)
+    except re.error:
+      logger.warning('Ignoring invalid resource regex %s', resource_regex)
+      continue
+    permissions.setdefault((role_id, method), []).append(pattern)
+  return permissions
@@ -0,0 +1,167 @@
+import logging
+from datetime import datetime
+from datetime import timedelta
+from typing import Callable, Optional
+
+from geoalchemy2 import Geography
+from shapely import wkb
+from sqlalchemy import cast
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from aveslog.v0.geocoding import Geocoding
+from aveslog.v0.geocoding import ReverseSearchResult
+from aveslog.v0.models import Locale
+from aveslog.v0.models import Position
+from aveslog.v0.models import PositionName
+from aveslog.v0.models import PositionNamingTask
+
+logger = logging.getLogger(__name__)
+
+
+def queue_position_naming(session: Session, position: Position,
+      time: datetime) -> None:
+  session.add(PositionNamingTask(
+    position=position,
+    next_attempt_time=time,
+    creation_time=time,
+  ))
+
+
+class PositionNamer:
+  """Names the positions of the position naming tasks by reverse geocoding
+
+  Each task is claimed and run in a transaction of its own, so that several
+  workers can run tasks side by side. Before reverse geocoding, the task is
+  leased by committing its next attempt time the lease duration ahead, so
+  that no row lock is held across the request and no other worker runs it
+  meanwhile. The attempt is counted in the same commit, so that attempts
+  that never finish, as when the worker dies, count towards the max. A
+  failed task is retried after a delay doubling with each attempt, until it
+  has been attempted the max attempts. A task of a position that the
+  geocoding finds no place at is done without naming it. Running a task
+  again names its position at most once per locale.
+
+  A position within the reuse distance, in meters, of a position already
+  named in the locale and at the detail level of the geocoding is given the
+  same name, without geocoding it.
+  """
+
+  def __init__(self,
+        geocoding: Geocoding,
+        max_attempts: int = 8,
+        retry_delay: timedelta = timedelta(minutes=1),
+        max_retry_delay: timedelta = timedelta(hours=6),
+        reuse_distance: float = 100.0,
+        lease_duration: timedelta = timedelta(minutes=5),
+        time_supplier: Callable[[], datetime] = datetime.now,
+  ):
+    self.geocoding = geocoding
+    self.max_attempts = max_attempts
+    self.reuse_distance = reuse_distance
+    self.retry_delay = retry_delay
+    self.max_retry_delay = max_retry_delay
+    self.lease_duration = lease_duration
+    self._time_supplier = time_supplier
+
+  def name_positions(self, session: Session, max_count: int) -> int:
+    """Runs due tasks until none are due or the max count have been run, and
+    returns the number of tasks run"""
+    count = 0
+    while count < max_count:
+      task = self.claim_due_task(session)
+      if not task:
+        break
+      self.run_task(session, task)
+      session.commit()
+      count += 1
+    return count
+
+  def claim_due_task(self, session: Session) -> Optional[PositionNamingTask]:
+    return session.query(PositionNamingTask) \
+      .filter(PositionNamingTask.next_attempt_time <= self._time_supplier()) \
+      .filter(PositionNamingTask.attempt_count < self.max_attempts) \
+      .order_by(PositionNamingTask.next_attempt_time) \
+      .with_for_update(skip_locked=True) \
+      .first()
+
+  def run_task(self, session: Session, task: PositionNamingTask) -> None:
+    position = task.position
+    point = wkb.loads(bytes(position.point.data))
+    nearby_name = self.find_nearby_name(session, position.id, point.y, point.x)
+    if nearby_name:
+      self.add_name(position, PositionName(
+        locale_id=nearby_name.locale_id,
+        detail_level=nearby_name.detail_level,
+        name=nearby_name.name,
+        creation_time=self._time_supplier(),
+      ))
+      session.delete(task)
+      return
+    task.attempt_count += 1
+    task.next_attempt_time = self._time_supplier() + self.lease_duration
+    session.commit()
+    try:
+      result = self.geocoding.reverse_search((point.y, point.x))
+    except Exception as e:
+      self.record_failure(task, repr(e))
+      return
+    if not result:
+      logger.info('No place at position %d', task.position_id)
+      session.delete(task)
+      return
+    position_name = create_position_name(
+      session, result, self._time_supplier())
+    if position_name:
+      self.add_name(position, position_name)
+    session.delete(task)
+
+  def find_nearby_name(self, session: Session, position_id: int, lat: float,
+        lon: float) -> Optional[PositionName]:
+    """The name of the closest other position within the reuse distance,
+    in the locale and at the detail level of the geocoding"""
+    if self.reuse_distance <= 0:
+      return None
+    locale_code = self.geocoding.language_code.split('-')[0]
+    point = cast(func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326),
+      Geography('POINT', 4326))
+    return session.query(PositionName) \
+      .join(PositionName.locale) \
+      .join(Position, PositionName.position_id == Position.id) \
+      .filter(func.ST_DWithin(Position.point, point, self.reuse_distance,
+        False)) \
+      .filter(Position.id != position_id) \
+      .filter(Locale.code == locale_code) \
+      .filter(PositionName.detail_level == self.geocoding.detail_level) \
+      .order_by(func.ST_Distance(Position.point, point, False)) \
+      .first()
+
+  def add_name(self, position: Position, position_name: PositionName) -> None:
+    if not any(name.locale_id == position_name.locale_id
+               for name in position.names):
+      position.names.append(position_name)
+
+  def record_failure(self, task: PositionNamingTask, error: str) -> None:
+    task.last_error = error
+    delay = min(self.retry_delay * 2 ** (task.attempt_count - 1),
+      self.max_retry_delay)
+    task.next_attempt_time = self._time_supplier() + delay
+    logger.warning('Failed attempt %d of naming position %d: %s',
+      task.attempt_count, task.position_id, error)
+
+
+def create_position_name(session: Session, result: ReverseSearchResult,
+      time: datetime) -> Optional[PositionName]:
+  primary_language_subtag = result.language_code.split('-')[0]
+  locale = session.query(Locale) \
+    .filter_by(code=primary_language_subtag) \
+    .first()
+  if locale:
+    position_name = PositionName(
+      locale_id=locale.id,
+      detail_level=result.detail_level,
+      name=result.name,
+      creation_time=time,
+    )
+    position_name.locale = locale
+    return position_name
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Set, Tuple
+
+from aveslog.v0.models import Account
+
+
+class Principal:
+  """The verified identity behind an access token"""
+
+  def __init__(self, account_id: int, birder_id: Optional[int],
+        role_ids: Iterable[int]):
+    self.account_id = account_id
+    self.birder_id = birder_id
+    self.role_ids: FrozenSet[int] = frozenset(role_ids)
+
+  def __eq__(self, other):
+    if isinstance(other, Principal):
+      return (self.account_id == other.account_id and
+              self.birder_id == other.birder_id and
+              self.role_ids == other.role_ids)
+    return False
+
+  def __hash__(self):
+    return hash((self.account_id, self.birder_id, self.role_ids))
+
+  def __repr__(self):
+    return (f'<Principal(account_id={self.account_id}, '
+            f'birder_id={self.birder_id}, role_ids={sorted(self.role_ids)})>')
+
+
+def create_principal(account: Account) -> Principal:
+  return Principal(account.id, account.birder_id,
+    [role.id for role in account.roles])
+
+
+class PrincipalCache:
+  """Bounded cache of verified access tokens and their principals
+
+  An entry expires after the time to live, but never later than the token it
+  was verified from. When full, the least recently used entry is evicted.
+  """
+
+  def __init__(self,
+        max_size: int = 10000,
+        time_to_live: float = 60,
+        time_supplier: Callable[[], float] = time.time,
+  ):
+    self.max_size = max_size
+    self.time_to_live = time_to_live
+    self._time_supplier = time_supplier
+    self._entries: Dict[str, Tuple[Principal, float]] = OrderedDict()
+    self._tokens_by_account_id: Dict[int, Set[str]] = {}
+    self._lock = threading.Lock()
+
+  def get(self, token: str) -> Optional[Principal]:
+    with self._lock:
+      entry = self._entries.get(token)
+      if not entry:
+        return None
+      principal, expiration_time = entry
+      if expiration_time <= self._time_supplier():
+        self._remove(token)
+        return None
+      self._entries.move_to_end(token)
+      return principal
+
+  def put(self, token: str, principal: Principal,
+        token_expiration_time: float) -> None:
+    if self.max_size <= 0:
+      return
+    expiration_time = min(
+      self._time_supplier() + self.time_to_live, token_expiration_time)
+    with self._lock:
+      self._remove(token)
+      self._entries[token] = (principal, expiration_time)
+      self._tokens_by_account_id.setdefault(
+        principal.account_id, set()).add(token)
+      while len(self._entries) > self.max_size:
+        self._remove(next(iter(self._entries)))
+
+  def invalidate_account(self, account_id: int) -> None:
+    with self._lock:
+      for token in list(self._tokens_by_account_id.get(account_id, [])):
+        self._remove(token)
+
+  def clear(self) -> None:
+    with self._lock:
+      self._entries.clear()
+      self._tokens_by_account_id.clear()
+
+  def __len__(self) -> int:
+    return len(self._entries)
+
+  def _remove(self, token: str) -> None:
+    entry = self._entries.pop(token, None)
+    if entry:
+      account_id = entry[0].account_id
+      tokens = self._tokens_by_account_id[account_id]
+      tokens.discard(token)
+      if not tokens:
+        del self._tokens_by_account_id[account_id]
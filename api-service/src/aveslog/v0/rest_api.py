@@ -1,15 +1,19 @@
 from functools import wraps
 from http import HTTPStatus
-from typing import Callable
+from typing import Callable, Optional, Tuple
 
 from flask import Response, make_response, jsonify, request, current_app, g
-from sqlalchemy import text
 
+from aveslog.v0.account import PasswordHasher
 from aveslog.v0.authentication import JwtDecoder
+from aveslog.v0.authentication import SaltFactory
+from aveslog.v0.database import bakery
 from aveslog.v0.error import ErrorCode
 from aveslog.v0.models import Account
-from aveslog.v0.models import Role
-from aveslog.v0.models import ResourcePermission
+from aveslog.v0.permission import PermissionMatrix
+from aveslog.v0.principal import Principal
+from aveslog.v0.principal import PrincipalCache
+from aveslog.v0.principal import create_principal
 
 RouteFunction = Callable[..., Response]
 
@@ -50,11 +54,35 @@ def cache(max_age=300) -> RouteFunction:
   return decorator
 
 
+def create_password_hasher() -> PasswordHasher:
+  """Password hasher of the app's hashing policy, running its hashing in the
+  app's hashing pool"""
+  return PasswordHasher(SaltFactory(), current_app.hashing_pool,
+    current_app.config['PASSWORD_HASH_ITERATIONS'])
+
+
+def require_primary_database(route) -> RouteFunction:
+  """Marks a route to use the primary database even for safe methods
+
+  Meant for routes reading what a preceding request just wrote, which a
+  lagging read replica might not have caught up with yet.
+  """
+  route.requires_primary_database = True
+  return route
+
+
+def is_replica_safe(method: str, route: Optional[RouteFunction]) -> bool:
+  if method not in ('GET', 'HEAD'):
+    return False
+  return not getattr(route, 'requires_primary_database', False)
+
+
 def require_authentication(route) -> RouteFunction:
   """Wraps a route to require a valid authentication token
 
-  The wrapped route will then be able to access the authenticated account
-  through g.authenticated_account.
+  The wrapped route will then be able to access the verified principal
+  through g.authenticated_principal, and its account through
+  authenticated_account().
   """
 
   @wraps(route)
@@ -62,60 +90,80 @@ def require_authentication(route) -> RouteFunction:
     access_token = request.headers.get('accessToken')
     if not access_token:
       return authentication_token_missing_response()
-    jwt_decoder = JwtDecoder(current_app.secret_key)
-    decode_result = jwt_decoder.decode_jwt(access_token)
-    if not decode_result.ok:
-      if decode_result.error == 'token-invalid':
-        return access_token_invalid_response()
-      elif decode_result.error == 'signature-expired':
-        return access_token_expired_response()
-    account_id = decode_result.payload['sub']
-    account = g.database_session.query(Account).get(account_id)
-    if not account:
+    principal, error = verify_access_token(access_token)
+    if error == 'token-invalid':
+      return access_token_invalid_response()
+    elif error == 'signature-expired':
+      return access_token_expired_response()
+    elif error == 'account-missing':
       return authorized_account_missing_response()
-    g.authenticated_account = account
+    g.authenticated_principal = principal
     return route(**kwargs)
 
   return route_wrapper
 
 
 def optional_authentication(route) -> RouteFunction:
-  """Wraps a route to require a valid authentication token
+  """Wraps a route to accept, but not require, a valid authentication token
 
-  The wrapped route will then be able to access the authenticated account
-  through g.authenticated_account.
+  When authenticated, the wrapped route will be able to access the verified
+  principal through g.authenticated_principal.
   """
 
   @wraps(route)
   def route_wrapper(**kwargs):
     access_token = request.headers.get('accessToken')
     if access_token:
-      jwt_decoder = JwtDecoder(current_app.secret_key)
-      decode_result = jwt_decoder.decode_jwt(access_token)
-      if decode_result.ok:
-        account_id = decode_result.payload['sub']
-        account = g.database_session.query(Account).get(account_id)
-        if account:
-          g.authenticated_account = account
+      principal, error = verify_access_token(access_token)
+      if principal:
+        g.authenticated_principal = principal
     return route(**kwargs)
 
   return route_wrapper
 
 
+def verify_access_token(
+      access_token: str,
+) -> Tuple[Optional[Principal], Optional[str]]:
+  principal_cache: PrincipalCache = current_app.principal_cache
+  principal = principal_cache.get(access_token)
+  if principal:
+    return principal, None
+  jwt_decoder = JwtDecoder(current_app.secret_key)
+  decode_result = jwt_decoder.decode_jwt(access_token)
+  if not decode_result.ok:
+    return None, decode_result.error
+  account = find_account(decode_result.payload['sub'])
+  if not account:
+    return None, 'account-missing'
+  g.authenticated_account = account
+  principal = create_principal(account)
+  principal_cache.put(access_token, principal, decode_result.payload['exp'])
+  return principal, None
+
+
+def authenticated_account() -> Account:
+  """The account of the authenticated principal, loaded on first use"""
+  if 'authenticated_account' not in g:
+    g.authenticated_account = find_account(
+      g.authenticated_principal.account_id)
+  return g.authenticated_account
+
+
+def find_account(account_id: int) -> Optional[Account]:
+  query = bakery(lambda session: session.query(Account))
+  return query(g.database_session).get(account_id)
+
+
 def require_permission(route) -> RouteFunction:
   """Wraps a route to requiring an authentication with necessary permissions"""
 
   @wraps(route)
   def route_wrapper(**kwargs):
-    account: Account = g.authenticated_account
-    matching_permissions = g.database_session.query(ResourcePermission) \
-      .join(ResourcePermission.roles) \
-      .filter(Role.accounts.any(id=account.id)) \
-      .filter(text(":resource ~ resource_regex")) \
-      .params(resource=request.path) \
-      .filter(ResourcePermission.method == request.method) \
-      .all()
-    if not matching_permissions:
+    principal: Principal = g.authenticated_principal
+    permission_matrix: PermissionMatrix = current_app.permission_matrix
+    if not permission_matrix.is_permitted(g.database_session,
+          principal.role_ids, request.path, request.method):
       return unauthorized_response()
     return route(**kwargs)
 
@@ -38,7 +38,11 @@ search_routes = [
   {
     'rule': '/search/birds',
     'func': search_api.search_birds,
-  }
+  },
+  {
+    'rule': '/search/birds/suggest',
+    'func': search_api.suggest_birds,
+  },
 ]
 
 roles_routes = [
@@ -1,16 +1,34 @@
-import re
-from typing import Dict, List, Optional
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
 
+from geoalchemy2 import Geography
 from geoalchemy2 import WKTElement
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Float
+from sqlalchemy import Integer
+from sqlalchemy import and_
+from sqlalchemy import cast
+from sqlalchemy import column
 from sqlalchemy import func
 from sqlalchemy import or_
-import shlex
+from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy import union_all
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Query
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Alias
+from sqlalchemy.sql import bindparam
 
 from .models import Bird
 from .models import BirdCommonName
+from .models import Locale
 from .models import Sighting
 from .models import Position
+from .search_index import BirdNameIndex
+from .search_query import SearchQuery
+
+# The score and bird id of a match, that a page of matches starts after
+MatchPosition = Tuple[float, int]
 
 
 class BirdSearchMatch:
@@ -19,92 +37,167 @@ class BirdSearchMatch:
     self.bird = bird
     self.score = score
 
-qualifiers = ['position']
-
 
 class BirdSearcher:
+  """Searches birds by compiling search queries into a single statement,
+  which filters, scores and ranks the birds in the database
+
+  Names are scored by the name index when given, and the scores passed on
+  to the statement, unless the query is limited to the common names of a
+  locale. Matches are ranked by score and then by bird id, and paged through
+  by the position of the last match of the previous page. When the query
+  only searches names, the name index selects the page of matches itself.
+  """
 
-  def __init__(self, session: Session):
+  def __init__(self, session: Session,
+        name_index: Optional[BirdNameIndex] = None):
     self.session = session
+    self.name_index = name_index
+
+  def search(self,
+        query: SearchQuery,
+        limit: Optional[int] = None,
+        birder_id: Optional[int] = None,
+        after: Optional[MatchPosition] = None,
+  ) -> List[BirdSearchMatch]:
+    """The best matches of the query ranked after the given position, where
+    birder_id is the birder that seen:me refers to"""
+    statement = self.compile(query, limit, birder_id, after)
+    if statement is None:
+      return []
+    return [BirdSearchMatch(bird, score) for bird, score in statement]
+
+  def compile(self,
+        query: SearchQuery,
+        limit: Optional[int] = None,
+        birder_id: Optional[int] = None,
+        after: Optional[MatchPosition] = None,
+  ) -> Optional[Query]:
+    """The statement of the query, or None when it can match no birds"""
+    if query.seen_by_me and birder_id is None:
+      return None
+    scores = []
+    if query.name:
+      if query.filters_sightings:
+        name_scores = self.name_scores(query.name, query.locale_code)
+      else:
+        name_scores = self.name_scores(
+          query.name, query.locale_code, limit, after)
+      if name_scores is None:
+        return None
+      scores.append(name_scores)
+    if query.filters_sightings:
+      scores.append(self.sighting_scores(query, birder_id))
+    if not scores:
+      return None
+    score = scores[0].c.score
+    for multiplied_scores in scores[1:]:
+      score = score * multiplied_scores.c.score
+    statement = self.session.query(Bird, score.label('score'))
+    for joined_scores in scores:
+      statement = statement.join(
+        joined_scores, Bird.id == joined_scores.c.bird_id)
+    if after:
+      after_score, after_bird_id = after
+      statement = statement.filter(or_(score < after_score, and_(
+        score == after_score, Bird.id > after_bird_id)))
+    statement = statement.order_by(score.desc(), Bird.id)
+    return statement.limit(limit) if limit is not None else statement
+
+  def name_scores(self,
+        name: str,
+        locale_code: Optional[str],
+        limit: Optional[int] = None,
+        after: Optional[MatchPosition] = None,
+  ) -> Optional[Alias]:
+    """Scores of the birds by id, matching the name by binomial name with a
+    similarity above 0.2, or by a common name containing the name. The
+    limit and position select the page from the name index, when used."""
+    if self.name_index and not locale_code:
+      return self.indexed_name_scores(name, limit, after)
+    # Scored in double precision, like the positions of matches passed back
+    binomial_name_similarity = cast(
+      func.similarity(Bird.binomial_name, name), Float)
+    common_name_similarity = cast(
+      func.similarity(BirdCommonName.name, name), Float)
+    common_name_scores = select([
+      BirdCommonName.bird_id.label('bird_id'),
+      common_name_similarity.label('score'),
+    ]).where(BirdCommonName.name.ilike(f'%{name}%')) \
+      .where(common_name_similarity > 0.01)
+    if locale_code:
+      common_name_scores = common_name_scores \
+        .select_from(BirdCommonName.__table__.join(Locale.__table__)) \
+        .where(Locale.code == locale_code)
+    matches = union_all(
+      select([
+        Bird.id.label('bird_id'),
+        binomial_name_similarity.label('score'),
+      ]).where(binomial_name_similarity > 0.2),
+      common_name_scores,
+    ).alias('name_match')
+    return select([
+      matches.c.bird_id,
+      func.max(matches.c.score).label('score'),
+    ]).group_by(matches.c.bird_id).alias('name_score')
+
+  def indexed_name_scores(self,
+        name: str,
+        limit: Optional[int],
+        after: Optional[MatchPosition],
+  ) -> Optional[Alias]:
+    scores = self.name_index.name_scores(self.session, name)
+    if limit is not None:
+      scores = top_scores(scores, limit, after)
+    if not scores:
+      return None
+    return text(
+      'SELECT * FROM unnest(CAST(:bird_ids AS integer[]), '
+      'CAST(:scores AS double precision[])) AS name_score (bird_id, score)'
+    ).bindparams(
+      bindparam('bird_ids', list(scores.keys()), type_=ARRAY(Integer)),
+      bindparam('scores', list(scores.values()), type_=ARRAY(Float)),
+    ).columns(column('bird_id', Integer), column('score', Float)) \
+      .alias('name_score')
+
+  def sighting_scores(self, query: SearchQuery,
+        birder_id: Optional[int]) -> Alias:
+    """Scores of the birds by id, by their share of the sightings selected by
+    the qualifiers of the query"""
+    count = cast(func.count(Sighting.id), Float)
+    statement = select([
+      Sighting.bird_id.label('bird_id'),
+      (count / func.sum(count).over()).label('score'),
+    ])
+    if query.position:
+      lat, lon, radius = query.position
+      center = cast(func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326),
+        Geography('POINT', 4326))
+      statement = statement \
+        .select_from(Sighting.__table__.join(Position.__table__)) \
+        .where(func.ST_DWithin(Position.point, center, 1000 * radius, False))
+    if query.start_date:
+      statement = statement.where(Sighting.sighting_date >= query.start_date)
+    if query.end_date:
+      statement = statement.where(Sighting.sighting_date <= query.end_date)
+    if query.birder_id is not None:
+      statement = statement.where(Sighting.birder_id == query.birder_id)
+    if query.seen_by_me:
+      statement = statement.where(Sighting.birder_id == birder_id)
+    return statement.group_by(Sighting.bird_id).alias('sighting_score')
+
+
+def top_scores(scores: Dict[int, float], limit: int,
+      after: Optional[MatchPosition]) -> Dict[int, float]:
+  """The limit best scores of the birds by id, ranked after the position"""
+  ranked_after: Iterable[Tuple[int, float]] = scores.items()
+  if after:
+    after_score, after_bird_id = after
+    ranked_after = [(bird_id, score) for bird_id, score in ranked_after
+                    if (-score, bird_id) > (-after_score, after_bird_id)]
+  return dict(heapq.nsmallest(limit, ranked_after,
+    key=lambda scored_bird: (-scored_bird[1], scored_bird[0])))
 
-  def search(self, query: Optional[str] = None) -> List[BirdSearchMatch]:
-    parts = shlex.split(query)
-    scores_by_bird: Dict[Bird, float] = {}
-    name_query = ' '.join([x for x in parts if x.split(':')[0] not in qualifiers])
-    if name_query:
-      name_search_scores = self.name_search(name_query)
-      scores_by_bird = name_search_scores
-    position_qualifiers = [x for x in parts if x.startswith('position:')]
-    sighting_search_scores = {}
-    if position_qualifiers:
-      sighting_search_scores = self.search_by_sightings(position_qualifiers[-1])
-    if not scores_by_bird:
-      scores_by_bird = sighting_search_scores
-    elif sighting_search_scores:
-      for bird in scores_by_bird:
-        sighting_score = sighting_search_scores.get(bird, 0)
-        scores_by_bird[bird] = scores_by_bird[bird] * sighting_score
-    matches = []
-    for bird in scores_by_bird:
-      score = scores_by_bird[bird]
-      if score:
-        matches.append(BirdSearchMatch(bird, score))
-    return matches
-
-  def name_search(self, name_query):
-    scores_by_bird: Dict[Bird, float] = dict()
-    binomial_name_matches = self.search_by_binomial_name(name_query)
-    for bird in binomial_name_matches:
-      scores_by_bird[bird] = binomial_name_matches[bird]
-    language_name_matches = self.search_by_language_names(name_query)
-    for bird in language_name_matches:
-      scores_by_bird[bird] = max(scores_by_bird.get(bird, 0), language_name_matches[bird])
-    return scores_by_bird
-
-  def search_by_binomial_name(self, name: str) -> Dict[Bird, float]:
-    subquery = self.session.query(Bird.id, func.similarity(Bird.binomial_name, name).label('similarity')).subquery()
-    result = self.session.query(Bird, subquery.c.similarity) \
-      .outerjoin(subquery, Bird.id==subquery.c.id) \
-      .filter(subquery.c.similarity > 0.2) \
-      .all()
-    matches = dict()
-    for bird, similarity in result:
-      matches[bird] = similarity
-    return matches
-
-  def search_by_language_names(self, name: str) -> Dict[Bird, float]:
-    subquery = self.session.query(BirdCommonName.id, func.similarity(BirdCommonName.name, name).label('similarity')) \
-      .filter(BirdCommonName.name.ilike(fr'%{name}%')) \
-      .subquery()
-    result = self.session.query(BirdCommonName, subquery.c.similarity) \
-      .outerjoin(subquery, BirdCommonName.id==subquery.c.id) \
-      .options(joinedload(BirdCommonName.bird)) \
-      .filter(subquery.c.similarity > 0.01) \
-      .all()
-    matches = dict()
-    for common_name, similarity in result:
-      bird = common_name.bird
-      matches[bird] = max(matches.get(bird, 0), similarity)
-    return matches
-
-  def search_by_sightings(self, position_query: str) -> Dict[Bird, float]:
-    matches = dict()
-    match = re.match('position:([0-9.]+),([0-9.]+);r=([0-9.]+)', position_query)
-    if match:
-      lat = match.group(1)
-      lon = match.group(2)
-      radius = float(match.group(3))
-      result = self.session.query(Bird, func.count(Sighting.bird)) \
-        .join(Sighting.bird) \
-        .join(Sighting.position) \
-        .filter(func.ST_DistanceSphere(func.ST_GeomFromText(func.ST_AsText(Position.point), 4326), func.ST_GeomFromText(f'POINT({lon} {lat})', 4326)) < 1000 * radius) \
-        .group_by(Bird) \
-        .all()
-      total = sum([count for _, count in result])
-      for bird, count in result:
-        score = count / total
-        matches[bird] = score
-    return matches
 
 def create_position(lat, lon):
   element = WKTElement(f'POINT({lon} {lat})')
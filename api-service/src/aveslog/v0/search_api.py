@@ -1,16 +1,31 @@
 import os
+from datetime import date
 from http import HTTPStatus
-from operator import attrgetter
+from typing import Dict, List, Optional
 
 from flask import Response, request, current_app, make_response, jsonify, g
+from sqlalchemy import func
 
 from aveslog.v0.birds_rest_api import bird_summary_representation
 from aveslog.v0.link import LinkFactory
+from aveslog.v0.error import ErrorCode
+from aveslog.v0.models import Bird
+from aveslog.v0.models import BirdThumbnail
 from aveslog.v0.models import Picture
 from aveslog.v0.models import Sighting
+from aveslog.v0.rest_api import authentication_token_missing_response
+from aveslog.v0.rest_api import cache
+from aveslog.v0.rest_api import error_response
 from aveslog.v0.rest_api import optional_authentication
 from aveslog.v0.search import BirdSearchMatch
 from aveslog.v0.search import BirdSearcher
+from aveslog.v0.search import MatchPosition
+from aveslog.v0.search_cache import SearchResultCache
+from aveslog.v0.search_query import SearchQuery
+from aveslog.v0.search_query import SearchQueryError
+from aveslog.v0.search_query import decode_cursor
+from aveslog.v0.search_query import encode_cursor
+from aveslog.v0.search_query import parse_search_query
 
 
 def _external_picture_url(picture: Picture) -> str:
@@ -22,44 +37,136 @@ def _external_picture_url(picture: Picture) -> str:
   return link_factory.create_url_external_link(static_picture_url)
 
 
-def _result_item(match: BirdSearchMatch, embed: list) -> dict:
+def _result_item(match: BirdSearchMatch, embed: list,
+      thumbnail_pictures: Dict[int, Picture],
+      last_sighting_dates: Dict[int, date]) -> dict:
   bird = match.bird
   item = bird_summary_representation(bird)
   item['score'] = match.score
-  if 'thumbnail' in embed and bird.thumbnail:
+  picture = thumbnail_pictures.get(bird.id)
+  if 'thumbnail' in embed and picture:
     item['thumbnail'] = {
-      'url': _external_picture_url(bird.thumbnail.picture),
-      'credit': bird.thumbnail.picture.credit
+      'url': _external_picture_url(picture),
+      'credit': picture.credit
     }
-  if 'stats' in embed and hasattr(g, 'authenticated_account'):
+  if 'stats' in embed and hasattr(g, 'authenticated_principal'):
     stats = {}
-    sightings = g.database_session.query(Sighting) \
-      .filter_by(birder_id=g.authenticated_account.birder.id) \
-      .filter_by(bird_id=match.bird.id) \
-      .order_by(Sighting.sighting_date.desc(), Sighting.sighting_time.desc()) \
-      .all()
-    if sightings:
-      stats['lastSighting'] = sightings[0].sighting_date.isoformat()
+    if bird.id in last_sighting_dates:
+      stats['lastSighting'] = last_sighting_dates[bird.id].isoformat()
     item['stats'] = stats
   return item
 
 
+def load_thumbnail_pictures(bird_ids: List[int]) -> Dict[int, Picture]:
+  if not bird_ids:
+    return {}
+  return dict(g.database_session.query(BirdThumbnail.bird_id, Picture)
+    .join(BirdThumbnail.picture)
+    .filter(BirdThumbnail.bird_id.in_(bird_ids))
+    .all())
+
+
+def load_last_sighting_dates(birder_id: Optional[int],
+      bird_ids: List[int]) -> Dict[int, date]:
+  if birder_id is None or not bird_ids:
+    return {}
+  return dict(g.database_session.query(
+    Sighting.bird_id, func.max(Sighting.sighting_date))
+    .filter(Sighting.birder_id == birder_id)
+    .filter(Sighting.bird_id.in_(bird_ids))
+    .group_by(Sighting.bird_id)
+    .all())
+
+
 @optional_authentication
 def search_birds() -> Response:
-  query = request.args.get('q')
+  try:
+    query = parse_search_query(request.args.get('q', ''))
+    after = None
+    if 'cursor' in request.args:
+      after = decode_cursor(request.args['cursor'])
+  except SearchQueryError as e:
+    return search_query_invalid_response(str(e))
+  birder_id = None
+  if query.seen_by_me:
+    if not hasattr(g, 'authenticated_principal'):
+      return authentication_token_missing_response()
+    birder_id = g.authenticated_principal.birder_id
   page_size = parse_page_size(request.args)
   embed = parse_embed_list(request.args)
-  bird_searcher = BirdSearcher(g.database_session)
-  matches = bird_searcher.search(query)
-  matches = sorted(matches, key=attrgetter('score'), reverse=True)[:page_size]
+  matches = search_matches(query, page_size + 1, birder_id, after)
+  next_match = matches[page_size] if len(matches) > page_size else None
+  matches = matches[:page_size]
+  bird_ids = [match.bird.id for match in matches]
+  thumbnail_pictures = {}
+  if 'thumbnail' in embed:
+    thumbnail_pictures = load_thumbnail_pictures(bird_ids)
+  last_sighting_dates = {}
+  if 'stats' in embed and hasattr(g, 'authenticated_principal'):
+    last_sighting_dates = load_last_sighting_dates(
+      g.authenticated_principal.birder_id, bird_ids)
+  data = {
+    'items': [
+      _result_item(m, embed, thumbnail_pictures, last_sighting_dates)
+      for m in matches
+    ],
+  }
+  if next_match:
+    data['cursor'] = encode_cursor(matches[-1].score, matches[-1].bird.id)
+  return make_response(jsonify(data), HTTPStatus.OK)
+
+
+def search_matches(query: SearchQuery, count: int, birder_id: Optional[int],
+      after: Optional[MatchPosition]) -> List[BirdSearchMatch]:
+  """The best matches of the query after the position, scored by the app's
+  search result cache when the query is cached. Queries of what the
+  authenticated birder has seen are never cached."""
+  cache: SearchResultCache = current_app.search_result_cache
+  cache_key = f'{query.normalized()} count={count} after={after}'
+  scored_bird_ids = None if query.seen_by_me else cache.get(cache_key)
+  if scored_bird_ids is None:
+    bird_searcher = BirdSearcher(
+      g.database_session, current_app.bird_name_index)
+    matches = bird_searcher.search(query, count, birder_id, after)
+    if not query.seen_by_me:
+      cache.put(cache_key, [(match.bird.id, match.score) for match in matches],
+        by_name=bool(query.name), by_sightings=query.filters_sightings)
+    return matches
+  if not scored_bird_ids:
+    return []
+  birds = g.database_session.query(Bird) \
+    .filter(Bird.id.in_([bird_id for bird_id, _ in scored_bird_ids])) \
+    .all()
+  birds_by_id = {bird.id: bird for bird in birds}
+  return [BirdSearchMatch(birds_by_id[bird_id], score)
+          for bird_id, score in scored_bird_ids if bird_id in birds_by_id]
+
+
+def search_query_invalid_response(message: str) -> Response:
+  return error_response(ErrorCode.INVALID_SEARCH_QUERY, message)
+
+
+@cache(max_age=300)
+def suggest_birds() -> Response:
+  prefix = request.args.get('q', '')
+  locale_code = request.args.get('locale')
+  limit = max(1, min(request.args.get('limit', 10, type=int), 20))
+  suggestions = current_app.bird_name_index.suggest(
+    g.database_session, prefix, locale_code, limit)
   return make_response(jsonify({
-    'items': [_result_item(m, embed) for m in matches],
+    'items': [{
+      'id': binomial_name.lower().replace(' ', '-'),
+      'binomialName': binomial_name,
+      'name': name,
+    } for binomial_name, name in suggestions],
   }), HTTPStatus.OK)
 
 
 def parse_page_size(args):
   request_page_size = args.get('page_size', type=int)
-  return request_page_size if request_page_size else 30
+  if request_page_size is None or request_page_size <= 0:
+    return 30
+  return min(request_page_size, 100)
 
 
 def parse_embed_list(args):
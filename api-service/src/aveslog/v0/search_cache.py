@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+ScoredBirdIds = List[Tuple[int, float]]
+
+
+class SearchResultCacheEntry:
+
+  def __init__(self, results: ScoredBirdIds, by_name: bool,
+        by_sightings: bool, expiration_time: float, sighting_changes: int):
+    self.results = results
+    self.by_name = by_name
+    self.by_sightings = by_sightings
+    self.expiration_time = expiration_time
+    self.sighting_changes = sighting_changes
+
+
+class SearchResultCache:
+  """Bounded cache of the scored bird ids of normalized search queries
+
+  An entry expires after the time to live. Entries of queries by name are
+  removed when bird names change, and entries of queries filtering sightings
+  expire once the sighting change threshold of sightings have been added or
+  deleted since they were cached. When full, the least recently used entry
+  is evicted.
+  """
+
+  def __init__(self,
+        max_size: int = 1000,
+        time_to_live: float = 300,
+        sighting_change_threshold: int = 100,
+        time_supplier: Callable[[], float] = time.monotonic,
+  ):
+    self.max_size = max_size
+    self.time_to_live = time_to_live
+    self.sighting_change_threshold = sighting_change_threshold
+    self._time_supplier = time_supplier
+    self._entries: Dict[str, SearchResultCacheEntry] = OrderedDict()
+    self._sighting_changes = 0
+    self._lock = threading.Lock()
+
+  def get(self, query: str) -> Optional[ScoredBirdIds]:
+    with self._lock:
+      entry = self._entries.get(query)
+      if not entry:
+        return None
+      if entry.expiration_time <= self._time_supplier() or (
+            entry.by_sightings and
+            self._sighting_changes - entry.sighting_changes >=
+            self.sighting_change_threshold):
+        del self._entries[query]
+        return None
+      self._entries.move_to_end(query)
+      return entry.results
+
+  def put(self, query: str, results: ScoredBirdIds, by_name: bool,
+        by_sightings: bool) -> None:
+    if self.max_size <= 0:
+      return
+    expiration_time = self._time_supplier() + self.time_to_live
+    with self._lock:
+      self._entries.pop(query, None)
+      self._entries[query] = SearchResultCacheEntry(results, by_name,
+        by_sightings, expiration_time, self._sighting_changes)
+      while len(self._entries) > self.max_size:
+        self._entries.popitem(last=False)
+
+  def invalidate_name_queries(self) -> None:
+    with self._lock:
+      for query in [query for query, entry in self._entries.items()
+                    if entry.by_name]:
+        del self._entries[query]
+
+  def record_sighting_change(self) -> None:
+    with self._lock:
+      self._sighting_changes += 1
+
+  def clear(self) -> None:
+    with self._lock:
+      self._entries.clear()
+
+  def __len__(self) -> int:
+    return len(self._entries)
@@ -0,0 +1,303 @@
+import logging
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Pattern
+from typing import Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from aveslog.v0.models import Bird
+from aveslog.v0.models import BirdCommonName
+from aveslog.v0.models import Locale
+
+logger = logging.getLogger(__name__)
+
+word_pattern = re.compile(r'[^\W_]+')
+
+
+def trigrams(text: str) -> Set[str]:
+  """The trigrams of the text as extracted by pg_trgm: those of each lower
+  cased alphanumeric word, padded with two spaces in front and one after"""
+  result = set()
+  for word in word_pattern.findall(text.lower()):
+    padded_word = f'  {word} '
+    for index in range(len(padded_word) - 2):
+      result.add(padded_word[index:index + 3])
+  return result
+
+
+def like_pattern(text: str) -> Pattern:
+  """Regex matching like the ILIKE '%text%' pattern of Postgres, where % and
+  _ in the text are wildcards unless escaped with a backslash"""
+  parts = []
+  characters = iter(text)
+  for character in characters:
+    if character == '\\':
+      parts.append(re.escape(next(characters, '\\')))
+    elif character == '%':
+      parts.append('.*')
+    elif character == '_':
+      parts.append('.')
+    else:
+      parts.append(re.escape(character))
+  return re.compile(f'.*{"".join(parts)}.*', re.IGNORECASE | re.DOTALL)
+
+
+class TrigramIndex:
+  """Inverted index from trigrams to the texts containing them, scoring
+  texts by the similarity function of pg_trgm"""
+
+  def __init__(self):
+    self.keys: List[int] = []
+    self.texts: List[str] = []
+    self.trigram_counts: List[int] = []
+    self.postings: Dict[str, List[int]] = {}
+
+  def add(self, key: int, text: str) -> None:
+    entry = len(self.keys)
+    text_trigrams = trigrams(text)
+    self.keys.append(key)
+    self.texts.append(text)
+    self.trigram_counts.append(len(text_trigrams))
+    for trigram in text_trigrams:
+      self.postings.setdefault(trigram, []).append(entry)
+
+  def search(self, text: str) -> Iterator[Tuple[int, float]]:
+    """The entries sharing trigrams with the text, and their similarity"""
+    query_trigrams = trigrams(text)
+    shared_counts = Counter()
+    for trigram in query_trigrams:
+      shared_counts.update(self.postings.get(trigram, ()))
+    for entry, shared_count in shared_counts.items():
+      union_count = len(query_trigrams) + self.trigram_counts[entry]
+      yield entry, shared_count / (union_count - shared_count)
+
+  def memory_usage(self) -> int:
+    """Approximate number of bytes used by the index"""
+    size = sum(map(sys.getsizeof,
+      [self.keys, self.texts, self.trigram_counts, self.postings]))
+    size += sum(map(sys.getsizeof, self.texts))
+    for trigram, entries in self.postings.items():
+      size += sys.getsizeof(trigram) + sys.getsizeof(entries)
+    return size
+
+  def __len__(self) -> int:
+    return len(self.keys)
+
+
+Completion = Tuple[int, str]
+
+
+class PrefixIndex:
+  """Sorted index of names, and of the names from each of their words on,
+  completing prefixes to the shortest names first and to one name per bird
+
+  The completions of prefixes up to the precomputed length, which would
+  otherwise need to rank many names, are computed up front.
+  """
+
+  def __init__(self, max_limit: int = 20, precomputed_length: int = 2):
+    self.max_limit = max_limit
+    self.precomputed_length = precomputed_length
+    # The sorted keys and the completions of each key, replaced together so
+    # that concurrent completions never see them out of step
+    self.entries: Tuple[List[str], List[Completion]] = ([], [])
+    self.precomputed: Dict[str, List[Completion]] = {}
+
+  def build(self, completions: Iterable[Completion]) -> None:
+    entries = sorted((key, completion)
+                     for completion in completions
+                     for key in prefix_keys(completion[1]))
+    keys = [key for key, _ in entries]
+    self.entries = (keys, [completion for _, completion in entries])
+    self.precomputed = {}
+    for prefix in {key[:length] for key in keys
+                   for length in range(1, self.precomputed_length + 1)}:
+      self.precomputed[prefix] = self._rank(prefix)
+
+  def add(self, completion: Completion) -> None:
+    for key in prefix_keys(completion[1]):
+      keys, completions = self.entries
+      index = bisect_right(keys, key)
+      self.entries = (keys[:index] + [key] + keys[index:],
+                      completions[:index] + [completion] + completions[index:])
+      for length in range(1, min(len(key), self.precomputed_length) + 1):
+        self.precomputed[key[:length]] = self._rank(key[:length])
+
+  def complete(self, prefix: str, limit: int) -> List[Completion]:
+    prefix = normalize_prefix(prefix)
+    if not prefix:
+      return []
+    if len(prefix) <= self.precomputed_length:
+      return self.precomputed.get(prefix, [])[:limit]
+    return self._rank(prefix)[:limit]
+
+  def memory_usage(self) -> int:
+    """Approximate number of bytes used by the index"""
+    keys, completions = self.entries
+    size = sum(map(sys.getsizeof, [keys, completions, self.precomputed]))
+    size += sum(map(sys.getsizeof, keys))
+    size += sum(map(sys.getsizeof, self.precomputed.values()))
+    return size
+
+  def _rank(self, prefix: str) -> List[Completion]:
+    keys, completions = self.entries
+    start = bisect_left(keys, prefix)
+    end = bisect_left(keys, prefix + '\U0010ffff', start)
+    candidates = sorted(set(completions[start:end]), key=completion_rank)
+    return distinct_birds(candidates, self.max_limit)
+
+
+def normalize_prefix(text: str) -> str:
+  return ' '.join(text.casefold().split())
+
+
+def prefix_keys(name: str) -> List[str]:
+  words = normalize_prefix(name).split()
+  return [' '.join(words[index:]) for index in range(len(words))]
+
+
+def completion_rank(completion: Completion) -> Tuple[int, str]:
+  _, name = completion
+  return len(name), name.casefold()
+
+
+def distinct_birds(completions: Iterable[Completion],
+      limit: int) -> List[Completion]:
+  result = []
+  bird_ids = set()
+  for completion in completions:
+    if completion[0] not in bird_ids:
+      bird_ids.add(completion[0])
+      result.append(completion)
+      if len(result) == limit:
+        break
+  return result
+
+
+class BirdNames:
+  """The names of the birds, indexed for searching and for completion"""
+
+  def __init__(self):
+    self.binomial_names: Dict[int, str] = {}
+    self.binomial_name_trigrams = TrigramIndex()
+    self.common_name_trigrams = TrigramIndex()
+    self.binomial_name_prefixes = PrefixIndex()
+    self.common_name_prefixes: Dict[str, PrefixIndex] = {}
+
+  def memory_usage(self) -> int:
+    indexes = [self.binomial_name_trigrams, self.common_name_trigrams,
+               self.binomial_name_prefixes]
+    indexes += self.common_name_prefixes.values()
+    return sys.getsizeof(self.binomial_names) + \
+           sum(index.memory_usage() for index in indexes)
+
+
+class BirdNameIndex:
+  """In-memory index of the binomial names and the common names, in all
+  locales, of the birds
+
+  Scores names like the similarity searches of BirdSearcher, without
+  scanning the bird and bird_common_name tables per search, and completes
+  name prefixes. The index is loaded on first use, and loaded again when
+  older than the time to live or after being invalidated. Common names added
+  in this process are indexed right away.
+  """
+
+  def __init__(self,
+        time_to_live: float = 600,
+        time_supplier: Callable[[], float] = time.monotonic,
+  ):
+    self.time_to_live = time_to_live
+    self._time_supplier = time_supplier
+    self._names: Optional[BirdNames] = None
+    self._load_time = 0.0
+    self._lock = threading.Lock()
+
+  def name_scores(self, session: Session, name: str) -> Dict[int, float]:
+    """Scores of the birds by id, matching the name by binomial name with a
+    similarity above 0.2, or by a common name containing the name"""
+    names = self._current_names(session)
+    scores = {}
+    binomial_name_trigrams = names.binomial_name_trigrams
+    for entry, similarity in binomial_name_trigrams.search(name):
+      if similarity > 0.2:
+        bird_id = binomial_name_trigrams.keys[entry]
+        scores[bird_id] = max(scores.get(bird_id, 0), similarity)
+    pattern = like_pattern(name)
+    common_name_trigrams = names.common_name_trigrams
+    for entry, similarity in common_name_trigrams.search(name):
+      if similarity > 0.01 and \
+            pattern.fullmatch(common_name_trigrams.texts[entry]):
+        bird_id = common_name_trigrams.keys[entry]
+        scores[bird_id] = max(scores.get(bird_id, 0), similarity)
+    return scores
+
+  def suggest(self,
+        session: Session,
+        prefix: str,
+        locale_code: Optional[str],
+        limit: int,
+  ) -> List[Tuple[str, str]]:
+    """Binomial names and completed names of the birds with a binomial name,
+    or a common name in the locale, starting with the prefix"""
+    names = self._current_names(session)
+    completions = names.binomial_name_prefixes.complete(prefix, limit)
+    common_name_prefixes = names.common_name_prefixes.get(locale_code)
+    if common_name_prefixes:
+      completions += common_name_prefixes.complete(prefix, limit)
+    completions = distinct_birds(
+      sorted(completions, key=completion_rank), limit)
+    return [(names.binomial_names[bird_id], name)
+            for bird_id, name in completions]
+
+  def add_common_name(self, bird_id: int, locale_code: str, name: str) -> None:
+    with self._lock:
+      if self._names is not None:
+        self._names.common_name_trigrams.add(bird_id, name)
+        self._names.common_name_prefixes.setdefault(
+          locale_code, PrefixIndex()).add((bird_id, name))
+
+  def invalidate(self) -> None:
+    with self._lock:
+      self._names = None
+
+  def memory_usage(self) -> int:
+    with self._lock:
+      return self._names.memory_usage() if self._names else 0
+
+  def _current_names(self, session: Session) -> BirdNames:
+    with self._lock:
+      now = self._time_supplier()
+      if self._names is None or now - self._load_time >= self.time_to_live:
+        self._names = load_bird_names(session)
+        self._load_time = now
+        logger.info('Loaded %d binomial names and %d common names into the '
+                    'bird name index, using about %d bytes',
+          len(self._names.binomial_name_trigrams),
+          len(self._names.common_name_trigrams),
+          self._names.memory_usage())
+      return self._names
+
+
+def load_bird_names(session: Session) -> BirdNames:
+  names = BirdNames()
+  for bird_id, binomial_name in session.query(Bird.id, Bird.binomial_name):
+    names.binomial_names[bird_id] = binomial_name
+    names.binomial_name_trigrams.add(bird_id, binomial_name)
+  names.binomial_name_prefixes.build(names.binomial_names.items())
+  common_names_by_locale_code: Dict[str, List[Completion]] = {}
+  for bird_id, name, locale_code in session.query(
+        BirdCommonName.bird_id, BirdCommonName.name, Locale.code) \
+        .join(BirdCommonName.locale):
+    names.common_name_trigrams.add(bird_id, name)
+    common_names_by_locale_code.setdefault(locale_code, []).append(
+      (bird_id, name))
+  for locale_code, common_names in common_names_by_locale_code.items():
+    names.common_name_prefixes[locale_code] = PrefixIndex()
+    names.common_name_prefixes[locale_code].build(common_names)
+  return names
@@ -0,0 +1,176 @@
+import base64
+import binascii
+import json
+import re
+import shlex
+from datetime import date
+from typing import Optional, Tuple
+
+from aveslog.v0.time import parse_date
+
+position_qualifier_pattern = re.compile(
+  r'(-?[0-9]*\.?[0-9]+),(-?[0-9]*\.?[0-9]+);r=([0-9]*\.?[0-9]+)')
+date_qualifier_pattern = re.compile(
+  r'([0-9]{4}-[0-9]{2}-[0-9]{2})?(\.\.)?([0-9]{4}-[0-9]{2}-[0-9]{2})?')
+# Kilometers
+max_sighting_search_radius = 100.0
+
+
+class SearchQueryError(ValueError):
+  pass
+
+
+class SearchQuery:
+  """A parsed bird search query
+
+  The query is a name, searched for among the binomial and common names of
+  the birds, and qualifiers narrowing the search down:
+
+    position:47.24,2.27;r=1    sighted within a radius in kilometers
+    date:2020-01-01..2020-12-31  sighted within a date range, either end open
+    birder:3                   sighted by a birder
+    locale:sv                  named so in a locale, by common name
+    seen:me                    sighted by the authenticated birder
+
+  Birds are scored by name similarity, by their share of the sightings the
+  qualifiers select, or by the product of both.
+  """
+
+  def __init__(self,
+        name: str = '',
+        position: Optional[Tuple[float, float, float]] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        birder_id: Optional[int] = None,
+        locale_code: Optional[str] = None,
+        seen_by_me: bool = False,
+  ):
+    self.name = name
+    self.position = position
+    self.start_date = start_date
+    self.end_date = end_date
+    self.birder_id = birder_id
+    self.locale_code = locale_code
+    self.seen_by_me = seen_by_me
+
+  @property
+  def filters_sightings(self) -> bool:
+    return bool(self.position or self.start_date or self.end_date or
+                self.birder_id is not None or self.seen_by_me)
+
+  def normalized(self) -> str:
+    """The query as text, the same for queries searching the same birds"""
+    parts = [shlex.quote(self.name)] if self.name else []
+    if self.position:
+      lat, lon, radius = self.position
+      parts.append(f'position:{lat:.3f},{lon:.3f};r={radius:g}')
+    if self.start_date or self.end_date:
+      start_date = self.start_date.isoformat() if self.start_date else ''
+      end_date = self.end_date.isoformat() if self.end_date else ''
+      parts.append(f'date:{start_date}..{end_date}')
+    if self.birder_id is not None:
+      parts.append(f'birder:{self.birder_id}')
+    if self.locale_code:
+      parts.append(f'locale:{self.locale_code}')
+    if self.seen_by_me:
+      parts.append('seen:me')
+    return ' '.join(parts)
+
+  def __eq__(self, other):
+    if isinstance(other, SearchQuery):
+      return self.normalized() == other.normalized()
+    return False
+
+  def __repr__(self):
+    return f"<SearchQuery('{self.normalized()}')>"
+
+
+def parse_search_query(text: str) -> SearchQuery:
+  """Parses the query text, lower casing the name and collapsing its
+  whitespace, and rounding the position to about a hundred meters. The last
+  of repeated qualifiers applies."""
+  try:
+    parts = shlex.split(text)
+  except ValueError as e:
+    raise SearchQueryError(str(e))
+  query = SearchQuery()
+  names = []
+  for part in parts:
+    key, separator, value = part.partition(':')
+    parse_qualifier = qualifier_parsers.get(key) if separator else None
+    if parse_qualifier:
+      parse_qualifier(query, value)
+    else:
+      names.append(part)
+  query.name = ' '.join(' '.join(names).lower().split())
+  return query
+
+
+def parse_position(query: SearchQuery, value: str) -> None:
+  match = position_qualifier_pattern.fullmatch(value)
+  if not match:
+    raise SearchQueryError(f'Invalid position: {value}')
+  lat, lon, radius = map(float, match.groups())
+  if not (-90 <= lat <= 90 and -180 <= lon <= 180) or radius <= 0:
+    raise SearchQueryError(f'Position out of range: {value}')
+  radius = min(radius, max_sighting_search_radius)
+  query.position = (round(lat, 3), round(lon, 3), radius)
+
+
+def parse_date_range(query: SearchQuery, value: str) -> None:
+  match = date_qualifier_pattern.fullmatch(value)
+  if not match:
+    raise SearchQueryError(f'Invalid date range: {value}')
+  start_text, range_separator, end_text = match.groups()
+  if not (start_text or end_text) or \
+        (start_text and end_text and not range_separator):
+    raise SearchQueryError(f'Invalid date range: {value}')
+  try:
+    start_date = parse_date(start_text) if start_text else None
+    end_date = parse_date(end_text) if end_text else None
+  except ValueError:
+    raise SearchQueryError(f'Invalid date: {value}')
+  query.start_date = start_date
+  query.end_date = end_date if range_separator else start_date
+
+
+def parse_birder(query: SearchQuery, value: str) -> None:
+  if not value.isdigit():
+    raise SearchQueryError(f'Invalid birder: {value}')
+  query.birder_id = int(value)
+
+
+def parse_locale(query: SearchQuery, value: str) -> None:
+  query.locale_code = value.lower()
+
+
+def parse_seen(query: SearchQuery, value: str) -> None:
+  if value != 'me':
+    raise SearchQueryError(f'Invalid seen: {value}')
+  query.seen_by_me = True
+
+
+def encode_cursor(score: float, bird_id: int) -> str:
+  """Opaque cursor of the position of a search match, that the next page of
+  matches starts after"""
+  position = json.dumps([score, bird_id]).encode()
+  return base64.urlsafe_b64encode(position).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+  try:
+    score, bird_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+  except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+    raise SearchQueryError('Invalid cursor')
+  if not isinstance(score, (int, float)) or not isinstance(bird_id, int):
+    raise SearchQueryError('Invalid cursor')
+  return float(score), bird_id
+
+
+qualifier_parsers = {
+  'position': parse_position,
+  'date': parse_date_range,
+  'birder': parse_birder,
+  'locale': parse_locale,
+  'seen': parse_seen,
+}
@@ -1,24 +1,74 @@
+import base64
+import binascii
+import json
+from datetime import date, time
 from typing import Optional, List, Tuple
 
 from flask import g
+from sqlalchemy import func
+from sqlalchemy import literal_column
+from sqlalchemy import tuple_
 from sqlalchemy.orm import joinedload
 from aveslog.v0.models import Sighting
+from aveslog.v0.time import parse_date
+from aveslog.v0.time import parse_time
+
+# The date, time and id of a sighting in the order of sighting lists
+SightingPosition = Tuple[date, time, int]
+
+# Sightings without time are listed last of their date. The constant is
+# inlined, as the sighting order index is on this very expression.
+sighting_time_key = func.coalesce(
+  Sighting.sighting_time, literal_column("'00:00:00'::time"))
 
 
 class SightingRepository:
 
   def sightings(self,
         birder_id: Optional[int] = None,
-        limit: Optional[int] = None
+        limit: int = 30,
+        after: Optional[SightingPosition] = None,
   ) -> Tuple[List[Sighting], bool]:
+    """The sightings at most the limit, newest first, and whether there are
+    more after them"""
     query = g.database_session.query(Sighting) \
       .options(joinedload('bird')) \
       .options(joinedload('position'))
     if birder_id:
       query = query.filter_by(birder_id=birder_id)
-    count = query.count()
+    if after:
+      query = query.filter(
+        tuple_(Sighting.sighting_date, sighting_time_key, Sighting.id) <
+        tuple_(*after))
     query = query.order_by(
-      Sighting.sighting_date.desc(), Sighting.sighting_time.desc())
-    if limit:
-      query = query.limit(limit)
-    return query.all(), count
+      Sighting.sighting_date.desc(), sighting_time_key.desc(),
+      Sighting.id.desc())
+    sightings = query.limit(limit + 1).all()
+    return sightings[:limit], len(sightings) > limit
+
+
+def sighting_position(sighting: Sighting) -> SightingPosition:
+  return (sighting.sighting_date, sighting.sighting_time or time(0),
+          sighting.id)
+
+
+def encode_sighting_cursor(position: SightingPosition) -> str:
+  """Opaque cursor of the position of a sighting, that the next page of
+  sightings starts after"""
+  sighting_date, sighting_time, sighting_id = position
+  data = json.dumps(
+    [sighting_date.isoformat(), sighting_time.isoformat(), sighting_id])
+  return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_sighting_cursor(cursor: str) -> SightingPosition:
+  try:
+    date_text, time_text, sighting_id = json.loads(
+      base64.urlsafe_b64decode(cursor.encode()))
+    sighting_date = parse_date(date_text)
+    sighting_time = parse_time(time_text)
+  except (binascii.Error, ValueError, TypeError):
+    raise ValueError('Invalid cursor')
+  if sighting_time is None or not isinstance(sighting_id, int):
+    raise ValueError('Invalid cursor')
+  return sighting_date, sighting_time, sighting_id
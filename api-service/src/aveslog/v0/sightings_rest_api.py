@@ -1,45 +1,61 @@
 from datetime import datetime
 from http import HTTPStatus
-from typing import List
+from typing import List, Optional
 
 from flask import request, Response, make_response, jsonify, g, current_app
 from geoalchemy2 import WKTElement
 
-from aveslog.v0.geocoding import create_geocoding
-from aveslog.v0.models import Sighting, PositionName, Locale
+from aveslog.v0.models import Sighting
 from aveslog.v0.models import Position
 from aveslog.v0.models import Bird
+from aveslog.v0.position_naming import queue_position_naming
 from aveslog.v0.rest_api import require_authentication
+from aveslog.v0.rest_api import require_primary_database
 from aveslog.v0.sighting import SightingRepository
+from aveslog.v0.sighting import decode_sighting_cursor
+from aveslog.v0.sighting import encode_sighting_cursor
+from aveslog.v0.sighting import sighting_position
 from aveslog.v0.time import parse_date
 from aveslog.v0.time import parse_time
 from shapely import wkb
 
+default_sightings_limit = 30
+max_sightings_limit = 100
+
 
 @require_authentication
 def get_birder_sightings(birder_id: int):
-  sighting_repository = SightingRepository()
-  (sightings, total_rows) = sighting_repository.sightings(
-    birder_id=birder_id)
-  return sightings_response(sightings, False)
+  return get_sightings_page(birder_id)
 
 
 @require_authentication
 def get_sightings():
+  return get_sightings_page()
+
+
+def get_sightings_page(birder_id: Optional[int] = None) -> Response:
   limit = request.args.get('limit', type=int)
   if limit is not None and limit <= 0:
     return sightings_failure_response('limit-invalid')
+  after = None
+  if 'cursor' in request.args:
+    try:
+      after = decode_sighting_cursor(request.args['cursor'])
+    except ValueError:
+      return sightings_failure_response('cursor-invalid')
+  limit = min(limit or default_sightings_limit, max_sightings_limit)
   sighting_repository = SightingRepository()
-  (sightings, total_rows) = sighting_repository.sightings(limit=limit)
-  has_more = total_rows > limit if limit is not None else False
+  (sightings, has_more) = sighting_repository.sightings(
+    birder_id=birder_id, limit=limit, after=after)
   return sightings_response(sightings, has_more)
 
 
+@require_primary_database
 @require_authentication
 def get_sighting(sighting_id: int) -> Response:
-  account = g.authenticated_account
+  principal = g.authenticated_principal
   sighting = g.database_session.query(Sighting).get(sighting_id)
-  if sighting and sighting.birder_id == account.birder_id:
+  if sighting and sighting.birder_id == principal.birder_id:
     return make_response(jsonify(sighting_representation(sighting)),
       HTTPStatus.OK)
   else:
@@ -48,14 +64,15 @@ def get_sighting(sighting_id: int) -> Response:
 
 @require_authentication
 def delete_sighting(sighting_id: int) -> Response:
-  account = g.authenticated_account
+  principal = g.authenticated_principal
   sighting = g.database_session.query(Sighting).get(sighting_id)
   if not sighting:
     return sighting_deleted_response()
-  if sighting.birder_id != account.birder_id:
+  if sighting.birder_id != principal.birder_id:
     return sighting_delete_unauthorized_response()
   g.database_session.delete(sighting)
   g.database_session.commit()
+  current_app.search_result_cache.record_sighting_change()
   return sighting_deleted_response()
 
 
@@ -66,9 +83,9 @@ def create_position(lat, lon):
 
 @require_authentication
 def post_sighting() -> Response:
-  account = g.authenticated_account
+  principal = g.authenticated_principal
   birder_id = request.json['birder']['id']
-  if account.birder_id != birder_id:
+  if principal.birder_id != birder_id:
     return post_sighting_unauthorized_response()
   binomial_name = request.json['bird']['binomialName']
   bird = g.database_session.query(Bird).filter(
@@ -79,41 +96,22 @@ def post_sighting() -> Response:
   if 'position' in request.json:
     request_position = request.json['position']
     position = create_position(request_position['lat'], request_position['lon'])
-    coordinates = (request_position['lat'], request_position['lon'])
-    position_name = create_position_name(coordinates, g.database_session)
-    if position_name:
-      position.names.append(position_name)
+    queue_position_naming(g.database_session, position, datetime.now())
     sighting.position = position
   g.database_session.add(sighting)
   g.database_session.commit()
+  current_app.search_result_cache.record_sighting_change()
   return post_sighting_success_response(sighting.id)
 
 
-def create_position_name(coordinates, db_session):
-  geocoding = create_geocoding(current_app.testing)
-  reverse_geocoding_result = geocoding.reverse_search(coordinates)
-  if reverse_geocoding_result:
-    language_code = reverse_geocoding_result.language_code
-    primary_language_subtag = language_code.split('-')[0]
-    locale = db_session.query(Locale) \
-      .filter_by(code=primary_language_subtag) \
-      .first()
-    if locale:
-      position_name = PositionName(
-        locale_id=locale.id,
-        detail_level=reverse_geocoding_result.detail_level,
-        name=reverse_geocoding_result.name,
-        creation_time=datetime.now(),
-      )
-      position_name.locale = locale
-      return position_name
-
-
 def sightings_response(sightings: List[Sighting], has_more: bool) -> Response:
-  return make_response(jsonify({
+  data = {
     'items': list(map(bird_summary_representation, sightings)),
     'hasMore': has_more,
-  }), HTTPStatus.OK)
+  }
+  if has_more:
+    data['cursor'] = encode_sighting_cursor(sighting_position(sightings[-1]))
+  return make_response(jsonify(data), HTTPStatus.OK)
 
 
 def sightings_failure_response(error_message):
@@ -6,6 +6,8 @@ from binascii import hexlify
 from aveslog.v0.models import Account
 from aveslog.v0.models import PasswordResetToken
 from aveslog.v0.account import PasswordHasher
+from aveslog.v0.account import pbkdf2_sha256
+from aveslog.v0.hashing import HashingPool
 from aveslog.v0.account import is_valid_username
 from aveslog.v0.account import is_valid_password
 
@@ -60,6 +62,17 @@ class TestPasswordHasher(TestCase):
     hash = '0394a2ede332c9a13eb82e9b24631604c31df978b4e2f0fbd2c549944f9d79a5'
     self.assertTrue(hasher.hash_password('password', 'salt') == hash)
 
+  def test_hash_password_in_hashing_pool(self):
+    hashing_pool = Mock(spec=HashingPool)
+    hashing_pool.run.return_value = 'hash'
+    hasher = PasswordHasher(Mock(), hashing_pool)
+
+    result = hasher.hash_password('password', 'salt')
+
+    self.assertEqual(result, 'hash')
+    hashing_pool.run.assert_called_with(
+      pbkdf2_sha256, 'password', 'salt', 100000)
+
 
 class TestPasswordResetToken(TestCase):
 
@@ -285,6 +285,13 @@ class TestPasswordUpdate(AppTestCase):
 
     self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
 
+  def test_post_password_update_invalidates_cached_principal(self) -> None:
+    token = self.token_factory.create_access_token(1, timedelta(1))
+
+    self.post_password(token.jwt, 'oldPassword', 'newPassword')
+
+    self.assertIsNone(self._app.principal_cache.get(token.jwt))
+
   def test_post_password_update_when_token_missing(self) -> None:
     response = self.post_password(None, 'oldPassword', 'newPassword')
 
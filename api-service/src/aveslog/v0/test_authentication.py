@@ -12,6 +12,8 @@ from aveslog.v0.authentication import AuthenticationTokenFactory
 from aveslog.v0.authentication import JwtDecoder
 from aveslog.v0.authentication import Authenticator
 from aveslog.v0.authentication import PasswordHasher
+from aveslog.v0.authentication import delete_expired_refresh_tokens
+from aveslog.v0.authentication import digest_token
 from aveslog.v0.account import TokenFactory
 from aveslog.v0.models import Account, RefreshToken, HashedPassword, Base
 from aveslog.v0.account import AccountRepository
@@ -49,6 +51,62 @@ class TestAuthenticator(TestCase):
     result = authenticator.is_account_password_correct(Account(), 'idontexist')
     self.assertFalse(result)
 
+  def test_is_password_correct_with_stored_iterations(self) -> None:
+    hashed_password = self.hashed_password('password', 'salt', 1000)
+    authenticator = Authenticator(self.create_hasher(1000))
+
+    result = authenticator.is_account_password_correct(
+      Account(hashed_password=hashed_password), 'password')
+
+    self.assertTrue(result)
+    self.assertEqual(hashed_password.salt, 'salt')
+
+  def test_is_password_incorrect_when_wrong_password(self) -> None:
+    hashed_password = self.hashed_password('password', 'salt', 1000)
+    authenticator = Authenticator(self.create_hasher(2000))
+
+    result = authenticator.is_account_password_correct(
+      Account(hashed_password=hashed_password), 'wrong-password')
+
+    self.assertFalse(result)
+    self.assertEqual(hashed_password.iterations, 1000)
+
+  def test_is_password_incorrect_when_unknown_algorithm(self) -> None:
+    hashed_password = self.hashed_password('password', 'salt', 1000)
+    hashed_password.algorithm = 'md5'
+    authenticator = Authenticator(self.create_hasher(1000))
+
+    result = authenticator.is_account_password_correct(
+      Account(hashed_password=hashed_password), 'password')
+
+    self.assertFalse(result)
+
+  def test_outdated_password_rehashed_when_correct(self) -> None:
+    hashed_password = self.hashed_password('password', 'salt', 1000)
+    hasher = self.create_hasher(2000)
+    authenticator = Authenticator(hasher)
+
+    result = authenticator.is_account_password_correct(
+      Account(hashed_password=hashed_password), 'password')
+
+    self.assertTrue(result)
+    self.assertEqual(hashed_password.iterations, 2000)
+    self.assertEqual(hashed_password.salt, 'new-salt')
+    self.assertEqual(hashed_password.salted_hash,
+      hasher.hash_password('password', 'new-salt'))
+
+  def create_hasher(self, iterations: int) -> PasswordHasher:
+    salt_factory = Mock()
+    salt_factory.create_salt.return_value = 'new-salt'
+    return PasswordHasher(salt_factory, iterations=iterations)
+
+  def hashed_password(self, password: str, salt: str,
+        iterations: int) -> HashedPassword:
+    salted_hash = PasswordHasher(Mock(), iterations=iterations) \
+      .hash_password(password, salt)
+    return HashedPassword(salt=salt, salted_hash=salted_hash,
+      algorithm='pbkdf2_sha256', iterations=iterations)
+
 
 class TestAccountRegistrationController(TestCase):
 
@@ -125,6 +183,14 @@ class TestAuthenticationTokenFactory(TestCase):
         'TU2NDg2NDI2MCwic3ViIjoxfQ.WSvE-OCzvVPVayHicY1viqLYYA560cCK-9FOZ6NY2o0',
         1, datetime(2019, 8, 3, 21, 1)))
 
+  def test_create_refresh_token_with_digest(self):
+    factory = AuthenticationTokenFactory(JwtFactory('secret'), datetime.utcnow)
+
+    jwt_token, refresh_token = factory.create_refresh_token(1)
+
+    self.assertEqual(refresh_token.token_digest, digest_token(jwt_token))
+    self.assertEqual(len(refresh_token.token_digest), 64)
+
 
 class TestJwtDecoder(TestCase):
 
@@ -171,22 +237,49 @@ class TestPasswordUpdateController(IntegrationTestCase):
     account = Account(username='kennybostick', email='kenny.bostick@mail.com')
     password = HashedPassword(salt='salt1', salted_hash='salted_hash1')
     utcnow = datetime.utcnow()
-    refresh_token = RefreshToken(token='token', expiration_date=utcnow)
+    refresh_token = RefreshToken(token_digest='digest', expiration_date=utcnow)
     account.refresh_tokens.append(refresh_token)
     account.hashed_password = password
     self.db_session.add(account)
     self.db_session.flush()
-    self.password_hasher.create_salt_hashed_password.return_value = (
-      'salt2', 'salted_hash2')
 
     self.controller.update_password(account, 'birder-no-1', self.db_session)
 
-    self.password_hasher.create_salt_hashed_password.assert_called_with(
-      'birder-no-1')
+    self.password_hasher.update_hashed_password.assert_called_with(
+      password, 'birder-no-1')
     self.db_session.refresh(account)
     self.assertFalse(account.refresh_tokens)
-    self.assertEqual(account.hashed_password.salt, 'salt2')
-    self.assertEqual(account.hashed_password.salted_hash, 'salted_hash2')
+
+  def tearDown(self):
+    self.db_session.rollback()
+    self.db_session.close()
+
+
+class TestDeleteExpiredRefreshTokens(IntegrationTestCase):
+
+  def setUp(self) -> None:
+    self.db_session = get_test_database_session()
+    account = Account(username='kennybostick', email='kenny.bostick@mail.com')
+    for index, day in enumerate([1, 2, 3, 5]):
+      account.refresh_tokens.append(RefreshToken(
+        token_digest=f'digest{index}',
+        expiration_date=datetime(2020, 1, day),
+      ))
+    self.db_session.add(account)
+    self.db_session.flush()
+    self.account = account
+
+  def test_deletes_expired_tokens_in_batches(self):
+    time = datetime(2020, 1, 4)
+
+    first_batch = delete_expired_refresh_tokens(self.db_session, time, 2)
+    second_batch = delete_expired_refresh_tokens(self.db_session, time, 2)
+
+    self.assertEqual(first_batch, 2)
+    self.assertEqual(second_batch, 1)
+    self.db_session.refresh(self.account)
+    self.assertEqual([t.token_digest for t in self.account.refresh_tokens],
+      ['digest3'])
 
   def tearDown(self):
     self.db_session.rollback()
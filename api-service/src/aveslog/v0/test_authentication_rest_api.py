@@ -1,11 +1,14 @@
 import datetime
 from http import HTTPStatus
+from unittest.mock import Mock, patch
 from flask import Response, current_app
 from aveslog.v0.authentication import AuthenticationTokenFactory
 from aveslog.v0.authentication import AccessToken
 from aveslog.v0.authentication import JwtFactory
 from aveslog.test_util import AppTestCase
 from aveslog.v0.error import ErrorCode
+from aveslog.v0.hashing import HashingPool
+from aveslog.v0.hashing import HashingPoolSaturated
 from aveslog.v0.link import LinkFactory
 
 
@@ -49,6 +52,19 @@ class TestPostRefreshToken(AppTestCase):
       'message': 'Credentials incorrect',
     })
 
+  def test_post_refresh_token_when_hashing_pool_saturated(self) -> None:
+    saturated_pool = Mock(spec=HashingPool)
+    saturated_pool.run.side_effect = HashingPoolSaturated()
+    with patch.object(self._app, 'hashing_pool', saturated_pool):
+      response = self.post_refresh_token('george', 'costanza')
+
+    self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+    self.assertEqual(response.headers['Retry-After'], '1')
+    self.assertEqual(response.json, {
+      'code': ErrorCode.PASSWORD_HASHING_BUSY,
+      'message': 'Too many password operations in progress, try again shortly',
+    })
+
 
 class TestGetAccessToken(AppTestCase):
 
@@ -88,8 +104,8 @@ class TestGetAccessToken(AppTestCase):
     jwt_factory = JwtFactory(self._app.secret_key)
     time_supplier = lambda: datetime.datetime(2015, 1, 1)
     token_factory = AuthenticationTokenFactory(jwt_factory, time_supplier)
-    refresh_token = token_factory.create_refresh_token(1)
-    headers = {'refreshToken': (refresh_token.token)}
+    jwt_token, _ = token_factory.create_refresh_token(1)
+    headers = {'refreshToken': jwt_token}
 
     response = self.client.get('/authentication/access-token', headers=headers)
 
@@ -153,6 +169,17 @@ class TestCredentialsRecovery(AppTestCase):
     self.assertEqual(response.status_code, HTTPStatus.OK)
     self.assertIsNone(response.json)
 
+  def test_post_credentials_recovery_ignores_email_case(self):
+    self.db_setup_account(1, 1, 'hulot', 'myPassword', 'hulot@mail.com')
+    self.db_insert_locale(1, 'en')
+
+    response = self.post_password_reset_email('Hulot@Mail.com')
+
+    self.assertEqual(response.status_code, HTTPStatus.OK)
+    self.assertEqual(len(self.db_get_password_reset_tokens()), 1)
+    self.assertEqual([mail['recipient'] for mail in self.dispatched_mails],
+      ['hulot@mail.com'])
+
   def test_post_credentials_recovery_when_email_not_linked_with_account(self):
     self.db_insert_locale(1, 'en')
 
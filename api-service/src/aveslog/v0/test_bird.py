@@ -1,5 +1,10 @@
 from unittest import TestCase
 
+from flask import g
+
+from aveslog.test_util import AppTestCase
+from aveslog.test_util import get_test_database_session
+from aveslog.v0.bird import BirdRepository
 from aveslog.v0.models import BirdThumbnail
 from aveslog.v0.models import Bird
 
@@ -37,3 +42,40 @@ class TestBirdThumbnail(TestCase):
 
   def test_eq_false_when_different_type(self):
     self.assertNotEqual(BirdThumbnail(), 'BirdThumbnail(4, 8)')
+
+
+class TestBirdRepository(AppTestCase):
+
+  def setUp(self) -> None:
+    super().setUp()
+    g.database_session = get_test_database_session()
+
+  def test_find_bird_by_binomial_name(self):
+    self.db_insert_bird(1, 'Pica pica')
+    self.db_insert_bird(2, 'Pica serica')
+
+    bird = BirdRepository().find_bird_by_binomial_name('Pica serica')
+
+    self.assertEqual(bird.id, 2)
+
+  def test_find_bird_by_binomial_name_when_missing(self):
+    self.db_insert_bird(1, 'Pica pica')
+
+    self.assertIsNone(BirdRepository().find_bird_by_binomial_name('Pica'))
+
+  def test_find_bird_with_details(self):
+    self.db_insert_locale(1, 'en')
+    self.db_insert_bird(2, 'Pica pica')
+    self.db_insert_bird_common_name(3, 2, 1, 'Eurasian Magpie')
+    self.db_insert_picture(4, 'myPicture.jpg', 'myCredit')
+    self.db_insert_bird_thumbnail(2, 4)
+
+    bird = BirdRepository().find_bird_with_details('Pica pica')
+
+    self.assertEqual([name.name for name in bird.common_names],
+      ['Eurasian Magpie'])
+    self.assertEqual(bird.thumbnail.picture.filepath, 'myPicture.jpg')
+
+  def tearDown(self) -> None:
+    g.pop('database_session').close()
+    super().tearDown()
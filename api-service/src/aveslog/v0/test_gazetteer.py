@@ -0,0 +1,145 @@
+import os
+import random
+import tempfile
+from unittest import TestCase
+
+from aveslog.v0.gazetteer import Gazetteer
+from aveslog.v0.gazetteer import Place
+from aveslog.v0.gazetteer import parse_place
+from aveslog.v0.gazetteer import unit_vector
+
+gazetteer_lines = [
+  '# name\tlatitude\tlongitude\tcountry\tadmin1\tadmin2\tnames',
+  'Stockholm\t59.32938\t18.06871\tSweden\tStockholm\t\tfi=Tukholma',
+  'Gothenburg\t57.70716\t11.96679\tSweden\tVästra Götaland\tGöteborg\t'
+  'sv=Göteborg|de=Göteborg',
+  'Ottenby\t56.22718\t16.41748\tSweden\tKalmar',
+  '',
+  'Reykjavík\t64.13548\t-21.89541\tIceland',
+  'Nowhere\tnorth\twest',
+]
+
+
+def create_gazetteer_file(lines) -> str:
+  file_descriptor, path = tempfile.mkstemp(suffix='.tsv')
+  with os.fdopen(file_descriptor, 'w', encoding='utf-8') as file:
+    file.write('\n'.join(lines))
+  return path
+
+
+class TestParsePlace(TestCase):
+
+  def test_all_columns(self):
+    place = parse_place(gazetteer_lines[2])
+
+    self.assertEqual(place.name, 'Gothenburg')
+    self.assertEqual((place.latitude, place.longitude), (57.70716, 11.96679))
+    self.assertEqual(place.country, 'Sweden')
+    self.assertEqual(place.admin1, 'Västra Götaland')
+    self.assertEqual(place.admin2, 'Göteborg')
+    self.assertEqual(place.localized_names,
+      {'sv': 'Göteborg', 'de': 'Göteborg'})
+
+  def test_columns_left_out(self):
+    place = parse_place('Reykjavík\t64.13548\t-21.89541\n')
+
+    self.assertEqual(place.name, 'Reykjavík')
+    self.assertEqual(place.country, '')
+    self.assertEqual(place.localized_names, {})
+
+  def test_invalid(self):
+    for line in ['Reykjavík\t64.13548', 'Reykjavík\tnorth\twest']:
+      with self.subTest(line=line):
+        with self.assertRaises(ValueError):
+          parse_place(line)
+
+
+class TestPlace(TestCase):
+
+  def test_display_name(self):
+    place = parse_place(gazetteer_lines[2])
+
+    self.assertEqual(place.display_name('en'),
+      'Gothenburg, Göteborg, Västra Götaland, Sweden')
+
+  def test_display_name_localized(self):
+    place = parse_place(gazetteer_lines[2])
+
+    self.assertEqual(place.display_name('sv'),
+      'Göteborg, Västra Götaland, Sweden')
+
+  def test_display_name_without_admin(self):
+    place = Place('Reykjavík', 64.13548, -21.89541, 'Iceland')
+
+    self.assertEqual(place.display_name('en'), 'Reykjavík, Iceland')
+
+
+class TestGazetteer(TestCase):
+
+  def setUp(self):
+    self.path = create_gazetteer_file(gazetteer_lines)
+    self.gazetteer = Gazetteer(self.path)
+
+  def tearDown(self):
+    self.gazetteer.close()
+    os.remove(self.path)
+
+  def test_nearest(self):
+    place = self.gazetteer.nearest(56.19, 16.40)
+
+    self.assertEqual(place.name, 'Ottenby')
+    self.assertEqual(place.admin1, 'Kalmar')
+
+  def test_nearest_across_antimeridian(self):
+    path = create_gazetteer_file([
+      'Fiji\t-17.7\t179.9',
+      'Samoa\t-13.8\t-171.8',
+    ])
+    gazetteer = Gazetteer(path)
+
+    try:
+      self.assertEqual(gazetteer.nearest(-17.7, -179.9).name, 'Fiji')
+    finally:
+      gazetteer.close()
+      os.remove(path)
+
+  def test_nearest_beyond_max_distance(self):
+    self.assertIsNone(self.gazetteer.nearest(56.19, 16.40, max_distance=1))
+    self.assertEqual(
+      self.gazetteer.nearest(56.19, 16.40, max_distance=10).name, 'Ottenby')
+
+  def test_skips_comments_and_invalid_lines(self):
+    with self.assertLogs('aveslog.v0.gazetteer', 'WARNING'):
+      self.assertEqual(len(self.gazetteer), 4)
+
+  def test_empty(self):
+    path = create_gazetteer_file([])
+    gazetteer = Gazetteer(path)
+
+    try:
+      self.assertIsNone(gazetteer.nearest(56.19, 16.40))
+    finally:
+      gazetteer.close()
+      os.remove(path)
+
+  def test_nearest_as_closest_by_linear_search(self):
+    places = [(random.uniform(-90, 90), random.uniform(-180, 180))
+              for _ in range(2000)]
+    path = create_gazetteer_file([f'{index}\t{lat}\t{lon}'
+                                  for index, (lat, lon) in enumerate(places)])
+    gazetteer = Gazetteer(path)
+
+    def squared_distance(index, point):
+      return sum((a - b) ** 2
+                 for a, b in zip(unit_vector(*places[index]), point))
+
+    try:
+      for _ in range(200):
+        lat, lon = random.uniform(-90, 90), random.uniform(-180, 180)
+        point = unit_vector(lat, lon)
+        closest = min(range(len(places)),
+          key=lambda index: squared_distance(index, point))
+        self.assertEqual(gazetteer.nearest(lat, lon).name, str(closest))
+    finally:
+      gazetteer.close()
+      os.remove(path)
@@ -1,17 +1,34 @@
 from unittest import TestCase
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 from aveslog.nominatim import Nominatim
+from aveslog.nominatim import NominatimError
+from aveslog.v0.gazetteer import Gazetteer
+from aveslog.v0.gazetteer import Place
+from aveslog.v0.geocoding import GazetteerGeocoding
 from aveslog.v0.geocoding import create_geocoding
 from aveslog.v0.geocoding import NominatimGeocoding
 from aveslog.v0.geocoding import Geocoding
+from aveslog.v0.geocoding import MockedGeocoding
 
 
 class TestGeocoding(TestCase):
 
   def test_create_geocoding(self):
-    geocoding = create_geocoding(False)
+    geocoding = create_geocoding(url='http://nominatim:8080', max_retries=4)
     self.assertIsInstance(geocoding, NominatimGeocoding)
+    self.assertEqual(geocoding._nominatim.max_retries, 4)
+
+  def test_create_geocoding_with_gazetteer(self):
+    geocoding = create_geocoding(gazetteer_path='places.tsv', max_distance=20)
+    self.assertIsInstance(geocoding, GazetteerGeocoding)
+    self.assertEqual(geocoding.max_distance, 20)
+
+  def test_create_geocoding_with_fake_latency(self):
+    geocoding = create_geocoding(fake_latency=0.5,
+      gazetteer_path='places.tsv')
+    self.assertIsInstance(geocoding, MockedGeocoding)
+    self.assertEqual(geocoding.latency, 0.5)
 
   def test_geocoding_class_methods(self):
     geocoding = Geocoding()
@@ -35,3 +52,56 @@ class TestNominatimGeocoding(TestCase):
     self.assertEqual(result.detail_level, 18)
     self.assertEqual(result.language_code, 'en-EN')
     self.assertEqual(result.coordinates, (1, 2))
+
+  def test_reverse_search_when_unable_to_geocode(self):
+    nominatim = Mock(spec=Nominatim)
+    nominatim_geocoding = NominatimGeocoding(nominatim)
+    nominatim.reverse.return_value = {'error': 'Unable to geocode'}
+
+    self.assertIsNone(nominatim_geocoding.reverse_search((1, 2)))
+
+
+  def test_reverse_search_when_nominatim_fails(self):
+    nominatim = Mock(spec=Nominatim)
+    nominatim_geocoding = NominatimGeocoding(nominatim)
+    nominatim.reverse.side_effect = NominatimError('circuit open')
+
+    with self.assertRaises(NominatimError):
+      nominatim_geocoding.reverse_search((1, 2))
+
+
+class TestMockedGeocoding(TestCase):
+
+  @patch('aveslog.v0.geocoding.time.sleep')
+  def test_reverse_search_after_latency(self, sleep):
+    geocoding = MockedGeocoding(latency=0.5)
+
+    result = geocoding.reverse_search((1, 2))
+
+    sleep.assert_called_once_with(0.5)
+    self.assertEqual(result.name, '(1, 2) name')
+
+
+class TestGazetteerGeocoding(TestCase):
+
+  def setUp(self):
+    self.gazetteer = Mock(spec=Gazetteer)
+    self.gazetteer.nearest.return_value = Place('Gothenburg', 57.70716,
+      11.96679, 'Sweden', 'Västra Götaland', '', {'sv': 'Göteborg'})
+
+  def test_reverse_search(self):
+    geocoding = GazetteerGeocoding(self.gazetteer, 'sv-SE', max_distance=20)
+
+    result = geocoding.reverse_search((57.7, 11.9))
+
+    self.gazetteer.nearest.assert_called_once_with(57.7, 11.9, 20)
+    self.assertEqual(result.name, 'Göteborg, Västra Götaland, Sweden')
+    self.assertEqual(result.coordinates, (57.70716, 11.96679))
+    self.assertEqual(result.language_code, 'sv-SE')
+    self.assertEqual(result.detail_level, 10)
+
+  def test_reverse_search_when_no_place_near(self):
+    self.gazetteer.nearest.return_value = None
+    geocoding = GazetteerGeocoding(self.gazetteer)
+
+    self.assertIsNone(geocoding.reverse_search((0, 0)))
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from unittest import TestCase
+
+from aveslog.v0.account import pbkdf2_sha256
+from aveslog.v0.hashing import HashingPool
+from aveslog.v0.hashing import HashingPoolSaturated
+
+
+def exit_on_first_run(marker_path: str) -> str:
+  if not os.path.exists(marker_path):
+    open(marker_path, 'w').close()
+    os._exit(1)
+  return 'hashed'
+
+
+def slow_hash(seconds: float) -> str:
+  time.sleep(seconds)
+  return 'hashed'
+
+
+class TestHashingPool(TestCase):
+
+  def test_run_in_process(self):
+    pool = HashingPool(processes=1)
+    self.addCleanup(pool.shutdown)
+
+    result = pool.run(pbkdf2_sha256, 'myPassword', 'mySalt')
+
+    self.assertEqual(result, pbkdf2_sha256('myPassword', 'mySalt'))
+
+  def test_run_after_start(self):
+    pool = HashingPool(processes=1)
+    self.addCleanup(pool.shutdown)
+
+    pool.start()
+
+    self.assertEqual(pool.run(slow_hash, 0), 'hashed')
+
+  def test_admission_held_until_timed_out_hash_done(self):
+    pool = HashingPool(processes=1, max_pending=1, timeout=0.1)
+    self.addCleanup(pool.shutdown)
+    pool.start()
+
+    with self.assertRaises(HashingPoolSaturated):
+      pool.run(slow_hash, 1)
+    with self.assertRaises(HashingPoolSaturated):
+      pool.run(slow_hash, 0)
+
+    deadline = time.monotonic() + 10
+    while True:
+      try:
+        self.assertEqual(pool.run(slow_hash, 0), 'hashed')
+        break
+      except HashingPoolSaturated:
+        self.assertLess(time.monotonic(), deadline)
+        time.sleep(0.1)
+
+  def test_run_in_calling_thread_without_processes(self):
+    pool = HashingPool(processes=0)
+
+    result = pool.run(lambda password: password.upper(), 'myPassword')
+
+    self.assertEqual(result, 'MYPASSWORD')
+
+  def test_max_pending_below_one(self):
+    with self.assertRaises(ValueError):
+      HashingPool(processes=0, max_pending=0)
+
+  def test_run_again_in_new_processes_when_pool_broken(self):
+    pool = HashingPool(processes=1)
+    self.addCleanup(pool.shutdown)
+    marker_directory = tempfile.TemporaryDirectory()
+    self.addCleanup(marker_directory.cleanup)
+    marker_path = os.path.join(marker_directory.name, 'exited')
+
+    with self.assertLogs('aveslog.v0.hashing', 'WARNING'):
+      result = pool.run(exit_on_first_run, marker_path)
+
+    self.assertEqual(result, 'hashed')
+
+  def test_usable_after_pool_broken_twice(self):
+    pool = HashingPool(processes=1)
+    self.addCleanup(pool.shutdown)
+
+    with self.assertLogs('aveslog.v0.hashing', 'WARNING'):
+      with self.assertRaises(BrokenProcessPool):
+        pool.run(os._exit, 1)
+
+    result = pool.run(pbkdf2_sha256, 'myPassword', 'mySalt')
+    self.assertEqual(result, pbkdf2_sha256('myPassword', 'mySalt'))
+
+  def test_saturated_when_max_pending_reached(self):
+    pool = HashingPool(processes=0, max_pending=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_hash(password):
+      started.set()
+      release.wait()
+      return password
+
+    thread = threading.Thread(target=pool.run, args=(blocking_hash, 'first'))
+    thread.start()
+    started.wait()
+    try:
+      with self.assertRaises(HashingPoolSaturated):
+        pool.run(str.upper, 'second')
+    finally:
+      release.set()
+      thread.join()
+
+  def test_admitted_again_after_run(self):
+    pool = HashingPool(processes=0, max_pending=1)
+
+    pool.run(str.upper, 'first')
+
+    self.assertEqual(pool.run(str.upper, 'second'), 'SECOND')
@@ -0,0 +1,98 @@
+from unittest import TestCase
+
+from sqlalchemy import create_engine
+
+from aveslog.v0.instrumentation import QueryStatistics
+from aveslog.v0.instrumentation import capture_statements
+from aveslog.v0.instrumentation import record_query_statistics
+from aveslog.v0.instrumentation import statement_shape
+
+
+class TestStatementShape(TestCase):
+
+  def test_replaces_bind_parameters(self):
+    shape = statement_shape(
+      'SELECT * FROM sighting WHERE bird_id = %(bird_id_1)s')
+
+    self.assertEqual(shape, 'SELECT * FROM sighting WHERE bird_id = ?')
+
+  def test_collapses_in_lists(self):
+    short = statement_shape('SELECT * FROM bird WHERE id IN (%(id_1)s)')
+    long = statement_shape(
+      'SELECT * FROM bird WHERE id IN (%(id_1)s, %(id_2)s, %(id_3)s)')
+
+    self.assertEqual(short, long)
+
+  def test_collapses_whitespace(self):
+    shape = statement_shape('SELECT *\n  FROM bird\n')
+
+    self.assertEqual(shape, 'SELECT * FROM bird')
+
+
+class TestQueryStatistics(TestCase):
+
+  def test_record(self):
+    statistics = QueryStatistics()
+
+    statistics.record('SELECT 1', 0.25)
+    statistics.record('SELECT 2', 0.5)
+
+    self.assertEqual(statistics.count, 2)
+    self.assertEqual(statistics.duration, 0.75)
+
+  def test_max_repetitions(self):
+    statistics = QueryStatistics()
+
+    statistics.record('SELECT * FROM bird WHERE id = %(id_1)s', 0)
+    statistics.record('SELECT * FROM bird WHERE id = %(id_1)s', 0)
+    statistics.record('SELECT * FROM locale', 0)
+
+    self.assertEqual(statistics.max_repetitions, 2)
+
+  def test_max_repetitions_when_empty(self):
+    self.assertEqual(QueryStatistics().max_repetitions, 0)
+
+  def test_repeated_shapes(self):
+    statistics = QueryStatistics()
+    for _ in range(3):
+      statistics.record('SELECT * FROM bird WHERE id = %(id_1)s', 0)
+    statistics.record('SELECT * FROM locale', 0)
+
+    repeated_shapes = statistics.repeated_shapes(2)
+
+    self.assertListEqual(repeated_shapes, [
+      ('SELECT * FROM bird WHERE id = ?', 3),
+    ])
+
+
+class TestRecordQueryStatistics(TestCase):
+
+  def test_records_executed_statements(self):
+    engine = create_engine('sqlite://')
+    statistics = QueryStatistics()
+    record_query_statistics(engine, lambda: statistics)
+
+    engine.execute('SELECT 1')
+    engine.execute('SELECT 1')
+
+    self.assertEqual(statistics.count, 2)
+    self.assertEqual(statistics.max_repetitions, 2)
+
+  def test_ignores_statements_without_statistics(self):
+    engine = create_engine('sqlite://')
+    record_query_statistics(engine, lambda: None)
+
+    engine.execute('SELECT 1')
+
+
+class TestCaptureStatements(TestCase):
+
+  def test_captures_statements_inside_block(self):
+    engine = create_engine('sqlite://')
+    engine.execute('SELECT 1')
+
+    with capture_statements(engine) as statements:
+      engine.execute('SELECT ?', 2)
+    engine.execute('SELECT 3')
+
+    self.assertEqual(statements, [('SELECT ?', (2,))])
@@ -0,0 +1,91 @@
+from unittest import TestCase
+from unittest.mock import Mock
+
+from sqlalchemy.orm import Session
+
+from aveslog.v0.permission import PermissionMatrix
+from aveslog.v0.permission import load_permissions
+
+
+def mock_session(rows: list) -> Mock:
+  session = Mock(spec=Session)
+  session.query.return_value.join.return_value.all.return_value = rows
+  return session
+
+
+class TestLoadPermissions(TestCase):
+
+  def test_groups_patterns_by_role_and_method(self):
+    session = mock_session([
+      (1, '^/birds$', 'POST'),
+      (1, '^/sightings$', 'POST'),
+      (2, '^/birds$', 'GET'),
+    ])
+
+    permissions = load_permissions(session)
+
+    self.assertEqual(
+      {key: [pattern.pattern for pattern in patterns]
+       for key, patterns in permissions.items()},
+      {
+        (1, 'POST'): ['^/birds$', '^/sightings$'],
+        (2, 'GET'): ['^/birds$'],
+      })
+
+  def test_ignores_invalid_regex(self):
+    session = mock_session([(1, '[', 'POST')])
+
+    self.assertEqual(load_permissions(session), {})
+
+
+class TestPermissionMatrix(TestCase):
+
+  def setUp(self) -> None:
+    self.time = 0.0
+    self.session = mock_session([
+      (5, '^/birds/[^/]+/common-names$', 'POST'),
+    ])
+    self.matrix = PermissionMatrix(60, lambda: self.time)
+
+  def test_permitted(self):
+    self.assertTrue(self.matrix.is_permitted(
+      self.session, {5}, '/birds/pica-pica/common-names', 'POST'))
+
+  def test_not_permitted_without_role(self):
+    self.assertFalse(self.matrix.is_permitted(
+      self.session, {4}, '/birds/pica-pica/common-names', 'POST'))
+
+  def test_not_permitted_for_other_method(self):
+    self.assertFalse(self.matrix.is_permitted(
+      self.session, {5}, '/birds/pica-pica/common-names', 'DELETE'))
+
+  def test_not_permitted_for_other_resource(self):
+    self.assertFalse(self.matrix.is_permitted(
+      self.session, {5}, '/birds/pica-pica', 'POST'))
+
+  def test_regex_searched_like_postgres(self):
+    session = mock_session([(5, 'common-names', 'POST')])
+
+    self.assertTrue(self.matrix.is_permitted(
+      session, {5}, '/birds/pica-pica/common-names', 'POST'))
+
+  def test_loaded_once_within_time_to_live(self):
+    self.matrix.is_permitted(self.session, {5}, '/', 'GET')
+    self.time += 59
+    self.matrix.is_permitted(self.session, {5}, '/', 'GET')
+
+    self.assertEqual(self.session.query.call_count, 1)
+
+  def test_loaded_again_after_time_to_live(self):
+    self.matrix.is_permitted(self.session, {5}, '/', 'GET')
+    self.time += 60
+    self.matrix.is_permitted(self.session, {5}, '/', 'GET')
+
+    self.assertEqual(self.session.query.call_count, 2)
+
+  def test_loaded_again_after_invalidation(self):
+    self.matrix.is_permitted(self.session, {5}, '/', 'GET')
+    self.matrix.invalidate()
+    self.matrix.is_permitted(self.session, {5}, '/', 'GET')
+
+    self.assertEqual(self.session.query.call_count, 2)
@@ -0,0 +1,189 @@
+from datetime import datetime
+from datetime import timedelta
+from unittest import TestCase
+from unittest.mock import Mock
+
+from aveslog.test_util import AppTestCase
+from aveslog.test_util import get_test_database_session
+
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+
+from aveslog.nominatim import NominatimError
+from aveslog.v0.geocoding import Geocoding
+from aveslog.v0.geocoding import MockedGeocoding
+from aveslog.v0.models import Locale
+from aveslog.v0.models import Position
+from aveslog.v0.models import PositionName
+from aveslog.v0.models import PositionNamingTask
+from aveslog.v0.position_naming import PositionNamer
+
+
+class TestPositionNamer(TestCase):
+
+  def setUp(self) -> None:
+    self.time = datetime(2020, 4, 16, 12, 0)
+    self.session = Mock()
+    locale_query = self.session.query.return_value.filter_by.return_value
+    locale_query.first.return_value = Locale(id=1, code='en')
+    self.position = Position(
+      id=1, point=from_shape(Point(-21.9422367, 64.145981), srid=4326))
+    self.task = PositionNamingTask(
+      position_id=1, position=self.position, attempt_count=0,
+      next_attempt_time=self.time, creation_time=self.time)
+
+  def create_namer(self, geocoding: Geocoding,
+        reuse_distance: float = 0) -> PositionNamer:
+    return PositionNamer(geocoding, retry_delay=timedelta(minutes=1),
+      max_retry_delay=timedelta(minutes=3), reuse_distance=reuse_distance,
+      time_supplier=lambda: self.time)
+
+  def test_run_task_names_position(self):
+    namer = self.create_namer(MockedGeocoding())
+
+    namer.run_task(self.session, self.task)
+
+    self.assertEqual([name.name for name in self.position.names],
+      ['(64.145981, -21.9422367) name'])
+    self.assertEqual(self.position.names[0].creation_time, self.time)
+    self.session.delete.assert_called_once_with(self.task)
+
+  def test_run_task_leases_task_before_geocoding(self):
+    geocoding = Mock(spec=Geocoding)
+    leases = []
+    geocoding.reverse_search.side_effect = lambda coordinates: leases.append(
+      (self.session.commit.call_count, self.task.next_attempt_time,
+       self.task.attempt_count))
+    namer = self.create_namer(geocoding)
+
+    namer.run_task(self.session, self.task)
+
+    self.assertEqual(leases, [(1, self.time + timedelta(minutes=5), 1)])
+
+  def test_run_task_reuses_nearby_name(self):
+    geocoding = Mock(spec=Geocoding)
+    namer = self.create_namer(geocoding, reuse_distance=100)
+    namer.find_nearby_name = Mock(return_value=PositionName(
+      locale_id=1, detail_level=18, name='Reykjavík'))
+
+    namer.run_task(self.session, self.task)
+
+    namer.find_nearby_name.assert_called_once_with(
+      self.session, 1, 64.145981, -21.9422367)
+    geocoding.reverse_search.assert_not_called()
+    self.assertEqual([(name.name, name.detail_level, name.locale_id)
+                      for name in self.position.names],
+      [('Reykjavík', 18, 1)])
+    self.assertEqual(self.position.names[0].creation_time, self.time)
+    self.session.delete.assert_called_once_with(self.task)
+    self.session.commit.assert_not_called()
+
+  def test_run_task_when_position_already_named(self):
+    self.position.names.append(PositionName(locale_id=1, name='Reykjavík'))
+    namer = self.create_namer(MockedGeocoding())
+
+    namer.run_task(self.session, self.task)
+
+    self.assertEqual([name.name for name in self.position.names],
+      ['Reykjavík'])
+    self.session.delete.assert_called_once_with(self.task)
+
+  def test_run_task_when_geocoding_fails(self):
+    geocoding = Mock(spec=Geocoding)
+    geocoding.reverse_search.side_effect = ConnectionError('timed out')
+    namer = self.create_namer(geocoding)
+
+    with self.assertLogs('aveslog.v0.position_naming', 'WARNING'):
+      namer.run_task(self.session, self.task)
+
+    self.assertEqual(self.task.attempt_count, 1)
+    self.assertEqual(self.task.next_attempt_time,
+      self.time + timedelta(minutes=1))
+    self.assertIn('timed out', self.task.last_error)
+    self.assertEqual(self.position.names, [])
+    self.session.delete.assert_not_called()
+
+  def test_run_task_when_no_place(self):
+    geocoding = Mock(spec=Geocoding)
+    geocoding.reverse_search.return_value = None
+    namer = self.create_namer(geocoding)
+
+    namer.run_task(self.session, self.task)
+
+    self.assertEqual(self.task.attempt_count, 1)
+    self.assertEqual(self.position.names, [])
+    self.session.delete.assert_called_once_with(self.task)
+
+  def test_retry_delay_doubles_until_max(self):
+    geocoding = Mock(spec=Geocoding)
+    geocoding.reverse_search.side_effect = NominatimError('circuit open')
+    namer = self.create_namer(geocoding)
+    delays = []
+
+    with self.assertLogs('aveslog.v0.position_naming', 'WARNING'):
+      for _ in range(4):
+        namer.run_task(self.session, self.task)
+        delays.append(self.task.next_attempt_time - self.time)
+
+    self.assertEqual(delays, [timedelta(minutes=minutes)
+                              for minutes in [1, 2, 3, 3]])
+    self.assertEqual(self.task.attempt_count, 4)
+
+  def test_name_positions_until_none_due(self):
+    namer = self.create_namer(MockedGeocoding())
+    namer.claim_due_task = Mock(side_effect=[self.task, None])
+
+    count = namer.name_positions(self.session, 10)
+
+    self.assertEqual(count, 1)
+    self.assertEqual(self.session.commit.call_count, 2)
+
+  def test_name_positions_at_most_max_count(self):
+    namer = self.create_namer(MockedGeocoding())
+    namer.claim_due_task = Mock(return_value=self.task)
+    namer.run_task = Mock()
+
+    count = namer.name_positions(self.session, 3)
+
+    self.assertEqual(count, 3)
+    self.assertEqual(self.session.commit.call_count, 3)
+
+
+class TestPositionNamerNearbyNames(AppTestCase):
+
+  def setUp(self) -> None:
+    super().setUp()
+    self.time = datetime(2020, 4, 16, 12, 0)
+    self.db_insert_locale(1, 'en')
+    self.db_insert_position(1, (47.240055, 2.2783327))
+    self.db_insert_position_name(1, 1, 1, 18, 'La Prinquette', self.time)
+    self.session = get_test_database_session()
+    self.geocoding = Mock(spec=Geocoding)
+    self.geocoding.language_code = 'en-EN'
+    self.geocoding.detail_level = 18
+
+  def tearDown(self) -> None:
+    self.session.close()
+    super().tearDown()
+
+  def test_find_nearby_name_within_reuse_distance(self):
+    namer = PositionNamer(self.geocoding, reuse_distance=100)
+
+    name = namer.find_nearby_name(self.session, 2, 47.2404, 2.2783327)
+
+    self.assertEqual(name.name, 'La Prinquette')
+
+  def test_find_nearby_name_beyond_reuse_distance(self):
+    namer = PositionNamer(self.geocoding, reuse_distance=100)
+
+    name = namer.find_nearby_name(self.session, 2, 47.25, 2.2783327)
+
+    self.assertIsNone(name)
+
+  def test_find_nearby_name_at_other_detail_level(self):
+    self.geocoding.detail_level = 10
+    namer = PositionNamer(self.geocoding, reuse_distance=100)
+
+    name = namer.find_nearby_name(self.session, 2, 47.2404, 2.2783327)
+
+    self.assertIsNone(name)
@@ -0,0 +1,100 @@
+from unittest import TestCase
+
+from aveslog.v0.models import Account
+from aveslog.v0.models import Role
+from aveslog.v0.principal import Principal
+from aveslog.v0.principal import PrincipalCache
+from aveslog.v0.principal import create_principal
+
+
+class TestPrincipal(TestCase):
+
+  def test_create_principal(self):
+    account = Account(id=1, birder_id=2, roles=[Role(id=3), Role(id=4)])
+
+    principal = create_principal(account)
+
+    self.assertEqual(principal, Principal(1, 2, [4, 3]))
+
+  def test_repr(self):
+    self.assertEqual(repr(Principal(1, 2, [4, 3])),
+      '<Principal(account_id=1, birder_id=2, role_ids=[3, 4])>')
+
+
+class TestPrincipalCache(TestCase):
+
+  def setUp(self) -> None:
+    self.time = 1000.0
+    self.principal = Principal(1, 1, [])
+
+  def create_cache(self, max_size: int = 10,
+        time_to_live: float = 60) -> PrincipalCache:
+    return PrincipalCache(max_size, time_to_live, lambda: self.time)
+
+  def test_get_when_missing(self):
+    self.assertIsNone(self.create_cache().get('token'))
+
+  def test_get_when_put(self):
+    cache = self.create_cache()
+
+    cache.put('token', self.principal, 2000)
+
+    self.assertIs(cache.get('token'), self.principal)
+
+  def test_entry_expires_after_time_to_live(self):
+    cache = self.create_cache(time_to_live=60)
+    cache.put('token', self.principal, 2000)
+
+    self.time += 60
+
+    self.assertIsNone(cache.get('token'))
+    self.assertEqual(len(cache), 0)
+
+  def test_entry_expires_with_token(self):
+    cache = self.create_cache(time_to_live=60)
+    cache.put('token', self.principal, 1010)
+
+    self.time += 10
+
+    self.assertIsNone(cache.get('token'))
+
+  def test_least_recently_used_entry_evicted_when_full(self):
+    cache = self.create_cache(max_size=2)
+    cache.put('first', self.principal, 2000)
+    cache.put('second', self.principal, 2000)
+    cache.get('first')
+
+    cache.put('third', self.principal, 2000)
+
+    self.assertIsNotNone(cache.get('first'))
+    self.assertIsNone(cache.get('second'))
+    self.assertIsNotNone(cache.get('third'))
+
+  def test_nothing_cached_when_size_zero(self):
+    cache = self.create_cache(max_size=0)
+
+    cache.put('token', self.principal, 2000)
+
+    self.assertIsNone(cache.get('token'))
+
+  def test_invalidate_account(self):
+    cache = self.create_cache()
+    other_principal = Principal(2, 2, [])
+    cache.put('first', self.principal, 2000)
+    cache.put('second', self.principal, 2000)
+    cache.put('other', other_principal, 2000)
+
+    cache.invalidate_account(1)
+
+    self.assertIsNone(cache.get('first'))
+    self.assertIsNone(cache.get('second'))
+    self.assertIs(cache.get('other'), other_principal)
+
+  def test_clear(self):
+    cache = self.create_cache()
+    cache.put('token', self.principal, 2000)
+
+    cache.clear()
+
+    self.assertIsNone(cache.get('token'))
+    cache.invalidate_account(1)
@@ -54,6 +54,18 @@ class TestCreateRegistrationRequest(AppTestCase):
     })
     self.assertListEqual(self.dispatched_mails, [])
 
+  def test_post_registration_request_when_email_taken_differently_cased(self):
+    self.db_insert_locale(1, 'en')
+    self.db_setup_account(1, 1, 'hulot', 'myPassword', 'hulot@mail.com')
+
+    response = self.post_registration_request('Hulot@Mail.com')
+
+    self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+    self.assertDictEqual(response.json, {
+      'code': ErrorCode.EMAIL_TAKEN,
+      'message': 'Email taken',
+    })
+
   def test_post_registration_request_with_specified_locale(self):
     self.db_insert_locale(1, 'sv')
 
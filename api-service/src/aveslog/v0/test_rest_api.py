@@ -0,0 +1,34 @@
+from unittest import TestCase
+
+from aveslog.v0.rest_api import is_replica_safe
+from aveslog.v0.rest_api import require_authentication
+from aveslog.v0.rest_api import require_primary_database
+
+
+def route():
+  pass
+
+
+class TestIsReplicaSafe(TestCase):
+
+  def test_safe_methods(self):
+    self.assertTrue(is_replica_safe('GET', route))
+    self.assertTrue(is_replica_safe('HEAD', route))
+
+  def test_unsafe_methods(self):
+    for method in ['POST', 'PUT', 'PATCH', 'DELETE']:
+      self.assertFalse(is_replica_safe(method, route))
+
+  def test_route_requiring_primary_database(self):
+    primary_route = require_primary_database(lambda: None)
+
+    self.assertFalse(is_replica_safe('GET', primary_route))
+
+  def test_route_requiring_primary_database_when_wrapped(self):
+    primary_route = require_authentication(require_primary_database(
+      lambda: None))
+
+    self.assertFalse(is_replica_safe('GET', primary_route))
+
+  def test_missing_route(self):
+    self.assertTrue(is_replica_safe('GET', None))
@@ -1,12 +1,21 @@
+from datetime import date
 from unittest import TestCase
+from unittest.mock import Mock
 
+from aveslog.test_util import AppTestCase
 from aveslog.test_util import get_test_database_session
 from aveslog.test_util import IntegrationTestCase
 from aveslog.v0.localization import Locale
 from aveslog.v0.models import Bird
 from aveslog.v0.models import BirdCommonName
+from aveslog.v0.models import Birder
+from aveslog.v0.models import Sighting
 from aveslog.v0.search import BirdSearchMatch
 from aveslog.v0.search import BirdSearcher
+from aveslog.v0.search import top_scores
+from aveslog.v0.search_index import BirdNameIndex
+from aveslog.v0.search_query import SearchQuery
+from aveslog.v0.search_query import parse_search_query
 
 picapica = Bird(binomial_name='Pica pica')
 
@@ -21,7 +30,7 @@ class TestBirdSearcher(IntegrationTestCase):
     self.database_session.commit()
     searcher = BirdSearcher(self.database_session)
 
-    matches = searcher.search('Pica pica')
+    matches = searcher.search(parse_search_query('Pica pica'))
 
     self.assertIsInstance(matches[0], BirdSearchMatch)
 
@@ -30,7 +39,7 @@ class TestBirdSearcher(IntegrationTestCase):
     self.database_session.commit()
     searcher = BirdSearcher(self.database_session)
 
-    matches = searcher.search('Pica pica')
+    matches = searcher.search(parse_search_query('Pica pica'))
 
     self.assertEqual(len(matches), 1)
 
@@ -44,20 +53,154 @@ class TestBirdSearcher(IntegrationTestCase):
     self.database_session.commit()
     searcher = BirdSearcher(self.database_session)
 
-    matches = searcher.search('Skata')
+    matches = searcher.search(parse_search_query('Skata'))
 
     self.assertEqual(len(matches), 1)
 
+  def test_search_finds_bird_by_indexed_swedish_name(self):
+    locale = Locale(code='sv')
+    self.database_session.add(locale)
+    self.database_session.flush()
+    bird = Bird(binomial_name='Pica pica')
+    bird.common_names.append(BirdCommonName(locale_id=locale.id, name='Skata'))
+    self.database_session.add(bird)
+    self.database_session.commit()
+    searcher = BirdSearcher(self.database_session, BirdNameIndex())
+
+    matches = searcher.search(parse_search_query('Skata'))
+
+    self.assertEqual([match.bird for match in matches], [bird])
+    self.assertEqual(matches[0].score, 1.0)
+
   def test_search_finds_none_with_only_empty_string_name_query(self):
     self.database_session.add(Bird(binomial_name='Pica pica'))
     self.database_session.commit()
     searcher = BirdSearcher(self.database_session)
 
-    matches = searcher.search('')
+    matches = searcher.search(parse_search_query(''))
 
     self.assertEqual(len(matches), 0)
 
 
+class TestBirdSearcherQualifiers(AppTestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.database_session = get_test_database_session()
+
+  def tearDown(self):
+    self.database_session.close()
+    super().tearDown()
+
+  def test_search_by_locale_only_matches_names_in_locale(self):
+    swedish = Locale(code='sv')
+    english = Locale(code='en')
+    self.database_session.add_all([swedish, english])
+    self.database_session.flush()
+    bird = Bird(binomial_name='Pica pica')
+    bird.common_names.append(BirdCommonName(locale_id=swedish.id, name='Skata'))
+    bird.common_names.append(BirdCommonName(locale_id=english.id, name='Magpie'))
+    self.database_session.add(bird)
+    self.database_session.commit()
+    searcher = BirdSearcher(self.database_session, BirdNameIndex())
+
+    swedish_matches = searcher.search(parse_search_query('skata locale:sv'))
+    english_matches = searcher.search(parse_search_query('skata locale:en'))
+
+    self.assertEqual([match.bird for match in swedish_matches], [bird])
+    self.assertEqual(english_matches, [])
+
+  def test_search_ranks_by_share_of_qualified_sightings(self):
+    pica = Bird(binomial_name='Pica pica')
+    turdus = Bird(binomial_name='Turdus merula')
+    birder = Birder(name='Kenny Bostick')
+    other_birder = Birder(name='Brad Harris')
+    self.database_session.add_all([pica, turdus, birder, other_birder])
+    self.database_session.flush()
+    self.database_session.add_all([
+      Sighting(birder_id=birder.id, bird_id=pica.id,
+        sighting_date=date(2020, 3, 6)),
+      Sighting(birder_id=birder.id, bird_id=turdus.id,
+        sighting_date=date(2020, 3, 7)),
+      Sighting(birder_id=birder.id, bird_id=turdus.id,
+        sighting_date=date(2020, 3, 8)),
+      Sighting(birder_id=birder.id, bird_id=pica.id,
+        sighting_date=date(2019, 3, 6)),
+      Sighting(birder_id=other_birder.id, bird_id=pica.id,
+        sighting_date=date(2020, 3, 6)),
+    ])
+    self.database_session.commit()
+    searcher = BirdSearcher(self.database_session)
+
+    matches = searcher.search(
+      parse_search_query(f'date:2020-01-01.. birder:{birder.id}'), limit=1)
+
+    self.assertEqual([match.bird for match in matches], [turdus])
+    self.assertAlmostEqual(matches[0].score, 2 / 3)
+
+  def test_search_seen_by_me(self):
+    pica = Bird(binomial_name='Pica pica')
+    birder = Birder(name='Kenny Bostick')
+    self.database_session.add_all([pica, birder])
+    self.database_session.flush()
+    self.database_session.add(Sighting(birder_id=birder.id, bird_id=pica.id,
+      sighting_date=date(2020, 3, 6)))
+    self.database_session.commit()
+    searcher = BirdSearcher(self.database_session)
+    query = parse_search_query('pica seen:me')
+
+    matches = searcher.search(query, birder_id=birder.id)
+    others_matches = searcher.search(query, birder_id=birder.id + 1)
+
+    self.assertEqual([match.bird for match in matches], [pica])
+    self.assertEqual(others_matches, [])
+
+
+class TestBirdSearcherCompile(TestCase):
+
+  def test_compile_empty_query(self):
+    session = Mock()
+    searcher = BirdSearcher(session)
+
+    self.assertIsNone(searcher.compile(SearchQuery()))
+    session.query.assert_not_called()
+
+  def test_compile_seen_by_me_without_birder(self):
+    session = Mock()
+    searcher = BirdSearcher(session)
+
+    statement = searcher.compile(parse_search_query('pica seen:me'))
+
+    self.assertIsNone(statement)
+    session.query.assert_not_called()
+
+  def test_compile_when_name_index_scores_nothing(self):
+    session = Mock()
+    name_index = Mock()
+    name_index.name_scores.return_value = {}
+    searcher = BirdSearcher(session, name_index)
+
+    statement = searcher.compile(parse_search_query('pica'))
+
+    self.assertIsNone(statement)
+    session.query.assert_not_called()
+
+
+class TestTopScores(TestCase):
+
+  def test_best_scores_ranked_by_score_then_bird_id(self):
+    scores = {1: 0.5, 2: 1.0, 3: 0.5, 4: 0.2}
+
+    self.assertEqual(list(top_scores(scores, 3, None).items()),
+      [(2, 1.0), (1, 0.5), (3, 0.5)])
+
+  def test_scores_after_position(self):
+    scores = {1: 0.5, 2: 1.0, 3: 0.5, 4: 0.2}
+
+    self.assertEqual(list(top_scores(scores, 2, (0.5, 1)).items()),
+      [(3, 0.5), (4, 0.2)])
+
+
 class TestBirdSearchMatch(TestCase):
 
   def test_score(self):
@@ -2,10 +2,19 @@ from http import HTTPStatus
 from datetime import date
 
 from aveslog.test_util import AppTestCase
+from aveslog.test_util import get_test_database_session
+from aveslog.v0.search_query import encode_cursor
 
 
 class TestSearchBirds(AppTestCase):
 
+  def load_bird_name_index(self) -> None:
+    """Loads the bird name index up front, like it is loaded by earlier
+    searches outside of tests, to leave it out of query budgets"""
+    session = get_test_database_session()
+    self._app.bird_name_index.name_scores(session, '')
+    session.close()
+
   def test_search_empty_query(self):
     response = self.client.get('/search/birds?q=')
 
@@ -46,6 +55,28 @@ class TestSearchBirds(AppTestCase):
       ]
     })
 
+  def test_search_with_southern_and_western_location(self):
+    self.db_insert_bird(1, 'Pica pica')
+    self.db_insert_birder(1, 'kennybostick')
+    self.db_insert_position(1, (-33.8688, -70.2093))
+    self.db_insert_sighting(1, 1, 1, date(2020, 3, 6), None, 1)
+
+    response = self.client.get('/search/birds?q=position:-33.8688,-70.2093;r=1')
+
+    self.assertEqual(response.status_code, HTTPStatus.OK)
+    self.assertEqual(len(response.json['items']), 1)
+
+  def test_search_with_location_radius_capped(self):
+    self.db_insert_bird(1, 'Pica pica')
+    self.db_insert_birder(1, 'kennybostick')
+    self.db_insert_position(1, (48.240055, 2.2783327))
+    self.db_insert_sighting(1, 1, 1, date(2020, 3, 6), None, 1)
+
+    response = self.client.get('/search/birds?q=position:47.240055,2.2783327;r=500')
+
+    self.assertEqual(response.status_code, HTTPStatus.OK)
+    self.assertEqual(response.json, {'items': []})
+
   def test_search_with_name_location(self):
     self.db_insert_bird(1, 'Pica pica')
     self.db_insert_bird(2, 'Turdus merula')
@@ -97,10 +128,12 @@ class TestSearchBirds(AppTestCase):
     self.db_insert_sighting(2, 1, 1, date(2020, 4, 16), None, None)
     self.db_insert_sighting(3, 1, 1, date(2002, 4, 16), None, None)
     access_token = self.create_access_token(1)
+    self.load_bird_name_index()
 
     response = self.client.get('/search/birds?q=pica&embed=stats', headers={'accessToken': access_token.jwt})
 
     self.assertEqual(response.status_code, HTTPStatus.OK)
+    self.assert_query_budget(response, 5)
     self.assertDictEqual(response.json, {
       'items': [
         {
@@ -132,6 +165,26 @@ class TestSearchBirds(AppTestCase):
       ]
     })
 
+  def test_search_embeds_in_constant_number_of_queries(self):
+    self.db_setup_account(1, 1, 'kenny', 'bostick', 'kenny@mail.com')
+    for bird_id in range(1, 11):
+      self.db_insert_bird(bird_id, f'Pica pica{bird_id}')
+      self.db_insert_picture(bird_id, f'image/bird/{bird_id}.jpg', '')
+      self.db_insert_bird_thumbnail(bird_id, bird_id)
+      self.db_insert_sighting(bird_id, 1, bird_id, date(2020, 4, 16), None, None)
+    access_token = self.create_access_token(1)
+    self.load_bird_name_index()
+
+    response = self.client.get('/search/birds?q=pica&embed=thumbnail,stats',
+      headers={'accessToken': access_token.jwt})
+
+    self.assertEqual(response.status_code, HTTPStatus.OK)
+    self.assertEqual(len(response.json['items']), 10)
+    for item in response.json['items']:
+      self.assertIn('thumbnail', item)
+      self.assertEqual(item['stats'], {'lastSighting': '2020-04-16'})
+    self.assert_query_budget(response, 5)
+
   def test_get_birds_with_custom_page_size(self):
     self.db_insert_bird(1, 'Pica pica')
     self.db_insert_bird(2, 'Pica serica')
@@ -146,9 +199,35 @@ class TestSearchBirds(AppTestCase):
           'binomialName': 'Pica pica',
           'score': 1
         }
-      ]
+      ],
+      'cursor': encode_cursor(1.0, 1),
+    })
+
+  def test_get_next_page_by_cursor(self):
+    self.db_insert_bird(1, 'Pica pica')
+    self.db_insert_bird(2, 'Pica serica')
+    self.db_insert_bird(3, 'Pica hudsonia')
+    first_page = self.client.get('/search/birds?q=Pica&page_size=2')
+
+    response = self.client.get('/search/birds', query_string={
+      'q': 'Pica',
+      'page_size': 2,
+      'cursor': first_page.json['cursor'],
     })
 
+    self.assertEqual(response.status_code, HTTPStatus.OK)
+    first_page_ids = [item['id'] for item in first_page.json['items']]
+    page_ids = [item['id'] for item in response.json['items']]
+    self.assertEqual(len(first_page_ids), 2)
+    self.assertEqual(len(page_ids), 1)
+    self.assertNotIn(page_ids[0], first_page_ids)
+    self.assertNotIn('cursor', response.json)
+
+  def test_search_with_invalid_cursor(self):
+    response = self.client.get('/search/birds?q=Pica&cursor=nonsense')
+
+    self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
   def test_search_pica_pica(self):
     self.db_insert_bird(1, 'Pica pica')
 
@@ -181,4 +260,114 @@ class TestSearchBirds(AppTestCase):
           'score': 1,
         }
       ]
-    })
\ No newline at end of file
+    })
+
+  def test_search_with_date_range_and_birder(self):
+    self.db_insert_bird(1, 'Pica pica')
+    self.db_insert_bird(2, 'Turdus merula')
+    self.db_insert_birder(1, 'kennybostick')
+    self.db_insert_birder(2, 'bradharris')
+    self.db_insert_sighting(1, 1, 1, date(2019, 3, 6), None, None)
+    self.db_insert_sighting(2, 1, 2, date(2020, 3, 6), None, None)
+    self.db_insert_sighting(3, 2, 1, date(2020, 3, 6), None, None)
+
+    response = self.client.get('/search/birds?q=date:2020-01-01..+birder:1')
+
+    self.assertEqual(response.status_code, HTTPStatus.OK)
+    self.assertEqual(response.json, {
+      'items': [
+        {
+          'id': 'turdus-merula',
+          'binomialName': 'Turdus merula',
+          'score': 1,
+        }
+      ]
+    })
+
+  def test_search_seen_by_me(self):
+    self.db_setup_account(1, 1, 'kenny', 'bostick', 'kenny@mail.com')
+    self.db_insert_bird(1, 'Pica pica')
+    self.db_insert_bird(2, 'Pica serica')
+    self.db_insert_sighting(1, 1, 1, date(2020, 4, 16), None, None)
+
+    response = self.get_with_access_token(
+      '/search/birds?q=pica+seen:me', account_id=1)
+
+    self.assertEqual(response.status_code, HTTPStatus.OK)
+    self.assertEqual([item['id'] for item in response.json['items']],
+      ['pica-pica'])
+
+  def test_search_seen_by_me_when_unauthenticated(self):
+    response = self.client.get('/search/birds?q=pica+seen:me')
+
+    self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+  def test_search_with_invalid_qualifier(self):
+    response = self.client.get('/search/birds?q=pica+date:yesterday')
+
+    self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+    self.assertEqual(response.json['code'], 21)
+
+  def test_repeated_search_served_from_cache(self):
+    self.db_insert_bird(1, 'Pica pica')
+    self.load_bird_name_index()
+    self.client.get('/search/birds?q=Pica%20pica')
+
+    response = self.client.get('/search/birds?q=pica++PICA')
+
+    self.assertEqual(response.status_code, HTTPStatus.OK)
+    self.assertEqual(len(self._app.search_result_cache), 1)
+    self.assert_query_budget(response, 1)
+    self.assertEqual(response.json, {
+      'items': [
+        {
+          'id': 'pica-pica',
+          'binomialName': 'Pica pica',
+          'score': 1,
+        }
+      ]
+    })
+
+
+
+class TestSuggestBirds(AppTestCase):
+
+  def test_suggest_by_binomial_name_and_locale_name(self):
+    self.db_insert_locale(1, 'sv')
+    self.db_insert_bird(1, 'Pica pica')
+    self.db_insert_bird(2, 'Turdus merula')
+    self.db_insert_bird_common_name(1, 1, 1, 'Skata')
+    self.db_insert_bird_common_name(2, 2, 1, 'Koltrast')
+
+    response = self.client.get('/search/birds/suggest?q=sk&locale=sv')
+
+    self.assertEqual(response.status_code, HTTPStatus.OK)
+    self.assertEqual(response.headers['Cache-Control'], 'max-age=300')
+    self.assertEqual(response.json, {
+      'items': [
+        {
+          'id': 'pica-pica',
+          'binomialName': 'Pica pica',
+          'name': 'Skata',
+        }
+      ]
+    })
+
+  def test_suggest_with_empty_prefix(self):
+    self.db_insert_bird(1, 'Pica pica')
+
+    response = self.client.get('/search/birds/suggest?q=')
+
+    self.assertEqual(response.status_code, HTTPStatus.OK)
+    self.assertEqual(response.json, {'items': []})
+
+  def test_suggest_at_least_one_when_limit_below_one(self):
+    self.db_insert_bird(1, 'Pica pica')
+    self.db_insert_bird(2, 'Pica nuttalli')
+
+    for limit in [0, -1]:
+      with self.subTest(limit=limit):
+        response = self.client.get(f'/search/birds/suggest?q=pica&limit={limit}')
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(len(response.json['items']), 1)
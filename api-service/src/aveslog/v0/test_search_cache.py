@@ -0,0 +1,85 @@
+from unittest import TestCase
+
+from aveslog.v0.search_cache import SearchResultCache
+
+
+class TestSearchResultCache(TestCase):
+
+  def setUp(self) -> None:
+    self.time = 1000.0
+    self.results = [(1, 1.0), (2, 0.5)]
+
+  def create_cache(self, max_size: int = 10, time_to_live: float = 300,
+        sighting_change_threshold: int = 2) -> SearchResultCache:
+    return SearchResultCache(max_size, time_to_live, sighting_change_threshold,
+      lambda: self.time)
+
+  def test_get_when_missing(self):
+    self.assertIsNone(self.create_cache().get('pica'))
+
+  def test_get_when_put(self):
+    cache = self.create_cache()
+
+    cache.put('pica', self.results, by_name=True, by_sightings=False)
+
+    self.assertEqual(cache.get('pica'), self.results)
+
+  def test_entry_expires_after_time_to_live(self):
+    cache = self.create_cache(time_to_live=300)
+    cache.put('pica', self.results, by_name=True, by_sightings=False)
+
+    self.time += 300
+
+    self.assertIsNone(cache.get('pica'))
+    self.assertEqual(len(cache), 0)
+
+  def test_least_recently_used_entry_evicted_when_full(self):
+    cache = self.create_cache(max_size=2)
+    cache.put('first', self.results, by_name=True, by_sightings=False)
+    cache.put('second', self.results, by_name=True, by_sightings=False)
+    cache.get('first')
+
+    cache.put('third', self.results, by_name=True, by_sightings=False)
+
+    self.assertIsNotNone(cache.get('first'))
+    self.assertIsNone(cache.get('second'))
+    self.assertIsNotNone(cache.get('third'))
+
+  def test_nothing_cached_when_size_zero(self):
+    cache = self.create_cache(max_size=0)
+
+    cache.put('pica', self.results, by_name=True, by_sightings=False)
+
+    self.assertIsNone(cache.get('pica'))
+
+  def test_invalidate_name_queries(self):
+    cache = self.create_cache()
+    position_query = 'position:47.240,2.278;r=1'
+    cache.put('pica', self.results, by_name=True, by_sightings=False)
+    cache.put(position_query, self.results, by_name=False, by_sightings=True)
+
+    cache.invalidate_name_queries()
+
+    self.assertIsNone(cache.get('pica'))
+    self.assertEqual(cache.get(position_query), self.results)
+
+  def test_sighting_query_expires_after_sighting_changes(self):
+    cache = self.create_cache(sighting_change_threshold=2)
+    position_query = 'position:47.240,2.278;r=1'
+    cache.put('pica', self.results, by_name=True, by_sightings=False)
+    cache.put(position_query, self.results, by_name=False, by_sightings=True)
+
+    cache.record_sighting_change()
+    self.assertIsNotNone(cache.get(position_query))
+    cache.record_sighting_change()
+
+    self.assertIsNone(cache.get(position_query))
+    self.assertEqual(cache.get('pica'), self.results)
+
+  def test_clear(self):
+    cache = self.create_cache()
+    cache.put('pica', self.results, by_name=True, by_sightings=False)
+
+    cache.clear()
+
+    self.assertIsNone(cache.get('pica'))
@@ -0,0 +1,214 @@
+from unittest import TestCase
+from unittest.mock import Mock
+
+from aveslog.v0.search_index import BirdNameIndex
+from aveslog.v0.search_index import PrefixIndex
+from aveslog.v0.search_index import TrigramIndex
+from aveslog.v0.search_index import like_pattern
+from aveslog.v0.search_index import trigrams
+
+
+class TestTrigrams(TestCase):
+
+  def test_trigrams_of_word(self):
+    self.assertEqual(trigrams('Word'), {'  w', ' wo', 'wor', 'ord', 'rd '})
+
+  def test_trigrams_of_words_ignore_non_alphanumerics(self):
+    self.assertEqual(trigrams('a-b'), {'  a', ' a ', '  b', ' b '})
+
+  def test_trigrams_of_empty_text(self):
+    self.assertEqual(trigrams(' - '), set())
+
+
+class TestLikePattern(TestCase):
+
+  def test_matches_containing_text_ignoring_case(self):
+    self.assertTrue(like_pattern('kat').fullmatch('Skata'))
+    self.assertFalse(like_pattern('kata').fullmatch('Skat'))
+
+  def test_wildcards(self):
+    self.assertTrue(like_pattern('s%a').fullmatch('Skata'))
+    self.assertTrue(like_pattern('sk_ta').fullmatch('Skata'))
+
+  def test_escaped_wildcard(self):
+    self.assertFalse(like_pattern(r'sk\_ta').fullmatch('Skata'))
+    self.assertTrue(like_pattern(r'sk\_ta').fullmatch('Sk_ta'))
+
+
+class TestTrigramIndex(TestCase):
+
+  def test_search_scores_like_pg_trgm_similarity(self):
+    index = TrigramIndex()
+    index.add(1, 'two words')
+
+    results = list(index.search('word'))
+
+    self.assertEqual(results, [(0, 4 / 11)])
+
+  def test_search_finds_only_entries_sharing_trigrams(self):
+    index = TrigramIndex()
+    index.add(1, 'Pica pica')
+    index.add(2, 'Turdus merula')
+
+    entries = [entry for entry, _ in index.search('pica')]
+
+    self.assertEqual(entries, [0])
+
+  def test_memory_usage(self):
+    index = TrigramIndex()
+    empty_usage = index.memory_usage()
+    index.add(1, 'Pica pica')
+
+    self.assertGreater(index.memory_usage(), empty_usage)
+
+
+class TestPrefixIndex(TestCase):
+
+  def setUp(self) -> None:
+    self.index = PrefixIndex(max_limit=3, precomputed_length=2)
+    self.index.build([
+      (1, 'Pica pica'),
+      (2, 'Pica serica'),
+      (3, 'Picus viridis'),
+      (4, 'Turdus merula'),
+    ])
+
+  def test_complete_shortest_names_first(self):
+    self.assertEqual(self.index.complete('pic', 3),
+      [(1, 'Pica pica'), (2, 'Pica serica'), (3, 'Picus viridis')])
+
+  def test_complete_precomputed_prefix(self):
+    self.assertEqual(self.index.complete('Pi', 2),
+      [(1, 'Pica pica'), (2, 'Pica serica')])
+
+  def test_complete_later_word(self):
+    self.assertEqual(self.index.complete('meru', 3), [(4, 'Turdus merula')])
+
+  def test_complete_normalizes_prefix(self):
+    self.assertEqual(self.index.complete('  PICA   se', 3),
+      [(2, 'Pica serica')])
+
+  def test_complete_nothing(self):
+    self.assertEqual(self.index.complete('corvus', 3), [])
+    self.assertEqual(self.index.complete(' ', 3), [])
+
+  def test_complete_one_name_per_bird(self):
+    self.index.add((4, 'Turdus'))
+
+    self.assertEqual(self.index.complete('turdus', 3), [(4, 'Turdus')])
+
+  def test_complete_added_name_with_precomputed_prefix(self):
+    self.index.add((5, 'Pi'))
+
+    self.assertEqual(self.index.complete('p', 1), [(5, 'Pi')])
+
+
+class TestBirdNameIndex(TestCase):
+
+  def setUp(self) -> None:
+    self.time = 1000.0
+    self.session = Mock()
+    self.session.query.side_effect = self.query
+    self.binomial_names = [(1, 'Pica pica'), (2, 'Turdus merula')]
+    self.common_names = [(1, 'Skata', 'sv'), (1, 'Eurasian Magpie', 'en')]
+
+  def query(self, *columns):
+    if columns[0].class_.__name__ == 'Bird':
+      return list(self.binomial_names)
+    query = Mock()
+    query.join.return_value = list(self.common_names)
+    return query
+
+  def create_index(self, time_to_live: float = 600) -> BirdNameIndex:
+    return BirdNameIndex(time_to_live, lambda: self.time)
+
+  def test_name_scores_by_binomial_name(self):
+    scores = self.create_index().name_scores(self.session, 'Pica pica')
+
+    self.assertEqual(scores, {1: 1.0})
+
+  def test_name_scores_binomial_name_above_threshold(self):
+    scores = self.create_index().name_scores(self.session, 'Turdus pica')
+
+    self.assertEqual(set(scores), {1, 2})
+    self.assertTrue(all(score > 0.2 for score in scores.values()))
+
+  def test_name_scores_by_common_name_containing_name(self):
+    scores = self.create_index().name_scores(self.session, 'magpie')
+
+    self.assertEqual(scores, {1: 7 / 16})
+
+  def test_name_scores_none_by_similar_common_name_not_containing_name(self):
+    scores = self.create_index().name_scores(self.session, 'Skatan')
+
+    self.assertEqual(scores, {})
+
+  def test_name_scores_with_added_common_name(self):
+    index = self.create_index()
+    index.name_scores(self.session, 'Koltrast')
+
+    index.add_common_name(2, 'sv', 'Koltrast')
+
+    self.assertEqual(index.name_scores(self.session, 'Koltrast'), {2: 1.0})
+
+  def test_suggest_binomial_and_common_names_in_locale(self):
+    self.common_names.append((2, 'Koltrast', 'sv'))
+
+    suggestions = self.create_index().suggest(self.session, 'k', 'sv', 10)
+
+    self.assertEqual(suggestions, [('Turdus merula', 'Koltrast')])
+
+  def test_suggest_best_name_of_each_bird(self):
+    suggestions = self.create_index().suggest(self.session, 'pica', 'sv', 10)
+
+    self.assertEqual(suggestions, [('Pica pica', 'Pica pica')])
+
+  def test_suggest_without_common_names_of_other_locales(self):
+    suggestions = self.create_index().suggest(self.session, 'ska', 'en', 10)
+
+    self.assertEqual(suggestions, [])
+
+  def test_suggest_added_common_name(self):
+    index = self.create_index()
+    index.suggest(self.session, 'k', 'sv', 10)
+
+    index.add_common_name(2, 'sv', 'Koltrast')
+
+    self.assertEqual(index.suggest(self.session, 'k', 'sv', 10),
+      [('Turdus merula', 'Koltrast')])
+
+  def test_loaded_once_within_time_to_live(self):
+    index = self.create_index(time_to_live=600)
+    index.name_scores(self.session, 'Pica')
+    self.time += 599
+
+    index.name_scores(self.session, 'Pica')
+
+    self.assertEqual(self.session.query.call_count, 2)
+
+  def test_loaded_again_after_time_to_live(self):
+    index = self.create_index(time_to_live=600)
+    index.name_scores(self.session, 'Pica')
+    self.binomial_names.append((3, 'Pica serica'))
+    self.time += 600
+
+    scores = index.name_scores(self.session, 'Pica serica')
+
+    self.assertEqual(scores[3], 1.0)
+
+  def test_loaded_again_after_invalidate(self):
+    index = self.create_index()
+    index.name_scores(self.session, 'Pica')
+
+    index.invalidate()
+    index.name_scores(self.session, 'Pica')
+
+    self.assertEqual(self.session.query.call_count, 4)
+
+  def test_memory_usage(self):
+    index = self.create_index()
+    self.assertEqual(index.memory_usage(), 0)
+
+    index.name_scores(self.session, 'Pica')
+
+    self.assertGreater(index.memory_usage(), 0)
@@ -0,0 +1,121 @@
+from datetime import date
+from unittest import TestCase
+
+from aveslog.v0.search_query import SearchQuery
+from aveslog.v0.search_query import SearchQueryError
+from aveslog.v0.search_query import decode_cursor
+from aveslog.v0.search_query import encode_cursor
+from aveslog.v0.search_query import parse_search_query
+
+
+class TestParseSearchQuery(TestCase):
+
+  def test_name(self):
+    query = parse_search_query('Pica   PICA')
+
+    self.assertEqual(query.name, 'pica pica')
+    self.assertFalse(query.filters_sightings)
+
+  def test_unknown_qualifier_is_part_of_name(self):
+    self.assertEqual(parse_search_query('pica color:black').name,
+      'pica color:black')
+
+  def test_position(self):
+    query = parse_search_query('"Pica" position:47.240055,-2.2783327;r=1')
+
+    self.assertEqual(query.name, 'pica')
+    self.assertEqual(query.position, (47.24, -2.278, 1.0))
+    self.assertTrue(query.filters_sightings)
+
+  def test_position_radius_capped(self):
+    query = parse_search_query('position:47.24,2.27;r=500')
+
+    self.assertEqual(query.position, (47.24, 2.27, 100.0))
+
+  def test_last_position_applies(self):
+    query = parse_search_query('position:1,2;r=1 position:3,4;r=5')
+
+    self.assertEqual(query.position, (3.0, 4.0, 5.0))
+
+  def test_invalid_position(self):
+    for value in ['1.2.3,4;r=1', '91,2;r=1', '47,2;r=0', '47,2', '']:
+      with self.subTest(value=value):
+        with self.assertRaises(SearchQueryError):
+          parse_search_query(f'position:{value}')
+
+  def test_date_range(self):
+    query = parse_search_query('date:2020-01-01..2020-12-31')
+
+    self.assertEqual(query.start_date, date(2020, 1, 1))
+    self.assertEqual(query.end_date, date(2020, 12, 31))
+
+  def test_open_date_ranges(self):
+    self.assertEqual(parse_search_query('date:2020-01-01..').end_date, None)
+    self.assertEqual(parse_search_query('date:..2020-12-31').start_date, None)
+
+  def test_single_date(self):
+    query = parse_search_query('date:2020-04-16')
+
+    self.assertEqual(query.start_date, date(2020, 4, 16))
+    self.assertEqual(query.end_date, date(2020, 4, 16))
+
+  def test_invalid_date_range(self):
+    for value in ['..', '2020-13-01', '2020-01-012020-02-01', 'yesterday']:
+      with self.subTest(value=value):
+        with self.assertRaises(SearchQueryError):
+          parse_search_query(f'date:{value}')
+
+  def test_birder(self):
+    self.assertEqual(parse_search_query('birder:3').birder_id, 3)
+    with self.assertRaises(SearchQueryError):
+      parse_search_query('birder:kenny')
+
+  def test_locale(self):
+    query = parse_search_query('skata locale:SV')
+
+    self.assertEqual(query.locale_code, 'sv')
+    self.assertFalse(query.filters_sightings)
+
+  def test_seen_by_me(self):
+    self.assertTrue(parse_search_query('seen:me').seen_by_me)
+    with self.assertRaises(SearchQueryError):
+      parse_search_query('seen:you')
+
+  def test_unbalanced_quotes(self):
+    with self.assertRaises(SearchQueryError):
+      parse_search_query('"pica')
+
+
+class TestSearchQuery(TestCase):
+
+  def test_normalized(self):
+    query = parse_search_query(
+      'seen:me Pica  position:47.240055,2.2783327;r=1 PICA date:..2020-12-31 '
+      'birder:3 locale:sv')
+
+    self.assertEqual(query.normalized(),
+      "'pica pica' position:47.240,2.278;r=1 date:..2020-12-31 birder:3 "
+      "locale:sv seen:me")
+
+  def test_normalized_parses_to_equal_query(self):
+    query = parse_search_query('Pica date:2020-04-16 position:1,2;r=3')
+
+    self.assertEqual(parse_search_query(query.normalized()), query)
+
+  def test_empty(self):
+    self.assertEqual(SearchQuery().normalized(), '')
+
+
+class TestCursor(TestCase):
+
+  def test_decode_encoded(self):
+    score = 0.1 + 0.2
+
+    self.assertEqual(decode_cursor(encode_cursor(score, 3)), (score, 3))
+
+  def test_decode_invalid(self):
+    for cursor in ['', 'nonsense', encode_cursor(1.0, 3)[:-2],
+                   'WzEsMiwzXQ==', 'WyJhIiwxXQ==']:
+      with self.subTest(cursor=cursor):
+        with self.assertRaises(SearchQueryError):
+          decode_cursor(cursor)
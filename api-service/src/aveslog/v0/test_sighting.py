@@ -1,6 +1,9 @@
 from unittest import TestCase
 from aveslog.v0.models import Sighting
-from datetime import date
+from aveslog.v0.sighting import decode_sighting_cursor
+from aveslog.v0.sighting import encode_sighting_cursor
+from aveslog.v0.sighting import sighting_position
+from datetime import date, time
 
 
 class TestSighting(TestCase):
@@ -19,3 +22,27 @@ class TestSighting(TestCase):
       repr(sighting), (
         "<Sighting(birder_id='8', bird_id='15', "
         "sighting_date='2019-07-12', sighting_time='None')>"))
+
+
+class TestSightingCursor(TestCase):
+
+  def test_decode_encoded(self):
+    position = (date(2019, 7, 12), time(11, 52, 30), 4)
+
+    self.assertEqual(
+      decode_sighting_cursor(encode_sighting_cursor(position)), position)
+
+  def test_decode_invalid(self):
+    for cursor in ['', 'nonsense', 'WzEsMiwzXQ==',
+                   encode_sighting_cursor((date(2019, 7, 12), time(0), 4))[:-3],
+                   'WyIyMDE5LTA3LTEyIiwgbnVsbCwgNF0=',
+                   'WyIyMDE5LTA3LTEyIiwgIjExOjUyIiwgIjQiXQ==']:
+      with self.subTest(cursor=cursor):
+        with self.assertRaises(ValueError):
+          decode_sighting_cursor(cursor)
+
+  def test_position_of_sighting_without_time(self):
+    sighting = Sighting(id=4, sighting_date=date(2019, 7, 12))
+
+    self.assertEqual(sighting_position(sighting),
+      (date(2019, 7, 12), time(0), 4))
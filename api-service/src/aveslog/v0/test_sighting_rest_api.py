@@ -5,7 +5,11 @@ from http import HTTPStatus
 from flask import Response
 
 from aveslog.test_util import AppTestCase
+from aveslog.test_util import get_test_database_session
 from aveslog.v0.error import ErrorCode
+from aveslog.v0.geocoding import MockedGeocoding
+from aveslog.v0.position_naming import PositionNamer
+from aveslog.v0.sighting import encode_sighting_cursor
 
 
 class TestGetSightings(AppTestCase):
@@ -25,17 +29,18 @@ class TestGetSightings(AppTestCase):
     response = self.get_with_access_token('/sightings', account_id=3)
 
     self.assertEqual(response.status_code, HTTPStatus.OK)
+    self.assert_query_budget(response, 3)
     self.assertDictEqual(response.json, {
       'items': [
         {
-          'id': 8,
-          'birderId': 2,
+          'id': 10,
+          'birderId': 4,
           'birdId': 'pica-pica',
           'date': '2019-08-28',
           'time': '11:52:00',
           'position': {
-            'lat': 47.240055,
-            'lon': 2.2783327,
+            'lat': 37.5665,
+            'lon': 126.9780,
           }
         },
         {
@@ -46,14 +51,14 @@ class TestGetSightings(AppTestCase):
           'time': '11:52:00'
         },
         {
-          'id': 10,
-          'birderId': 4,
+          'id': 8,
+          'birderId': 2,
           'birdId': 'pica-pica',
           'date': '2019-08-28',
           'time': '11:52:00',
           'position': {
-            'lat': 37.5665,
-            'lon': 126.9780,
+            'lat': 47.240055,
+            'lon': 2.2783327,
           }
         }
       ],
@@ -67,18 +72,56 @@ class TestGetSightings(AppTestCase):
     self.assertDictEqual(response.json, {
       'items': [
         {
-          'id': 8,
-          'birderId': 2,
+          'id': 10,
+          'birderId': 4,
           'birdId': 'pica-pica',
           'date': '2019-08-28',
           'time': '11:52:00',
           'position': {
-            'lat': 47.240055,
-            'lon': 2.2783327,
+            'lat': 37.5665,
+            'lon': 126.9780,
           }
         }
       ],
       'hasMore': True,
+      'cursor': encode_sighting_cursor((date(2019, 8, 28), time(11, 52), 10)),
+    })
+
+  def test_get_sightings_pages_by_cursor(self):
+    self.db_insert_sighting(11, 2, 1, date(2019, 8, 28), None, None)
+    self.db_insert_sighting(12, 2, 1, date(2019, 8, 29), time(7, 15), None)
+    pages = []
+    path = '/sightings?limit=2'
+
+    while path:
+      response = self.get_with_access_token(path, account_id=3)
+      self.assertEqual(response.status_code, HTTPStatus.OK)
+      pages.append([item['id'] for item in response.json['items']])
+      cursor = response.json.get('cursor')
+      self.assertEqual(response.json['hasMore'], cursor is not None)
+      path = f'/sightings?limit=2&cursor={cursor}' if cursor else None
+
+    self.assertEqual(pages, [[12, 10], [9, 8], [11]])
+
+  def test_get_birder_sightings_pages_by_cursor(self):
+    response = self.get_with_access_token('/birders/2/sightings?limit=1',
+      account_id=3)
+    cursor = response.json['cursor']
+
+    response = self.get_with_access_token(
+      f'/birders/2/sightings?limit=1&cursor={cursor}', account_id=3)
+
+    self.assertEqual([item['id'] for item in response.json['items']], [8])
+    self.assertFalse(response.json['hasMore'])
+    self.assertNotIn('cursor', response.json)
+
+  def test_get_sightings_with_invalid_cursor(self):
+    response = self.get_with_access_token('/sightings?cursor=nonsense',
+      account_id=3)
+
+    self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+    self.assertEqual(response.json, {
+      'error': 'cursor-invalid',
     })
 
   def test_get_sightings_with_invalid_limit(self):
@@ -199,6 +242,38 @@ class TestPostSighting(AppTestCase):
     sighting_id = get_created_sighting_id(sighting_post_response)
     sighting_url = f'/sightings/{sighting_id}'
     sighting = self.get_with_access_token(sighting_url, account_id=1)
+    self.assertDictEqual(sighting.json, {
+      'id': sighting_id,
+      'birderId': 1,
+      'birdId': 'pica-pica',
+      'date': '2019-09-11',
+      'time': '17:42:00',
+      'position': {
+        'lat': 64.145981,
+        'lon': -21.9422367
+      }
+    })
+
+  def test_post_sighting_position_named_by_worker(self):
+    access_token = self.create_access_token(1).jwt
+    sighting_post_response = self.post_sighting(
+      access_token,
+      1,
+      'pica pica',
+      '17:42',
+      (64.145981, -21.9422367),
+    )
+    sighting_id = get_created_sighting_id(sighting_post_response)
+    session = get_test_database_session()
+    try:
+      named_count = PositionNamer(MockedGeocoding()).name_positions(session, 10)
+    finally:
+      session.close()
+
+    sighting = self.get_with_access_token(
+      f'/sightings/{sighting_id}', account_id=1)
+
+    self.assertEqual(named_count, 1)
     self.assertDictEqual(sighting.json, {
       'id': sighting_id,
       'birderId': 1,
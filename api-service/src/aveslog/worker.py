@@ -0,0 +1,130 @@
+"""Background jobs of the api service
+
+Runs each job periodically, in a session of its own, until stopped. Run it
+next to the api service against the same database:
+
+  python -m aveslog.worker
+"""
+import logging
+import os
+import signal
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, List
+
+from sqlalchemy.orm import Session
+
+from aveslog.nominatim import nominatim_url
+from aveslog.v0 import create_database_connection_details
+from aveslog.v0.authentication import delete_expired_refresh_tokens
+from aveslog.v0.database import EngineFactory
+from aveslog.v0.database import SessionFactory
+from aveslog.v0.geocoding import create_geocoding
+from aveslog.v0.position_naming import PositionNamer
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+
+  def __init__(self, name: str, interval: float,
+        function: Callable[[Session], Any]):
+    self.name = name
+    self.interval = interval
+    self.function = function
+    self.next_run_time = 0.0
+
+
+def purge_expired_refresh_tokens(session: Session, batch_size: int) -> int:
+  """Deletes the expired refresh tokens a batch per transaction, so that no
+  transaction holds locks on many rows"""
+  deleted_count = 0
+  while True:
+    count = delete_expired_refresh_tokens(
+      session, datetime.utcnow(), batch_size)
+    session.commit()
+    deleted_count += count
+    if count < batch_size:
+      return deleted_count
+
+
+def run_jobs(jobs: List[PeriodicJob],
+      session_factory: SessionFactory,
+      stop: threading.Event,
+      time_supplier: Callable[[], float] = time.monotonic,
+) -> None:
+  while not stop.is_set():
+    for job in jobs:
+      if job.next_run_time <= time_supplier():
+        run_job(job, session_factory)
+        job.next_run_time = time_supplier() + job.interval
+    next_run_time = min(job.next_run_time for job in jobs)
+    stop.wait(max(next_run_time - time_supplier(), 0))
+
+
+def run_job(job: PeriodicJob, session_factory: SessionFactory) -> None:
+  session = session_factory.create_session()
+  try:
+    result = job.function(session)
+    # Most runs find nothing to do, and would flood the log at INFO
+    logger.log(logging.INFO if result else logging.DEBUG,
+      'Ran %s: %s', job.name, result)
+  except Exception:
+    session.rollback()
+    logger.exception('Failed to run %s', job.name)
+  finally:
+    session.close()
+
+
+def create_geocoding_configuration() -> dict:
+  fake_latency = os.environ.get('FAKE_GEOCODING_LATENCY')
+  return {
+    'fake_latency': float(fake_latency) if fake_latency is not None else None,
+    'gazetteer_path': os.environ.get('GAZETTEER_PATH'),
+    'max_distance': float(os.environ.get('GAZETTEER_MAX_DISTANCE', '50')),
+    'url': os.environ.get('NOMINATIM_URL', nominatim_url),
+    'connect_timeout': float(
+      os.environ.get('NOMINATIM_CONNECT_TIMEOUT', '3.05')),
+    'read_timeout': float(os.environ.get('NOMINATIM_READ_TIMEOUT', '10')),
+    'max_retries': int(os.environ.get('NOMINATIM_MAX_RETRIES', '2')),
+  }
+
+
+def create_jobs() -> List[PeriodicJob]:
+  refresh_token_batch_size = int(
+    os.environ.get('REFRESH_TOKEN_PURGE_BATCH_SIZE', '1000'))
+  position_namer = PositionNamer(
+    create_geocoding(**create_geocoding_configuration()),
+    max_attempts=int(os.environ.get('POSITION_NAMING_MAX_ATTEMPTS', '8')),
+    reuse_distance=float(
+      os.environ.get('POSITION_NAME_REUSE_DISTANCE', '100')))
+  position_naming_batch_size = int(
+    os.environ.get('POSITION_NAMING_BATCH_SIZE', '100'))
+  return [
+    PeriodicJob('purge expired refresh tokens',
+      float(os.environ.get('REFRESH_TOKEN_PURGE_INTERVAL', '3600')),
+      lambda session: purge_expired_refresh_tokens(
+        session, refresh_token_batch_size)),
+    PeriodicJob('name positions',
+      float(os.environ.get('POSITION_NAMING_INTERVAL', '10')),
+      lambda session: position_namer.name_positions(
+        session, position_naming_batch_size)),
+  ]
+
+
+def main():
+  logging.basicConfig(level=logging.INFO,
+    format='%(asctime)s %(levelname)s %(name)s %(message)s')
+  engine = EngineFactory().create_engine(**create_database_connection_details())
+  stop = threading.Event()
+  signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+  signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+  try:
+    run_jobs(create_jobs(), SessionFactory(engine), stop)
+  finally:
+    engine.dispose()
+
+
+if __name__ == '__main__':
+  main()
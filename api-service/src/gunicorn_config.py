@@ -4,3 +4,17 @@ loglevel = 'info'
 accesslog = '-'
 access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"'
 workers = 2
+# Threads keep serving other requests while a thread waits for password
+# hashing, which runs in a separate pool of processes.
+worker_class = 'gthread'
+threads = 4
+# Every worker holds its own database pool of up to DATABASE_POOL_SIZE +
+# DATABASE_MAX_OVERFLOW connections, so workers times that needs to stay below
+# the max_connections of the database. The pool should also have room for a
+# connection per thread.
+
+
+def post_worker_init(worker):
+  # Starts the password hashing processes before the worker threads do, so
+  # that the first logins do not wait for them
+  worker.wsgi.hashing_pool.start()
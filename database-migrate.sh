@@ -0,0 +1,3 @@
+#!/bin/sh
+
+docker exec database-service /migrate.sh
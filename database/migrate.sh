@@ -0,0 +1,60 @@
+#!/bin/bash
+
+# Applies the migrations in /migrations that are not yet recorded in the
+# schema_migration table, in file name order. psql runs each statement of a
+# migration in its own transaction, which allows indexes to be created
+# CONCURRENTLY on a live database.
+
+set -e
+
+migrations_dir=${MIGRATIONS_DIR:-/migrations}
+psql="psql -v ON_ERROR_STOP=1 --no-psqlrc --quiet
+  --username ${POSTGRES_USER:-postgres}
+  --dbname ${POSTGRES_DB:-birding-database}"
+
+$psql -c 'CREATE TABLE IF NOT EXISTS schema_migration (
+  version TEXT,
+  applied_datetime TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  CONSTRAINT schema_migration_version_primary_key PRIMARY KEY (version)
+);'
+
+# An interrupted CREATE INDEX CONCURRENTLY leaves an invalid index behind,
+# which IF NOT EXISTS would accept when the migration is retried. Only the
+# indexes created by the migrations are dropped, and none while another
+# session may still be building it, which holds a SHARE UPDATE EXCLUSIVE lock
+# on its table throughout.
+migration_indexes=$(grep -ohiE \
+  'CREATE +(UNIQUE +)?INDEX +(CONCURRENTLY +)?(IF +NOT +EXISTS +)?[a-z0-9_]+' \
+  "$migrations_dir"/*.sql | awk '{print tolower($NF)}' | sort -u | paste -sd,)
+invalid_indexes=$($psql -tAc "
+  SELECT index_class.relname, EXISTS (
+    SELECT 1 FROM pg_locks
+    WHERE relation = pg_index.indrelid
+      AND mode = 'ShareUpdateExclusiveLock'
+      AND pid <> pg_backend_pid())
+  FROM pg_index
+  JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+  JOIN pg_namespace ON pg_namespace.oid = index_class.relnamespace
+  WHERE NOT pg_index.indisvalid
+    AND pg_namespace.nspname = 'public'
+    AND index_class.relname = ANY ('{$migration_indexes}'::text[]);")
+for invalid_index in $invalid_indexes; do
+  index=${invalid_index%|*}
+  if [ "${invalid_index#*|}" = "t" ]; then
+    echo "Index $index is invalid and may still be built by another session"
+    exit 1
+  fi
+  echo "Dropping invalid index $index"
+  $psql -c "DROP INDEX CONCURRENTLY IF EXISTS $index;"
+done
+
+for migration in "$migrations_dir"/*.sql; do
+  version=$(basename "$migration" .sql)
+  applied=$($psql -tAc \
+    "SELECT 1 FROM schema_migration WHERE version = '$version';")
+  if [ -z "$applied" ]; then
+    echo "Applying migration $version"
+    $psql -f "$migration"
+    $psql -c "INSERT INTO schema_migration (version) VALUES ('$version');"
+  fi
+done
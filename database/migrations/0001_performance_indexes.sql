@@ -0,0 +1,41 @@
+-- Sightings of a birder, and of everyone, newest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS sighting_birder_id_date_time_index
+  ON sighting (birder_id, sighting_date DESC, sighting_time DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS sighting_date_time_index
+  ON sighting (sighting_date DESC, sighting_time DESC);
+
+-- Sighting and birder counts of a bird, and a birder's sightings of a bird
+CREATE INDEX CONCURRENTLY IF NOT EXISTS sighting_bird_id_birder_id_index
+  ON sighting (bird_id, birder_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS sighting_position_id_index
+  ON sighting (position_id);
+
+-- Bird lookup by binomial name, and similarity and ILIKE name searches
+CREATE INDEX CONCURRENTLY IF NOT EXISTS bird_binomial_name_index
+  ON bird (binomial_name);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS bird_binomial_name_trigram_index
+  ON bird USING GIN (binomial_name gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS bird_common_name_name_trigram_index
+  ON bird_common_name USING GIN (name gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS bird_common_name_bird_id_index
+  ON bird_common_name (bird_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS bird_look_bird_id_index
+  ON bird_look (bird_id);
+
+-- Spatial searches on sighting positions
+CREATE INDEX CONCURRENTLY IF NOT EXISTS position_point_index
+  ON position USING GIST (point);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS position_name_position_id_index
+  ON position_name (position_id);
+
+-- Account lookups by email, username and birder, and authorization joins
+CREATE INDEX CONCURRENTLY IF NOT EXISTS account_email_lower_index
+  ON account (lower(email));
+CREATE INDEX CONCURRENTLY IF NOT EXISTS account_username_index
+  ON account (username);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS account_birder_id_index
+  ON account (birder_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS account_role_role_id_index
+  ON account_role (role_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS refresh_token_account_id_index
+  ON refresh_token (account_id);
@@ -0,0 +1,6 @@
+-- Hashing algorithm and cost of each stored password, so that the cost can
+-- be raised without invalidating existing passwords. Existing rows were all
+-- hashed with PBKDF2-SHA256 at 100000 iterations.
+ALTER TABLE hashed_password
+  ADD COLUMN IF NOT EXISTS algorithm TEXT NOT NULL DEFAULT 'pbkdf2_sha256',
+  ADD COLUMN IF NOT EXISTS iterations INTEGER NOT NULL DEFAULT 100000;
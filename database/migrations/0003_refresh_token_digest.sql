@@ -0,0 +1,33 @@
+-- Refresh tokens are looked up by the SHA-256 digest of the token rather than
+-- by the token itself. Both columns are optional until 0006, so that the
+-- previous version, writing only the token, and this one, writing only the
+-- digest, can both issue refresh tokens in between.
+ALTER TABLE refresh_token ADD COLUMN IF NOT EXISTS token_digest TEXT;
+ALTER TABLE refresh_token DROP CONSTRAINT IF EXISTS refresh_token_token_not_null;
+ALTER TABLE refresh_token DROP CONSTRAINT IF EXISTS refresh_token_token_unique;
+
+-- Backfills the digests a batch of ids per transaction, so that no
+-- transaction holds the locks of the rows of the whole table
+DO $$
+DECLARE
+  batch_start INTEGER := 0;
+  last_id INTEGER;
+BEGIN
+  SELECT max(id) INTO last_id FROM refresh_token;
+  WHILE batch_start < coalesce(last_id, 0) LOOP
+    UPDATE refresh_token
+      SET token_digest = encode(sha256(token::bytea), 'hex')
+      WHERE id > batch_start AND id <= batch_start + 1000
+        AND token_digest IS NULL;
+    COMMIT;
+    batch_start := batch_start + 1000;
+  END LOOP;
+END
+$$;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS refresh_token_token_digest_index
+  ON refresh_token (token_digest);
+
+-- Purging of expired tokens
+CREATE INDEX CONCURRENTLY IF NOT EXISTS refresh_token_expiration_date_index
+  ON refresh_token (expiration_date);
@@ -0,0 +1,21 @@
+-- Positions of posted sightings waiting to be named by reverse geocoding,
+-- which the worker does outside of the requests posting them. Failed
+-- attempts are retried at the next attempt time.
+CREATE TABLE IF NOT EXISTS position_naming_task (
+  id SERIAL,
+  position_id INTEGER,
+  attempt_count INTEGER NOT NULL DEFAULT 0,
+  next_attempt_time TIMESTAMP NOT NULL,
+  last_error TEXT,
+  creation_time TIMESTAMP NOT NULL,
+  CONSTRAINT position_naming_task_id_primary_key PRIMARY KEY (id),
+  CONSTRAINT position_naming_task_position_id_not_null
+    CHECK (position_id IS NOT NULL),
+  CONSTRAINT position_naming_task_position_id_unique UNIQUE (position_id),
+  CONSTRAINT position_naming_task_position_id_foreign_key
+    FOREIGN KEY (position_id) REFERENCES position(id) ON DELETE CASCADE
+);
+
+-- Due tasks, oldest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS position_naming_task_next_attempt_time_index
+  ON position_naming_task (next_attempt_time);
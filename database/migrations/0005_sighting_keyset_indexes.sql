@@ -0,0 +1,13 @@
+-- Pages of sightings, of a birder and of everyone, newest first and after the
+-- date, time and id of the last sighting of the previous page. Sightings
+-- without time are last of their date. Replaces the indexes on date and time
+-- alone, which could not order sightings of the same date and time.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS sighting_birder_id_keyset_index
+  ON sighting (birder_id, sighting_date DESC,
+    (COALESCE(sighting_time, '00:00:00'::time)) DESC, id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS sighting_keyset_index
+  ON sighting (sighting_date DESC,
+    (COALESCE(sighting_time, '00:00:00'::time)) DESC, id DESC);
+
+DROP INDEX CONCURRENTLY IF EXISTS sighting_birder_id_date_time_index;
+DROP INDEX CONCURRENTLY IF EXISTS sighting_date_time_index;
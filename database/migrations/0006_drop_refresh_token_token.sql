@@ -0,0 +1,7 @@
+-- Applied once no version writing only the token runs. The digests of tokens
+-- that such versions issued after 0003 are backfilled, which are few, before
+-- the digest is required and the token column dropped.
+UPDATE refresh_token SET token_digest = encode(sha256(token::bytea), 'hex')
+  WHERE token_digest IS NULL;
+ALTER TABLE refresh_token ALTER COLUMN token_digest SET NOT NULL;
+ALTER TABLE refresh_token DROP COLUMN IF EXISTS token;
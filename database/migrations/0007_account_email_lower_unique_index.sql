@@ -0,0 +1,22 @@
+-- Accounts are looked up by email regardless of case, by registration, login
+-- and credentials recovery, so emails must be unique regardless of case too.
+-- Accounts whose emails only differ in case are to be resolved by hand before
+-- this is applied.
+DO $$
+DECLARE
+  duplicate_count INTEGER;
+BEGIN
+  SELECT count(*) INTO duplicate_count FROM (
+    SELECT lower(email) FROM account
+    GROUP BY lower(email) HAVING count(*) > 1) AS duplicate;
+  IF duplicate_count > 0 THEN
+    RAISE EXCEPTION '% emails belong to several accounts when ignoring case',
+      duplicate_count;
+  END IF;
+END
+$$;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS account_email_lower_unique_index
+  ON account (lower(email));
+-- Made redundant by the unique index
+DROP INDEX CONCURRENTLY IF EXISTS account_email_lower_index;
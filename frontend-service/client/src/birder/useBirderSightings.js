@@ -1,9 +1,14 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useCallback } from 'react';
 import SightingService from '../sighting/SightingService';
 
-export const useBirderSightings = birder => {
+/**
+ * The sightings of the birder, a page at a time. When given the first page,
+ * as already fetched with the birder, it is shown without fetching it again.
+ */
+export const useBirderSightings = (birder, firstPage) => {
   const [sightingsBirder, setSightingsBirder] = useState();
   const [sightings, setSightings] = useState([]);
+  const [cursor, setCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
@@ -13,20 +18,48 @@ export const useBirderSightings = birder => {
       const response = await new SightingService().fetchBirderSightings(birder.id);
       if (response.status === 200) {
         setSightings(response.data.items);
+        setCursor(response.data.cursor || null);
         setSightingsBirder(birder);
       }
       setLoading(false);
     }
     if (birder) {
       if (!sightingsBirder || sightingsBirder.id !== birder.id) {
-        setSightings([]);
-        fetchSightings();
+        if (firstPage) {
+          setSightings(firstPage.items);
+          setCursor(firstPage.cursor || null);
+          setSightingsBirder(birder);
+          setLoading(false);
+        }
+        else {
+          setSightings([]);
+          setCursor(null);
+          fetchSightings();
+        }
       }
     }
     else {
       setSightings([]);
+      setCursor(null);
     }
-  }, [birder, sightingsBirder]);
+  }, [birder, firstPage, sightingsBirder]);
 
-  return { sightings, loading, error };
+  const loadMore = useCallback(async () => {
+    if (!cursor || loading) {
+      return;
+    }
+    setLoading(true);
+    const response = await new SightingService().fetchBirderSightings(birder.id, cursor);
+    if (response.status === 200) {
+      setSightings(prevSightings => [...prevSightings, ...response.data.items]);
+      setCursor(response.data.cursor || null);
+      setError(null);
+    }
+    else {
+      setError(response.status);
+    }
+    setLoading(false);
+  }, [birder, cursor, loading]);
+
+  return { sightings, loading, error, hasMore: cursor !== null, loadMore };
 };
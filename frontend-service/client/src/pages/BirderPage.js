@@ -5,18 +5,22 @@ import { useTranslation } from 'react-i18next';
 import './BirderPage.scss';
 import 'birder/BirderConnectionButton.scss';
 import { PageHeading } from 'generic/PageHeading';
+import { MoreSightingsButton } from '../sighting/MoreSightingsButton.js';
+import { useBirderSightings } from '../birder/useBirderSightings.js';
 import axios from 'axios';
 
 export default ({ data }) => {
   const { account } = useContext(UserContext);
   const { t } = useTranslation();
+  const { sightings, loading, hasMore, loadMore } = useBirderSightings(data.birder, data.sightings);
 
   return (
     <div className='birder-page'>
       <PageHeading>{data.birder.name}</PageHeading>
       {account.birder.id !== data.birder.id && <BirderConnectionButton birder={data.birder} />}
       <h2>{t('Sightings')}</h2>
-      <SightingsSection sightings={data.sightings.items} />
+      <SightingsSection sightings={sightings} />
+      <MoreSightingsButton hasMore={hasMore} loading={loading} onClick={loadMore} />
     </div>
   );
 };
@@ -2,15 +2,17 @@ import React from 'react';
 import { useTranslation } from 'react-i18next';
 import { useAuthenticatedAccountSightings } from '../useAuthenticatedAccountSightings';
 import { SightingsSection } from '../sighting/SightingsSection.js';
+import { MoreSightingsButton } from '../sighting/MoreSightingsButton.js';
 
 export default () => {
-  const sightings = useAuthenticatedAccountSightings();
+  const { sightings, hasMore, loadingMore, loadMore } = useAuthenticatedAccountSightings();
   const { t } = useTranslation();
 
   return (
     <div>
       <h1>{t('Sightings')}</h1>
       <SightingsSection sightings={sightings} />
+      <MoreSightingsButton hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
     </div>
   );
 };
@@ -0,0 +1,16 @@
+import React from 'react';
+import { useTranslation } from 'react-i18next';
+import './MoreSightingsButton.scss';
+
+export const MoreSightingsButton = ({ hasMore, loading, onClick }) => {
+  const { t } = useTranslation();
+
+  if (!hasMore) {
+    return null;
+  }
+  return (
+    <button className='more-sightings-button' disabled={loading} onClick={onClick}>
+      {t('more-sightings-button')}
+    </button>
+  );
+};
@@ -11,10 +11,13 @@ const SightingProvider = props => {
   const { unauthenticate } = useContext(AuthenticationContext);
   const [sightingsAccount, setSightingsAccount] = useState(null);
   const [sightings, setSightings] = useState([]);
+  const [cursor, setCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     if (account !== sightingsAccount) {
       setSightings([]);
+      setCursor(null);
     }
     setSightingsAccount(account);
   }, [account, sightingsAccount]);
@@ -29,14 +32,38 @@ const SightingProvider = props => {
         }
         return prevSightings;
       });
+      setCursor(response.data.cursor || null);
     }
     if (response.status === 401) {
       unauthenticate();
     }
   }, [account, unauthenticate]);
 
+  const loadMoreSightings = useCallback(async () => {
+    if (!cursor || loadingMore) {
+      return;
+    }
+    setLoadingMore(true);
+    const response = await sightingService.fetchBirderSightings(account.birder.id, cursor);
+    if (response.status === 200) {
+      setSightings(prevSightings => [...prevSightings, ...response.data.items]);
+      setCursor(response.data.cursor || null);
+    }
+    if (response.status === 401) {
+      unauthenticate();
+    }
+    setLoadingMore(false);
+  }, [account, cursor, loadingMore, unauthenticate]);
+
+  const contextValue = {
+    sightings,
+    refreshSightings,
+    hasMoreSightings: cursor !== null,
+    loadingMoreSightings: loadingMore,
+    loadMoreSightings,
+  };
 
-  return <SightingContext.Provider value={{ sightings, refreshSightings }}>
+  return <SightingContext.Provider value={contextValue}>
     {props.children}
   </SightingContext.Provider>;
 }
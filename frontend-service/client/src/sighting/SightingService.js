@@ -6,8 +6,10 @@ export default class SightingService {
     return await axios.get('/api/sightings?limit=10');
   }
 
-  async fetchBirderSightings(birderId) {
-    return await axios.get(`/api/birders/${birderId}/sightings`);
+  async fetchBirderSightings(birderId, cursor) {
+    return await axios.get(`/api/birders/${birderId}/sightings`, {
+      params: { cursor }
+    });
   }
 
   async fetchSightingByLocation(location) {
@@ -2,9 +2,20 @@ import { useEffect, useContext } from 'react';
 import { SightingContext } from './sighting/SightingContext';
 
 export const useAuthenticatedAccountSightings = () => {
-  const { sightings, refreshSightings } = useContext(SightingContext);
+  const {
+    sightings,
+    refreshSightings,
+    hasMoreSightings,
+    loadingMoreSightings,
+    loadMoreSightings,
+  } = useContext(SightingContext);
   useEffect(() => {
     refreshSightings();
   }, [refreshSightings]);
-  return sightings
+  return {
+    sightings,
+    hasMore: hasMoreSightings,
+    loadingMore: loadingMoreSightings,
+    loadMore: loadMoreSightings,
+  };
 }
@@ -95,7 +95,12 @@ router.get('/birders/:id', async (req, res) => {
 });
 
 router.get('/birders/:id/sightings', async (req, res) => {
-  const response = await req.axios.get(`/birders/${req.params.id}/sightings`);
+  const response = await req.axios.get(`/birders/${req.params.id}/sightings`, {
+    params: {
+      limit: req.query.limit,
+      cursor: req.query.cursor
+    }
+  });
   res.json(response.data);
 });
 
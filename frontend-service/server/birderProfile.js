@@ -4,7 +4,12 @@ var router = express.Router();
 router.get('/:id', (req, res) => {
   const birderPromise = req.axios.get(`/birders/${req.params.id}`)
   .then(response => response.data);
-  const sightingsPromise = req.axios.get(`/birders/${req.params.id}/sightings`)
+  const sightingsPromise = req.axios.get(`/birders/${req.params.id}/sightings`, {
+    params: {
+      limit: req.query.limit,
+      cursor: req.query.cursor
+    }
+  })
   .then(response => response.data);
   Promise.all([birderPromise, sightingsPromise])
     .then(([birder, sightings]) => {